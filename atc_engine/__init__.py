@@ -2,18 +2,35 @@
 ATC Engine Package
 ----------------
 GPIO-based button input handling with support for combinations and actions.
+
+Submodules are imported on first attribute access, so importing the package
+(or a single submodule) does not pull in every backend and its dependencies.
 """
 
-from .app import Application
-from .action_handler import ActionHandler
-from .button_manager import ButtonState
-from .config_loader import load_config
-from .gpio_handler import GPIOMonitor
+import importlib
+
+# Exported name -> submodule that defines it
+_EXPORTS = {
+    'Application': 'app',
+    'ActionHandler': 'action_handler',
+    'ButtonState': 'button_manager',
+    'load_config': 'config_loader',
+    'FramebufferRenderer': 'framebuffer',
+    'Renderer': 'renderer',
+    'create_renderers': 'renderer',
+    'GPIOMonitor': 'gpio_handler',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """Import the submodule defining an exported name on first use."""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
 
-__all__ = [
-    'Application',
-    'ActionHandler',
-    'ButtonState',
-    'load_config',
-    'GPIOMonitor',
-]
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
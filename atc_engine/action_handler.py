@@ -7,45 +7,88 @@ Handles the execution of actions and media display when buttons are pressed.
 import threading
 import subprocess
 import os
-from typing import Optional, Dict, Any, Set, Tuple
+import time
+from typing import Callable, Optional, Dict, Any, Set, Tuple
+
+from .dispatch import DispatchTable
+from .event_journal import journal
 
 class ActionHandler:
     """Handles the execution of actions and media display."""
     
-    def __init__(self, config: Dict[str, Any]):
-        self._lock = threading.Lock()
+    def __init__(self, config: Dict[str, Any], renderers: Optional[Dict[str, Any]] = None,
+                 display_power: Optional[Any] = None, dispatch: Optional[DispatchTable] = None,
+                 reload_callback: Optional[Callable[[], None]] = None):
+        # Re-entrant: media handlers and stop_current are called with the lock held
+        self._lock = threading.RLock()
         self._current_media: Optional[str] = None
         self._current_action: Optional[str] = None
         self._config = config
+        self._dispatch = dispatch if dispatch is not None else DispatchTable(config)
+        self._reload_callback = reload_callback
         self._active_combinations: Set[Tuple[str, ...]] = set()
+        self._last_pressed_buttons: Set[str] = set()
+        self._renderers = renderers or {}
+        self._active_renderer: Optional[Any] = None
+        self._display_power = display_power
+        # Media started by a gesture stays up after the buttons are released
+        self._latched = False
+        # Set by cleanup(); the renderers are closed and nothing is displayed any more
+        self._closed = False
+
+    def _render(self, mode: str, path: str) -> None:
+        """Display media with the renderer configured for its mode, if any."""
+        renderer = self._renderers.get(mode)
+        if renderer is None or self._closed:
+            return
+        if self._active_renderer is not None and self._active_renderer is not renderer:
+            self._active_renderer.stop()
+        self._active_renderer = renderer
+        if not renderer.play(mode, path):
+            print(f"[Media] Renderer '{renderer.name}' failed to display: {path}")
+
+    def _stop_rendering(self) -> None:
+        """Stop whichever renderer is currently displaying media."""
+        if self._active_renderer is not None:
+            self._active_renderer.stop()
+            self._active_renderer = None
+
+    def wait_displayed(self, timeout: float = 5.0) -> bool:
+        """Block until the active renderer has the current media on screen."""
+        renderer = self._active_renderer
+        return renderer.wait_ready(timeout) if renderer is not None else False
 
     def _handle_hdmi_control(self) -> None:
         """Handle HDMI control action."""
         print("[Action] Toggle HDMI output")
-        # Here we just simulate/log the action
-        # In a real implementation, you would call the actual HDMI toggle code
+        if self._display_power:
+            self._display_power.toggle()
 
     def _handle_load_config(self) -> None:
         """Handle config reload action."""
         print("[Action] Reload configuration")
-        # Here we just simulate/log the action
-        # In a real implementation, you would trigger config reload
+        if self._reload_callback:
+            self._reload_callback()
 
     def _handle_media_flash(self, path: str) -> None:
         """Handle flash mode media."""
         print(f"[Media] Flash display: {path}")
+        self._render('flash', path)
 
     def _handle_media_still(self, path: str) -> None:
         """Handle still mode media."""
         print(f"[Media] Show still image: {path}")
+        self._render('still', path)
 
     def _handle_media_slide(self, path: str) -> None:
         """Handle slide mode media."""
         print(f"[Media] Start slideshow from: {path}")
+        self._render('slide', path)
 
     def _handle_media_scroll_text(self, path: str) -> None:
         """Handle scroll text mode media."""
         print(f"[Media] Scroll text from: {path}")
+        self._render('scroll_text', path)
 
     def handle_button_state(self, button_state: Dict[str, Any]) -> None:
         """Process button state and trigger appropriate actions/media."""
@@ -53,16 +96,17 @@ class ActionHandler:
             # Get pressed buttons and active combinations
             pressed_buttons = set(button_state.get("pressed_buttons", []))
             new_combinations = set(button_state.get("active_combinations", []))
+            active_layer = button_state.get("active_layer")
+            table = self._dispatch.table(active_layer)
+            # Only combinations that just became active trigger; held ones already did
+            triggered = new_combinations - self._active_combinations
+            for button_set in triggered:
+                journal.combo(button_set, active_layer)
 
             # Check for media triggers
-            for media_name, media_config in self._config["media"].items():
-                if "button" not in media_config: # Ensure button key exists
-                    continue
-                
-                buttons = media_config["button"] if isinstance(media_config["button"], list) else [media_config["button"]]
-                button_set = tuple(sorted(buttons))
-                
-                if button_set in new_combinations:
+            for button_set in triggered:
+                for media_name in table.media.get(button_set, ()):
+                    media_config = self._config["media"][media_name]
                     # Case 1: Button for the *currently active* media is pressed again
                     if media_name == self._current_media:
                         print(f"[ActionHandler] Button for active media '{media_name}' pressed again. Returning to default.")
@@ -79,28 +123,54 @@ class ActionHandler:
                         self.execute_media(media_name, media_config) # execute_media handles stopping the old one
 
             # Check for action triggers
-            for action_name, action_config in self._config["actions"].items():
-                buttons = action_config["button"] if isinstance(action_config["button"], list) else [action_config["button"]]
-                button_set = tuple(sorted(buttons))
-                
-                if button_set in new_combinations:
-                    self.execute_action(action_name, action_config)
+            for button_set in triggered:
+                for action_name in table.actions.get(button_set, ()):
+                    self.execute_action(action_name, self._config["actions"][action_name])
+
+            # Gestures recognized since the last tick
+            for gesture in button_state.get("gestures", ()):
+                print(f"[ActionHandler] Gesture '{gesture.name}' recognized")
+                journal.gesture(gesture.name)
+                if gesture.section == 'media':
+                    self.trigger_media(gesture.target)
+                else:
+                    self.trigger_action(gesture.target)
 
             # Update active combinations
             self._active_combinations = new_combinations
 
-            # Stop current media/action if no buttons are pressed
-            if not pressed_buttons:
+            # Stop current media/action once all buttons are released
+            if not pressed_buttons and self._last_pressed_buttons and not self._latched:
+                self.stop_current()
+            self._last_pressed_buttons = pressed_buttons
+
+    def trigger_media(self, media_name: str) -> None:
+        """Show a media entry by name until something else replaces it.
+
+        Triggering the media that is already showing returns to the default.
+        """
+        with self._lock:
+            if media_name == self._current_media:
                 self.stop_current()
+                return
+            self.execute_media(media_name, self._config["media"][media_name])
+            self._latched = True
+
+    def trigger_action(self, action_name: str) -> None:
+        """Run an action entry by name."""
+        with self._lock:
+            self.execute_action(action_name, self._config["actions"][action_name])
 
     def execute_media(self, media_name: str, media_config: Dict[str, Any]) -> None:
         """Execute a media display action."""
+        self._latched = False
         if self._current_media == media_name: # Add this check
             print(f"[Media] '{media_name}' is already active.") # Optional: log this
             return # Add this return
 
         old_media = self._current_media
         self._current_media = media_name
+        journal.media(media_name)
 
         # Stop current media if different
         if old_media and old_media != media_name:
@@ -132,6 +202,7 @@ class ActionHandler:
 
         # Execute new action based on mode
         mode = action_config["mode"]
+        start = time.monotonic()
 
         if mode == "hdmi_control":
             self._handle_hdmi_control()
@@ -139,25 +210,29 @@ class ActionHandler:
             self._handle_load_config()
         else:
             print(f"[Action] Unknown action mode: {mode}")
+        journal.action(action_name, time.monotonic() - start)
 
     def stop_current(self) -> None:
         """Stop current media and action, then display default media if configured."""
         with self._lock:
+            if self._current_action:
+                print(f"[Action] Stopping: {self._current_action}")
+                # Add any specific action stop logic here
+                self._current_action = None
+
+            default_media_name = self._config.get('settings', {}).get('default_media_name')
+            if self._current_media and self._current_media == default_media_name:
+                return  # Already showing the default; nothing to revert
+
             stopped_media = False
             if self._current_media:
                 print(f"[Media] Stopping: {self._current_media}")
-                # Add any specific media stop logic here if needed (e.g., kill process)
+                # The renderer is replaced by the default media below, or stopped if there is none
                 self._current_media = None
                 stopped_media = True
-            
-            if self._current_action:
-                print(f"[Action] Stopping: {self._current_action}")
-                # Add any specific action stop logic here
-                self._current_action = None
 
             # If any media was stopped or no media was active, try to show default
             if stopped_media or not self._current_media : # Ensure default shows if nothing was active too
-                default_media_name = self._config.get('settings', {}).get('default_media_name')
                 if default_media_name and default_media_name in self._config.get('media', {}):
                     # Avoid re-triggering if default is already what we intended to stop to.
                     # This check is now in execute_media, so direct call is fine.
@@ -173,7 +248,56 @@ class ActionHandler:
                     self.execute_media(default_media_name, default_media_config)
                 else:
                     print("[ActionHandler] No default media configured or found to revert to.")
+                    self._stop_rendering()
+
+    def apply_config(self, new_config: Dict[str, Any], diff: Any) -> None:
+        """Adopt a reloaded config, leaving unchanged media on screen.
+
+        The dispatch table is shared with the button manager and is updated
+        by the application before this is called.
+        """
+        with self._lock:
+            old_default = self._config.get('settings', {}).get('default_media_name')
+            self._config = new_config
+            current = self._current_media
+            if current is None:
+                return
+
+            _, media_removed, media_changed = diff.section('media')
+            new_default = new_config.get('settings', {}).get('default_media_name')
+            if current in media_removed:
+                print(f"[ActionHandler] Active media '{current}' was removed from the config.")
+                self.stop_current()
+            elif current in media_changed:
+                print(f"[ActionHandler] Active media '{current}' changed; redisplaying.")
+                self._current_media = None
+                self.execute_media(current, new_config['media'][current])
+            elif current == old_default and new_default != old_default:
+                print(f"[ActionHandler] Default media changed to '{new_default}'.")
+                self.stop_current()
+            else:
+                print(f"[ActionHandler] Active media '{current}' unchanged; keeping it on screen.")
 
     def cleanup(self) -> None:
-        """Clean up any resources."""
-        self.stop_current()
\ No newline at end of file
+        """Stop the current media and action and release the renderers (later calls do nothing).
+
+        Unlike stop_current(), this does not bring up the default media.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._current_action:
+                print(f"[Action] Stopping: {self._current_action}")
+                self._current_action = None
+            if self._current_media:
+                print(f"[Media] Stopping: {self._current_media}")
+                self._current_media = None
+            self._stop_rendering()
+            for renderer in set(self._renderers.values()):
+                renderer.close()
+            if self._display_power:
+                # Never leave a kiosk dark after shutdown
+                self._display_power.set_power(True)
+                self._display_power.close()
+                self._display_power = None
\ No newline at end of file
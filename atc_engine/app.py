@@ -5,12 +5,64 @@ Contains the main Application class that orchestrates all components.
 """
 
 import threading
-from typing import Optional
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional, Set
 
 from .action_handler import ActionHandler
 from .button_manager import ButtonManager
 from .gpio_handler import GPIOMonitor
-from .config_loader import load_config
+from .config_loader import ConfigDiff, get_cache_dir
+from .config_watcher import ConfigWatcher
+from .control_socket import ControlSocket
+from .dispatch import DispatchTable
+from .event_journal import DEFAULT_CAPACITY, journal, journal_path
+from .display_power import create_display_power
+from .renderer import create_renderers
+from .sampling_profiler import DEFAULT_CAPTURE_SECONDS, install_signal_handlers
+from .startup_profile import profiler
+
+# Optional subsystems are imported where they are enabled, keeping them off the boot path
+if TYPE_CHECKING:
+    from .derivatives import DerivativeCache
+    from .media_index import MediaIndex
+    from .media_store import MediaStore
+
+# Seconds between flushes of the event journal to disk
+JOURNAL_FLUSH_INTERVAL = 5.0
+
+class MediaWorker(threading.Thread):
+    """Runs media preparation off the main thread, so boot and reloads do not wait on it.
+
+    Requests made while a run is in progress are coalesced into one more run.
+    """
+
+    def __init__(self, prepare: Callable[[], None]):
+        super().__init__(name="MediaWorkerThread")
+        self.daemon = True
+        self._prepare = prepare
+        self._request_event = threading.Event()
+        self._shutdown_event = threading.Event()
+
+    def request(self) -> None:
+        """Ask for another run (safe from any thread)."""
+        self._request_event.set()
+
+    def stop(self) -> None:
+        """Signal the thread to stop after the current run."""
+        self._shutdown_event.set()
+        self._request_event.set()
+
+    def run(self) -> None:
+        """Main thread loop."""
+        while True:
+            self._request_event.wait()
+            if self._shutdown_event.is_set():
+                return
+            self._request_event.clear()
+            try:
+                self._prepare()
+            except Exception as e:
+                print(f"[App] Error preparing media: {e}")
 
 class Application:
     """Main application class that coordinates all components."""
@@ -22,60 +74,235 @@ class Application:
         self._button_manager: Optional[ButtonManager] = None
         self._gpio_handler: Optional[GPIOMonitor] = None
         self._action_handler: Optional[ActionHandler] = None
+        self._dispatch: Optional[DispatchTable] = None
+        self._config_watcher: Optional[ConfigWatcher] = None
+        self._media_index: Optional['MediaIndex'] = None
+        self._media_store: Optional['MediaStore'] = None
+        self._derivatives: Optional['DerivativeCache'] = None
+        self._media_worker = MediaWorker(self._prepare_media)
+        self._renderers: Set[Any] = set()
+        self._control_socket: Optional[ControlSocket] = None
         self._shutdown_event = threading.Event()
+        self._reload_event = threading.Event()
+        self._wake_event = threading.Event()
         
     def _init_components(self) -> bool:
         """Initialize all application components in correct order."""
         try:
             print("[App] Loading configuration")
-            self._config = load_config(self._config_path)
-            
+            with profiler.phase('load configuration'):
+                from .config_snapshot import load_compiled_config
+                self._config, self._dispatch = load_compiled_config(self._config_path)
+
+            if self._config['settings'].get('event_journal', True):
+                settings = self._config['settings']
+                try:
+                    journal.open(journal_path(settings), settings.get('event_journal_size', DEFAULT_CAPACITY))
+                    journal.mark('engine started')
+                except OSError as e:
+                    print(f"[App] Warning: cannot open event journal: {e}")
+
             print("[App] Initializing button manager")
-            self._button_manager = ButtonManager(self._config)
+            with profiler.phase('button manager'):
+                self._button_manager = ButtonManager(self._config, self._dispatch)
             
+            print("[App] Initializing renderers")
+            with profiler.phase('renderers'):
+                renderers = create_renderers(self._config['settings'])
+            self._renderers = set(renderers.values())
+
+            # Media is ingested in the background; renderers resolve to sources until it is stored
+            if self._config['settings'].get('media_store'):
+                with profiler.phase('media store'):
+                    from .media_store import open_media_store
+                    self._media_store = open_media_store(self._config['settings'])
+                for renderer in self._renderers:
+                    renderer.media_store = self._media_store
+
+            # Preflight runs in the background; unknown images count as readable until it is done
+            if self._config['settings'].get('media_preflight', True):
+                from .media_index import open_media_index
+                self._media_index = open_media_index(self._config['settings'])
+                for renderer in self._renderers:
+                    renderer.media_index = self._media_index
+
+            # Derivatives are built in the background; sources are shown until theirs is ready
+            if self._config['settings'].get('derivatives', True):
+                from .derivatives import open_derivative_cache
+                self._derivatives = open_derivative_cache(self._config['settings'])
+            if self._derivatives:
+                for renderer in self._renderers:
+                    renderer.derivatives = self._derivatives
+
+            print("[App] Initializing display power control")
+            with profiler.phase('display power'):
+                display_power = create_display_power(self._config['settings'])
+
             print("[App] Initializing action handler")
-            self._action_handler = ActionHandler(self._config)
+            with profiler.phase('action handler'):
+                self._action_handler = ActionHandler(
+                    self._config,
+                    renderers,
+                    display_power,
+                    dispatch=self._dispatch,
+                    reload_callback=self.request_reload,
+                )
             
             print("[App] Initializing GPIO handler")
-            self._gpio_handler = GPIOMonitor(
-                self._config,
-                self._button_manager,
-                self._action_handler
-            )
+            with profiler.phase('GPIO handler'):
+                self._gpio_handler = GPIOMonitor(
+                    self._config,
+                    self._button_manager,
+                    self._action_handler
+                )
             
+            if self._config['settings'].get('watch_config', True):
+                self._config_watcher = ConfigWatcher(self._config_path, self.request_reload)
+
+            if self._config['settings'].get('control', False):
+                self._control_socket = ControlSocket(self._config['settings'], self._gpio_handler)
+
             return True
             
         except Exception as e:
             print(f"[App] Error initializing components: {e}")
             return False
+
+    def _prepare_media(self) -> None:
+        """Store, index and queue derivatives of the current config's media (runs on the media worker)."""
+        from .media_index import collect_media_files, collect_media_paths
+
+        config = self._config
+        if self._media_store:
+            print("[App] Ingesting media into the media store")
+            self._media_store.ingest(collect_media_files(config))
+        paths = collect_media_paths(config, self._media_store)
+        # Derivatives build on their own thread while the preflight runs
+        if self._derivatives:
+            self._derivatives.submit(paths, on_built=self._derivatives_built)
+        if self._media_index:
+            print("[App] Preflighting media")
+            for info in self._media_index.preflight(paths).values():
+                if not info.ok:
+                    print(f"[App] Warning: unreadable image {info.path}: {info.error}")
+        self._media_changed()
+
+    def _derivatives_built(self, built: int) -> None:
+        """Derivative build callback: new derivatives change what folders resolve to."""
+        if built:
+            self._media_changed()
+
+    def _media_changed(self) -> None:
+        """Drop the renderers' cached slide folder listings."""
+        for renderer in self._renderers:
+            renderer.media_changed()
+
+    def request_reload(self) -> None:
+        """Ask the main loop to reload the configuration (safe from any thread)."""
+        self._reload_event.set()
+        self._wake_event.set()
+
+    def reload_config(self) -> bool:
+        """Reload the config file and apply only what changed.
+
+        Buttons, combinations and media that did not change keep their state,
+        and the media on screen stays up unless it was edited or removed.
+        Returns False (keeping the running config) if the new file is invalid.
+        """
+        from .config_snapshot import load_config_with_hash, save_snapshot
+
+        print("[App] Reloading configuration")
+        try:
+            new_config, content_hash = load_config_with_hash(self._config_path)
+        except Exception as e:
+            print(f"[App] Keeping current configuration; reload failed: {e}")
+            return False
+
+        diff = ConfigDiff(self._config, new_config)
+        if diff.is_empty:
+            print("[App] Configuration unchanged")
+            return True
+        print(f"[App] Applying configuration changes ({diff})")
+
+        for key in ('renderer', 'framebuffer_device', 'display_power_backend', 'display_output',
+                    'control', 'control_socket', 'control_udp_port', 'gpio_broker',
+                    'event_journal', 'event_journal_size', 'media_store',
+                    'derivatives', 'derivative_size'):
+            if key in diff.settings_changed:
+                print(f"[App] Warning: setting '{key}' changed; it takes effect after a restart")
+
+        # Polling is paused so no tick sees a half-applied config
+        with self._gpio_handler.paused():
+            affected = self._dispatch.update(new_config, diff)
+            self._button_manager.apply_config(new_config, diff)
+            self._action_handler.apply_config(new_config, diff)
+            self._gpio_handler.apply_config(new_config, diff)
+            self._config = new_config
+
+        print(f"[App] Configuration reloaded ({len(affected)} combinations re-indexed)")
+        journal.mark('config reloaded')
+        if diff.touched('media'):
+            self._media_worker.request()
+        try:
+            save_snapshot(self._config_path, content_hash, self._config, self._dispatch)
+        except OSError as e:
+            print(f"[App] Could not update config snapshot: {e}")
+        return True
         
     def run(self) -> None:
         """Start the application and its components."""
         print("[App] Starting application")
         
         # Initialize components
-        if not self._init_components():
+        with profiler.phase('init components'):
+            initialized = self._init_components()
+        if not initialized:
             print("[App] Failed to initialize components. Exiting.")
             return
         
+        settings = self._config['settings']
+        install_signal_handlers(get_cache_dir(settings, 'profiles'),
+                                settings.get('profile_capture_seconds', DEFAULT_CAPTURE_SECONDS))
+
         # Start GPIO monitoring
         self._gpio_handler.start()
 
+        if self._config_watcher:
+            self._config_watcher.start()
+
+        if self._control_socket:
+            self._control_socket.start()
+
+        self._media_worker.start()
+        self._media_worker.request()
+
         # Display default media
         if self._action_handler and self._config:
             default_media_name = self._config.get('settings', {}).get('default_media_name')
             if default_media_name and default_media_name in self._config.get('media', {}):
                 default_media_config = self._config['media'][default_media_name]
                 print(f"[App] Displaying default media: {default_media_name}")
-                self._action_handler.execute_media(default_media_name, default_media_config)
+                with profiler.phase('default media'):
+                    self._action_handler.execute_media(default_media_name, default_media_config)
+                    if profiler.enabled:
+                        self._action_handler.wait_displayed()
             else:
                 print(f"[App] Warning: Default media '{default_media_name}' not found in config.")
+        profiler.first_frame()
         
         try:
             # Main application loop
             print("[App] Running main loop")
+            last_flush = time.monotonic()
             while not self._shutdown_event.is_set():
-                self._shutdown_event.wait(timeout=0.1)
+                self._wake_event.wait(timeout=0.1)
+                self._wake_event.clear()
+                if time.monotonic() - last_flush >= JOURNAL_FLUSH_INTERVAL:
+                    journal.flush()
+                    last_flush = time.monotonic()
+                if self._reload_event.is_set() and not self._shutdown_event.is_set():
+                    self._reload_event.clear()
+                    self.reload_config()
                 
         except KeyboardInterrupt:
             print("\n[App] Keyboard interrupt received")
@@ -90,6 +317,14 @@ class Application:
         """Stop the application and its components cleanly."""
         print("[App] Stopping application")
         self._shutdown_event.set()
+        self._wake_event.set()
+
+        if self._config_watcher:
+            self._config_watcher.stop()
+
+        if self._control_socket:
+            self._control_socket.stop()
+            self._control_socket.join(timeout=1.0)
         
         # Stop GPIO handler
         if self._gpio_handler:
@@ -102,6 +337,22 @@ class Application:
             print("[App] Cleaning up action handler")
             self._action_handler.cleanup()
         
+        if self._media_worker.is_alive():
+            self._media_worker.stop()
+            self._media_worker.join(timeout=2.0)
+
+        if self._media_index:
+            self._media_index.close()
+
+        if self._media_store:
+            self._media_store.close()
+
+        if self._derivatives:
+            self._derivatives.close()
+
+        journal.mark('engine stopped')
+        journal.close()
+
         # Clean up button manager
         if self._button_manager:
             print("[App] Cleaning up button manager")
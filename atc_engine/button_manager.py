@@ -2,11 +2,22 @@
 Button Manager Module
 -------------------
 Handles button state tracking and management.
+
+Raw pin levels are debounced here, before anything else sees them: once a
+button changes state, further changes are ignored for `debounce_time`
+seconds. The first edge is accepted immediately, so debouncing adds no
+latency; contact bounce after it is dropped, and the level the input
+settles on is picked up by the next poll. Button states, the event journal
+and the gesture recognizer all see only the debounced edges.
 """
 
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Any, Dict, List, Set, Optional, Tuple
 import time
 
+from .dispatch import DispatchTable
+from .event_journal import journal
+from .gestures import Gesture, GestureEngine
+
 class ButtonState:
     """Tracks the state of a button including timing information."""
     def __init__(self, mode: str = "press"):
@@ -17,10 +28,12 @@ class ButtonState:
         self.was_in_combo: bool = False  # Track if button was part of a combo
         self.mode: str = mode
         self.hold_start_time: Optional[float] = None
+        self.last_edge_time: float = float('-inf')  # Time of the last accepted edge, for debouncing
 
     def update(self, state: int, current_time: float) -> None:
         """Update button state with new input."""
         if state != self.last_state:
+            self.last_edge_time = current_time
             if state == 0:  # Button pressed
                 self.is_pressed = True
                 self.last_press_time = current_time
@@ -30,6 +43,7 @@ class ButtonState:
             else:  # Button released
                 self.is_pressed = False
                 self.hold_start_time = None
+                self.was_in_combo = False
             self.last_state = state
 
     def get_hold_duration(self, current_time: float) -> float:
@@ -40,21 +54,80 @@ class ButtonState:
 
 class ButtonManager:
     """Manages button states and combinations."""
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, dispatch: Optional[DispatchTable] = None):
         self.buttons: Dict[str, ButtonState] = {}
         self.config = config
+        self.dispatch = dispatch if dispatch is not None else DispatchTable(config)
         self.active_combinations: Set[Tuple[str, ...]] = set()
         self.current_time: float = time.time()
+        self._debounce_time: float = float(config['settings'].get('debounce_time', 0.0))
+        # Layer selected by the toggled-on layer button (None for the base layer)
+        self.active_layer: Optional[str] = None
+        # Combinations that fired and still have a button held; their subsets stay suppressed
+        self._fired: Set[Tuple[str, ...]] = set()
+        self.gestures = GestureEngine(config)
         
         # Initialize button states
         for btn_name, btn_config in config['buttons'].items():
             self.buttons[btn_name] = ButtonState(mode=btn_config['mode'])
 
+    def apply_config(self, new_config: Dict, diff: Any) -> None:
+        """Adopt a reloaded config, keeping the state of unchanged buttons.
+
+        The dispatch table is shared with the action handler and is updated
+        by the application before this is called.
+        """
+        added, removed, changed = diff.section('buttons')
+        for btn_name in removed:
+            del self.buttons[btn_name]
+        for btn_name in added | changed:
+            old_state = self.buttons.get(btn_name)
+            if old_state and old_state.mode == new_config['buttons'][btn_name]['mode']:
+                continue  # Only the pin moved; keep press/toggle state
+            self.buttons[btn_name] = ButtonState(mode=new_config['buttons'][btn_name]['mode'])
+        self.config = new_config
+        self._debounce_time = float(new_config['settings'].get('debounce_time', 0.0))
+        self._refresh_active_layer()
+        if diff.touched('gestures'):
+            self.gestures = GestureEngine(new_config)
+
+    def _refresh_active_layer(self) -> None:
+        """Derive the active layer from the layer buttons' toggle states."""
+        self.active_layer = next(
+            (layer for btn_name, layer in self.dispatch.layer_buttons.items()
+             if self.buttons[btn_name].is_toggled),
+            None,
+        )
+
     def update_button_state(self, button_name: str, state: int) -> None:
         """Update the state of a single button."""
         if button_name in self.buttons:
             self.current_time = time.time()
-            self.buttons[button_name].update(state, self.current_time)
+            button = self.buttons[button_name]
+            if state != button.last_state and self.current_time - button.last_edge_time < self._debounce_time:
+                return  # Bounce; the settled level is read again on the next poll
+            was_toggled = button.is_toggled
+            was_state = button.last_state
+            button.update(state, self.current_time)
+            if state != was_state:
+                journal.edge(button_name, state)
+                self.gestures.feed(button_name, state == 0, self.current_time)
+            if button_name in self.dispatch.layer_buttons and button.is_toggled != was_toggled:
+                self._select_layer(button_name)
+
+    def _select_layer(self, button_name: str) -> None:
+        """Layer buttons behave like radio buttons: toggling one on turns the others off."""
+        if self.buttons[button_name].is_toggled:
+            for other in self.dispatch.layer_buttons:
+                if other != button_name:
+                    self.buttons[other].is_toggled = False
+        self._refresh_active_layer()
+        print(f"[Buttons] Active layer: {self.active_layer or 'base'}")
+
+    def edge_settle_time(self, button_name: str) -> float:
+        """Seconds until a new edge on the button would be accepted rather than debounced."""
+        elapsed = time.time() - self.buttons[button_name].last_edge_time
+        return max(0.0, self._debounce_time - elapsed)
 
     def is_button_pressed(self, button_name: str) -> bool:
         """Check if a button is currently pressed."""
@@ -66,37 +139,46 @@ class ButtonManager:
         return button.is_toggled if button and button.mode == "toggle" else False
 
     def get_pressed_buttons(self) -> List[str]:
-        """Get a list of currently pressed button names."""
-        return [name for name, state in self.buttons.items() if state.is_pressed]
+        """Get a list of currently pressed button names (layer buttons excluded)."""
+        layer_buttons = self.dispatch.layer_buttons
+        return [name for name, state in self.buttons.items() if state.is_pressed and name not in layer_buttons]
 
     def get_active_combinations(self) -> List[Tuple[str, ...]]:
         """Get currently active button combinations."""
         combinations = []
         pressed_buttons = set(self.get_pressed_buttons())
-        
-        # Check media combinations
-        for media_name, media_config in self.config['media'].items():
-            if 'button' in media_config:
-                buttons = media_config['button'] if isinstance(media_config['button'], list) else [media_config['button']]
-                button_set = set(buttons)
-                
-                if button_set.issubset(pressed_buttons):
-                    hold_time = media_config.get('hold_time', self.config['settings']['default_combo_hold_time'])
-                    # Check hold time for all buttons in combination
-                    if all(self.buttons[btn].get_hold_duration(self.current_time) >= hold_time for btn in button_set):
-                        combinations.append(tuple(sorted(button_set)))
-
-        # Check action combinations
-        for action_name, action_config in self.config['actions'].items():
-            buttons = action_config['button'] if isinstance(action_config['button'], list) else [action_config['button']]
-            button_set = set(buttons)
-            
-            if button_set.issubset(pressed_buttons):
-                hold_time = action_config.get('hold_time', self.config['settings']['default_combo_hold_time'])
+        # A fired combination is forgotten once all of its buttons are released
+        self._fired = {
+            combo for combo in self._fired
+            if any(self.buttons[btn].was_in_combo for btn in combo if btn in self.buttons)
+        }
+        if not pressed_buttons:
+            return combinations
+
+        # Each combination is indexed once per layer with the shortest hold time of its triggers
+        table = self.dispatch.table(self.active_layer)
+        for button_set, hold_time in table.hold_times.items():
+            if pressed_buttons.issuperset(button_set):
+                # Check hold time for all buttons in combination
                 if all(self.buttons[btn].get_hold_duration(self.current_time) >= hold_time for btn in button_set):
-                    combinations.append(tuple(sorted(button_set)))
+                    combinations.append(button_set)
+
+        # Drop subsets of held or fired supersets and lower-priority overlapping combinations
+        winners = table.resolve(combinations, pressed_buttons, self._fired)
+        for button_set in winners:
+            if len(button_set) > 1:
+                self._fired.add(button_set)
+                for btn in button_set:
+                    self.buttons[btn].was_in_combo = True
+        return winners
+
+    def poll_gestures(self) -> List[Gesture]:
+        """Gestures recognized since the last poll (including long presses that just fired).
 
-        return combinations
+        Gestures bound to a layer are dropped unless that layer is active.
+        """
+        return [gesture for gesture in self.gestures.poll(time.time())
+                if gesture.layer is None or gesture.layer == self.active_layer]
 
     def get_button_hold_duration(self, button_name: str) -> float:
         """Get how long a button has been held down."""
@@ -109,4 +191,5 @@ class ButtonManager:
         for button in self.buttons.values():
             button.is_pressed = False
             button.was_in_combo = False
-            button.hold_start_time = None
\ No newline at end of file
+            button.hold_start_time = None
+        self._fired.clear()
\ No newline at end of file
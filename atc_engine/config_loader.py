@@ -6,7 +6,40 @@ Handles loading and validation of configuration files.
 
 import json
 import os
-from typing import Dict, Any, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, Dict, Any, Iterable, Optional, Set, Tuple, Union
+
+from .gestures import GESTURE_TYPES, compile_gestures
+
+# Where derived data (frame caches, indexes) lives unless settings override it
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'atc_engine')
+
+# Media paths are stat'ed concurrently (they may live on network storage);
+# below the threshold a thread pool costs more than it saves.
+PATH_CHECK_WORKERS = 16
+PARALLEL_PATH_THRESHOLD = 32
+
+def _stat_mtime(path: str) -> Optional[int]:
+    """Modification time of a path in ns, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def stat_paths(paths: Iterable[str]) -> Dict[str, Optional[int]]:
+    """Return the mtime (None if missing) of each distinct path, stat'ing in parallel."""
+    unique_paths = list(dict.fromkeys(paths))
+    if len(unique_paths) < PARALLEL_PATH_THRESHOLD:
+        return {path: _stat_mtime(path) for path in unique_paths}
+    with ThreadPoolExecutor(max_workers=PATH_CHECK_WORKERS) as executor:
+        return dict(zip(unique_paths, executor.map(_stat_mtime, unique_paths)))
+
+def check_media_paths(media: Dict[str, Dict[str, Any]]) -> None:
+    """Raise ValueError for the first media entry (in config order) whose path is missing."""
+    mtimes = stat_paths(media_config['path'] for media_config in media.values())
+    for name, media_config in media.items():
+        if mtimes[media_config['path']] is None:
+            raise ValueError(f"Media '{name}' path '{media_config['path']}' does not exist")
 
 def validate_button_config(name: str, config: Dict[str, Any]) -> None:
     """Validate a button configuration."""
@@ -20,8 +53,19 @@ def validate_button_config(name: str, config: Dict[str, Any]) -> None:
     if config['mode'] not in ['press', 'toggle']:
         raise ValueError(f"Button '{name}' has invalid mode '{config['mode']}'")
 
-def validate_media_config(name: str, config: Dict[str, Any], valid_buttons: List[str]) -> None:
-    """Validate a media configuration."""
+    if 'layer' in config:
+        if config['mode'] != 'toggle':
+            raise ValueError(f"Button '{name}' selects a layer and must use mode 'toggle'")
+        if not isinstance(config['layer'], str) or not config['layer']:
+            raise ValueError(f"Button '{name}' layer must be a non-empty string")
+
+def validate_media_config(name: str, config: Dict[str, Any], valid_buttons: AbstractSet[str],
+                          check_path: bool = True) -> None:
+    """Validate a media configuration.
+
+    With check_path=False the path is not stat'ed; load_config checks all
+    paths together with check_media_paths() instead.
+    """
     if 'mode' not in config:
         raise ValueError(f"Media '{name}' missing 'mode' field")
     if config['mode'] not in ['flash', 'still', 'slide', 'scroll_text']:
@@ -29,7 +73,7 @@ def validate_media_config(name: str, config: Dict[str, Any], valid_buttons: List
 
     if 'path' not in config:
         raise ValueError(f"Media '{name}' missing 'path' field")
-    if not os.path.exists(config['path']):
+    if check_path and not os.path.exists(config['path']):
         raise ValueError(f"Media '{name}' path '{config['path']}' does not exist")
 
     if 'button' in config:
@@ -41,7 +85,10 @@ def validate_media_config(name: str, config: Dict[str, Any], valid_buttons: List
     if 'hold_time' in config and not isinstance(config['hold_time'], (int, float)):
         raise ValueError(f"Media '{name}' hold_time must be a number")
 
-def validate_action_config(name: str, config: Dict[str, Any], valid_buttons: List[str]) -> None:
+    if 'priority' in config and not isinstance(config['priority'], int):
+        raise ValueError(f"Media '{name}' priority must be an integer")
+
+def validate_action_config(name: str, config: Dict[str, Any], valid_buttons: AbstractSet[str]) -> None:
     """Validate an action configuration."""
     if 'mode' not in config:
         raise ValueError(f"Action '{name}' missing 'mode' field")
@@ -59,10 +106,58 @@ def validate_action_config(name: str, config: Dict[str, Any], valid_buttons: Lis
     if 'hold_time' in config and not isinstance(config['hold_time'], (int, float)):
         raise ValueError(f"Action '{name}' hold_time must be a number")
 
+    if 'priority' in config and not isinstance(config['priority'], int):
+        raise ValueError(f"Action '{name}' priority must be an integer")
+
+def validate_gesture_config(name: str, config: Dict[str, Any], valid_buttons: AbstractSet[str],
+                            media: AbstractSet[str], actions: AbstractSet[str]) -> None:
+    """Validate a gesture configuration."""
+    if config.get('type') not in GESTURE_TYPES:
+        raise ValueError(f"Gesture '{name}' has invalid type '{config.get('type')}'")
+
+    if config['type'] == 'sequence':
+        buttons = config.get('buttons')
+        if not isinstance(buttons, list) or len(buttons) < 2:
+            raise ValueError(f"Gesture '{name}' needs a 'buttons' list of at least two buttons")
+    else:
+        if 'button' not in config:
+            raise ValueError(f"Gesture '{name}' missing 'button' field")
+        buttons = [config['button']]
+    for btn in buttons:
+        if btn not in valid_buttons:
+            raise ValueError(f"Gesture '{name}' references invalid button '{btn}'")
+
+    if ('media' in config) == ('action' in config):
+        raise ValueError(f"Gesture '{name}' needs exactly one of 'media' or 'action'")
+    if 'media' in config and config['media'] not in media:
+        raise ValueError(f"Gesture '{name}' references unknown media '{config['media']}'")
+    if 'action' in config and config['action'] not in actions:
+        raise ValueError(f"Gesture '{name}' references unknown action '{config['action']}'")
+
+    for key in ('max_duration', 'window', 'threshold', 'repeat'):
+        if key in config and (not isinstance(config[key], (int, float)) or config[key] <= 0):
+            raise ValueError(f"Gesture '{name}' {key} must be a positive number")
+
+def validate_layers(config: Dict[str, Any]) -> None:
+    """Validate layer references of media and actions against the layer buttons."""
+    layer_buttons = {name for name, button in config['buttons'].items() if 'layer' in button}
+    layers = {config['buttons'][name]['layer'] for name in layer_buttons}
+
+    for section, label in (('media', 'Media'), ('actions', 'Action'), ('gestures', 'Gesture')):
+        for name, trigger_config in config[section].items():
+            if 'layer' in trigger_config and trigger_config['layer'] not in layers:
+                raise ValueError(f"{label} '{name}' references unknown layer '{trigger_config['layer']}'")
+            if 'button' in trigger_config or 'buttons' in trigger_config:
+                buttons = trigger_config.get('buttons') or trigger_config['button']
+                buttons = buttons if isinstance(buttons, list) else [buttons]
+                for btn in buttons:
+                    if btn in layer_buttons:
+                        raise ValueError(f"{label} '{name}' uses layer button '{btn}' as a trigger")
+
 def validate_settings(config: Dict[str, Any]) -> None:
     """Validate global settings."""
     required_settings = {
-        'debounce_time': 0.5,
+        'debounce_time': 0.02,
         'poll_interval': 0.05,
         'default_combo_hold_time': 1.0
     }
@@ -73,6 +168,102 @@ def validate_settings(config: Dict[str, Any]) -> None:
         elif not isinstance(config[key], (int, float)):
             raise ValueError(f"Setting '{key}' must be a number")
 
+    if 'cache_dir' in config and not isinstance(config['cache_dir'], str):
+        raise ValueError("Setting 'cache_dir' must be a string")
+
+    if 'watch_config' in config and not isinstance(config['watch_config'], bool):
+        raise ValueError("Setting 'watch_config' must be true or false")
+
+    if 'media_preflight' in config and not isinstance(config['media_preflight'], bool):
+        raise ValueError("Setting 'media_preflight' must be true or false")
+
+    if 'control' in config and not isinstance(config['control'], bool):
+        raise ValueError("Setting 'control' must be true or false")
+
+    if 'control_socket' in config and not isinstance(config['control_socket'], (str, type(None))):
+        raise ValueError("Setting 'control_socket' must be a socket path or null")
+
+    if 'control_udp_port' in config and not isinstance(config['control_udp_port'], (int, type(None))):
+        raise ValueError("Setting 'control_udp_port' must be a port number or null")
+
+    if 'event_journal' in config and not isinstance(config['event_journal'], bool):
+        raise ValueError("Setting 'event_journal' must be true or false")
+
+    if 'event_journal_size' in config and (
+            not isinstance(config['event_journal_size'], int) or config['event_journal_size'] < 16):
+        raise ValueError("Setting 'event_journal_size' must be an integer of at least 16")
+
+    if 'profile_capture_seconds' in config and (
+            not isinstance(config['profile_capture_seconds'], (int, float)) or config['profile_capture_seconds'] <= 0):
+        raise ValueError("Setting 'profile_capture_seconds' must be a positive number")
+
+    if 'gpio_broker' in config and config['gpio_broker'] not in (True, False, 'auto'):
+        raise ValueError("Setting 'gpio_broker' must be true, false or 'auto'")
+
+    if 'media_store' in config and not isinstance(config['media_store'], (str, type(None))):
+        raise ValueError("Setting 'media_store' must be a directory path or null")
+
+    if 'derivatives' in config and not isinstance(config['derivatives'], bool):
+        raise ValueError("Setting 'derivatives' must be true or false")
+
+    if 'derivative_size' in config and not (
+            isinstance(config['derivative_size'], list) and len(config['derivative_size']) == 2
+            and all(isinstance(value, int) and value > 0 for value in config['derivative_size'])):
+        raise ValueError("Setting 'derivative_size' must be [width, height] in pixels")
+
+    if 'renderer' in config and not isinstance(config['renderer'], (str, dict)):
+        raise ValueError("Setting 'renderer' must be a backend name, 'auto' or a mode-to-backend mapping")
+
+class ConfigDiff:
+    """Names added, removed and changed in each section between two configs."""
+
+    SECTIONS = ('buttons', 'media', 'actions', 'gestures')
+
+    def __init__(self, old_config: Dict[str, Any], new_config: Dict[str, Any]):
+        self._sections: Dict[str, Tuple[Set[str], Set[str], Set[str]]] = {}
+        for section in self.SECTIONS:
+            old_items, new_items = old_config[section], new_config[section]
+            added = set(new_items) - set(old_items)
+            removed = set(old_items) - set(new_items)
+            changed = {name for name in set(old_items) & set(new_items) if old_items[name] != new_items[name]}
+            self._sections[section] = (added, removed, changed)
+
+        old_settings, new_settings = old_config['settings'], new_config['settings']
+        self.settings_changed: Set[str] = {
+            key for key in set(old_settings) | set(new_settings)
+            if old_settings.get(key) != new_settings.get(key)
+        }
+
+    def section(self, section: str) -> Tuple[Set[str], Set[str], Set[str]]:
+        """Return (added, removed, changed) names for a section."""
+        return self._sections[section]
+
+    def touched(self, section: str) -> Set[str]:
+        """All names added, removed or changed in a section."""
+        added, removed, changed = self._sections[section]
+        return added | removed | changed
+
+    @property
+    def is_empty(self) -> bool:
+        """True if the configs are equivalent."""
+        return not self.settings_changed and not any(self.touched(s) for s in self.SECTIONS)
+
+    def __str__(self) -> str:
+        parts = []
+        for section in self.SECTIONS:
+            added, removed, changed = self._sections[section]
+            if added or removed or changed:
+                parts.append(f"{section}: +{len(added)} -{len(removed)} ~{len(changed)}")
+        if self.settings_changed:
+            parts.append(f"settings: {', '.join(sorted(self.settings_changed))}")
+        return '; '.join(parts) or 'no changes'
+
+def get_cache_dir(settings: Dict[str, Any], subdir: str = '') -> str:
+    """Return (and create) the cache directory configured in settings."""
+    cache_dir = os.path.join(settings.get('cache_dir', DEFAULT_CACHE_DIR), subdir)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
 def load_config(config_path: str) -> Dict[str, Any]:
     """Load and validate configuration from JSON file.
     
@@ -86,8 +277,27 @@ def load_config(config_path: str) -> Dict[str, Any]:
         Exception: If configuration file cannot be loaded or is invalid
     """
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
+        with open(config_path, 'rb') as f:
+            data = f.read()
+    except Exception as e:
+        print(f"[Config] Error loading configuration: {e}")
+        raise
+    return parse_config(data)
+
+def parse_config(data: bytes) -> Dict[str, Any]:
+    """Parse and validate configuration from the contents of a JSON file.
+
+    Args:
+        data: Raw contents of the configuration file
+
+    Returns:
+        Dict containing the validated configuration
+
+    Raises:
+        Exception: If the configuration is invalid
+    """
+    try:
+        config = json.loads(data)
 
         # Validate required top-level sections
         required_sections = ['buttons', 'media', 'actions', 'settings']
@@ -99,17 +309,27 @@ def load_config(config_path: str) -> Dict[str, Any]:
         for name, button_config in config['buttons'].items():
             validate_button_config(name, button_config)
 
-        # Get list of valid button names for reference
-        valid_buttons = list(config['buttons'].keys())
+        # Set of valid button names, for constant-time reference checks
+        valid_buttons = set(config['buttons'])
 
-        # Validate media section
+        # Validate media section; paths are checked together afterwards
         for name, media_config in config['media'].items():
-            validate_media_config(name, media_config, valid_buttons)
+            validate_media_config(name, media_config, valid_buttons, check_path=False)
+        check_media_paths(config['media'])
 
         # Validate actions section
         for name, action_config in config['actions'].items():
             validate_action_config(name, action_config, valid_buttons)
 
+        # Validate gestures (optional section) and check they compile unambiguously
+        config.setdefault('gestures', {})
+        for name, gesture_config in config['gestures'].items():
+            validate_gesture_config(name, gesture_config, valid_buttons, config['media'].keys(), config['actions'].keys())
+        compile_gestures(config['gestures'])
+
+        # Validate layer selectors and references
+        validate_layers(config)
+
         # Validate settings
         validate_settings(config['settings'])
 
@@ -117,6 +337,8 @@ def load_config(config_path: str) -> Dict[str, Any]:
         print(f"- {len(config['buttons'])} buttons")
         print(f"- {len(config['media'])} media items")
         print(f"- {len(config['actions'])} actions")
+        if config['gestures']:
+            print(f"- {len(config['gestures'])} gestures")
         
         return config
 
@@ -0,0 +1,126 @@
+"""
+Config Snapshot Module
+--------------------
+Binary cache of a validated and indexed configuration.
+
+A snapshot holds the validated config together with its dispatch table. It
+is keyed by the config file's content hash and the mtimes of every media
+path it references, so a boot where nothing changed loads the snapshot and
+skips validation and index building (only the settings are read, to find
+the configured cache dir). Snapshots can be built ahead of time with
+`atc-engine --build-snapshot`.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from typing import Any, Dict, Optional, Tuple
+
+from .config_loader import get_cache_dir, parse_config, stat_paths
+from .dispatch import DispatchTable
+
+# Bump when the snapshot contents or the classes pickled in it change shape
+SNAPSHOT_VERSION = 4
+
+def _snapshot_path(config_path: str, settings: Dict[str, Any]) -> str:
+    """Snapshot file location for a config file, in the cache dir its settings name."""
+    path_hash = hashlib.sha1(os.path.abspath(config_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(get_cache_dir(settings, 'snapshots'), f"{path_hash}.snapshot")
+
+def read_config_file(config_path: str) -> Tuple[bytes, str]:
+    """Contents of the config file and their SHA-256, from a single read."""
+    with open(config_path, 'rb') as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+def load_config_with_hash(config_path: str) -> Tuple[Dict[str, Any], str]:
+    """Load and validate a config; returns it with the hash of the exact bytes it was parsed from."""
+    data, content_hash = read_config_file(config_path)
+    return parse_config(data), content_hash
+
+def _raw_settings(data: bytes) -> Dict[str, Any]:
+    """The settings section of unvalidated config contents (empty if they do not parse)."""
+    try:
+        settings = json.loads(data).get('settings')
+    except (ValueError, AttributeError):
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+def _media_mtimes(config: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Modification time of every media path (None if missing)."""
+    return stat_paths(media_config['path'] for media_config in config['media'].values())
+
+def save_snapshot(config_path: str, content_hash: str, config: Dict[str, Any], dispatch: DispatchTable) -> str:
+    """Write a snapshot of a validated config and its dispatch table.
+
+    content_hash must be the hash of the bytes the config was parsed from
+    (see load_config_with_hash), not of the file as it is now.
+    """
+    snapshot_path = _snapshot_path(config_path, config['settings'])
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'content_hash': content_hash,
+        'media_mtimes': _media_mtimes(config),
+        'config': config,
+        'dispatch': dispatch,
+    }
+
+    # Write to a temporary file first so a crash never leaves a partial snapshot
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+def load_snapshot(config_path: str, content_hash: str,
+                  settings: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], DispatchTable]]:
+    """Load a snapshot if it matches the given config contents and the current media; else None."""
+    snapshot_path = _snapshot_path(config_path, settings)
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[Snapshot] Ignoring unreadable snapshot {snapshot_path}: {e}")
+        return None
+
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    if snapshot['content_hash'] != content_hash:
+        return None
+    if snapshot['media_mtimes'] != _media_mtimes(snapshot['config']):
+        return None
+    return snapshot['config'], snapshot['dispatch']
+
+def load_compiled_config(config_path: str) -> Tuple[Dict[str, Any], DispatchTable]:
+    """Load a config and its dispatch table, from the snapshot when it is current.
+
+    The file is read once; the snapshot is looked up and (on a miss) saved
+    under the hash of those same bytes, so an edit racing the load can never
+    pair one version's config with another version's hash. Falls back to
+    full loading and validation (and refreshes the snapshot) when the config
+    file or any media path changed.
+    """
+    data, content_hash = read_config_file(config_path)
+    compiled = load_snapshot(config_path, content_hash, _raw_settings(data))
+    if compiled is not None:
+        config, dispatch = compiled
+        print(f"[Snapshot] Loaded compiled configuration ({len(config['media'])} media items)")
+        return config, dispatch
+
+    config = parse_config(data)
+    dispatch = DispatchTable(config)
+    try:
+        save_snapshot(config_path, content_hash, config, dispatch)
+    except OSError as e:
+        print(f"[Snapshot] Could not write snapshot: {e}")
+    return config, dispatch
+
+def build_snapshot(config_path: str) -> str:
+    """Validate a config and write its snapshot (for provisioning)."""
+    config, content_hash = load_config_with_hash(config_path)
+    snapshot_path = save_snapshot(config_path, content_hash, config, DispatchTable(config))
+    print(f"[Snapshot] Wrote {snapshot_path}")
+    return snapshot_path
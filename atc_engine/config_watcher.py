@@ -0,0 +1,86 @@
+"""
+Config Watcher Module
+-------------------
+Watches the configuration file and requests a reload when it changes.
+
+Uses inotify on the file's directory (so editors that save by rename are
+seen) and falls back to polling the file's mtime where inotify is missing.
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+
+from .inotify import (
+    IN_CLOSE_WRITE, IN_CREATE, IN_MOVED_TO, Inotify, inotify_available, split_watch_target,
+)
+
+class ConfigWatcher(threading.Thread):
+    """Calls a callback when the config file is written or replaced."""
+
+    def __init__(self, config_path: str, callback: Callable[[], None],
+                 settle_time: float = 0.2, poll_interval: float = 1.0):
+        super().__init__(name="ConfigWatcherThread")
+        self.daemon = True
+        self._config_path = os.path.abspath(config_path)
+        self._callback = callback
+        self._settle_time = settle_time
+        self._poll_interval = poll_interval
+        self._shutdown_event = threading.Event()
+
+    def _get_mtime(self) -> Optional[int]:
+        """Modification time of the config file, or None if it is missing."""
+        try:
+            return os.stat(self._config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _notify(self) -> None:
+        """Wait for writes to settle, then invoke the callback."""
+        if self._shutdown_event.wait(timeout=self._settle_time):
+            return
+        print(f"[ConfigWatcher] Change detected in {self._config_path}")
+        try:
+            self._callback()
+        except Exception as e:
+            print(f"[ConfigWatcher] Error in reload callback: {e}")
+
+    def _run_inotify(self) -> None:
+        """Watch the config directory for writes and renames onto the file."""
+        directory, filename = split_watch_target(self._config_path)
+        inotify = Inotify()
+        try:
+            inotify.add_watch(directory, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+            print(f"[ConfigWatcher] Watching {self._config_path} (inotify)")
+            while not self._shutdown_event.is_set():
+                events = inotify.read_events(timeout=0.5)
+                if any(event.name == filename for event in events):
+                    self._notify()
+                    # Drain events caused by the same save
+                    inotify.read_events(timeout=0)
+        finally:
+            inotify.close()
+
+    def _run_polling(self) -> None:
+        """Poll the config file's mtime."""
+        print(f"[ConfigWatcher] Watching {self._config_path} (polling every {self._poll_interval}s)")
+        last_mtime = self._get_mtime()
+        while not self._shutdown_event.wait(timeout=self._poll_interval):
+            mtime = self._get_mtime()
+            if mtime is not None and mtime != last_mtime:
+                last_mtime = mtime
+                self._notify()
+
+    def stop(self) -> None:
+        """Signal the thread to stop."""
+        self._shutdown_event.set()
+
+    def run(self) -> None:
+        """Main thread loop."""
+        if inotify_available():
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                print(f"[ConfigWatcher] inotify failed ({e}); falling back to polling")
+        self._run_polling()
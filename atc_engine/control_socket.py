@@ -0,0 +1,171 @@
+"""
+Control Socket Module
+-------------------
+Local command listener for driving the engine without the buttons.
+
+Off unless the `control` setting is true. Listens on a Unix datagram
+socket that only the engine's user can write to, and on a localhost UDP
+port only when `control_udp_port` is set (any local user can reach it).
+Every datagram holds one or more commands, one per line:
+
+    P <button>    press a button
+    R <button>    release a button
+    M <media>     show a media entry
+    A <action>    run an action entry
+    S             reply with latency statistics (JSON)
+
+Commands are injected into the GPIO handler's poll loop, so presses go
+through the same button, combination and gesture logic as the physical
+pins. All commands of a datagram are queued together and the poll loop is
+woken immediately. The time from receipt to application is recorded per
+command.
+
+Example:
+    printf 'P btn1\\n' | socat - UNIX-SENDTO:/tmp/atc_engine.sock
+    printf 'M home\\nS\\n' | socat - UDP:127.0.0.1:<control_udp_port>
+"""
+
+import json
+import os
+import select
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_SOCKET_PATH = '/tmp/atc_engine.sock'
+
+# Single-letter command codes and the long forms accepted for them
+COMMANDS = {
+    'P': 'press', 'PRESS': 'press',
+    'R': 'release', 'RELEASE': 'release',
+    'M': 'media', 'SHOW': 'media', 'MEDIA': 'media',
+    'A': 'action', 'RUN': 'action', 'ACTION': 'action',
+}
+
+class LatencyStats:
+    """Receive-to-apply latency of control commands."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._recent: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._recent.append(latency)
+            self.count += 1
+            self.total += latency
+            self.max = max(self.max, latency)
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, max and recent median/p99 in milliseconds."""
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, maximum = self.count, self.total, self.max
+        if not recent:
+            return {'count': 0}
+        return {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 3),
+            'max_ms': round(maximum * 1000, 3),
+            'p50_ms': round(recent[len(recent) // 2] * 1000, 3),
+            'p99_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 3),
+        }
+
+def parse_commands(data: bytes) -> Tuple[List[Tuple[str, str]], bool, List[str]]:
+    """Parse a datagram into (commands, stats requested, errors)."""
+    commands: List[Tuple[str, str]] = []
+    errors: List[str] = []
+    want_stats = False
+    for line in data.decode('utf-8', 'replace').splitlines():
+        parts = line.strip().split(None, 1)
+        if not parts:
+            continue
+        code = parts[0].upper()
+        if code == 'S':
+            want_stats = True
+        elif code in COMMANDS and len(parts) == 2:
+            commands.append((COMMANDS[code], parts[1].strip()))
+        else:
+            errors.append(line.strip())
+    return commands, want_stats, errors
+
+class ControlSocket(threading.Thread):
+    """Receives control datagrams and injects them into the GPIO handler."""
+
+    def __init__(self, settings: Dict[str, Any], gpio_handler: Any):
+        super().__init__(name="ControlSocketThread")
+        self.daemon = True
+        self._gpio_handler = gpio_handler
+        self._socket_path: Optional[str] = settings.get('control_socket', DEFAULT_SOCKET_PATH)
+        self._udp_port: Optional[int] = settings.get('control_udp_port')
+        self._sockets: List[socket.socket] = []
+        self._shutdown_event = threading.Event()
+        self.stats = LatencyStats()
+
+    def _open(self) -> None:
+        """Bind the configured sockets."""
+        if self._socket_path:
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+            unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            # Created owner-only so other local users cannot press buttons
+            old_umask = os.umask(0o177)
+            try:
+                unix_socket.bind(self._socket_path)
+            finally:
+                os.umask(old_umask)
+            self._sockets.append(unix_socket)
+            print(f"[Control] Listening on {self._socket_path}")
+        if self._udp_port:
+            udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            udp_socket.bind(('127.0.0.1', self._udp_port))
+            self._sockets.append(udp_socket)
+            print(f"[Control] Listening on udp://127.0.0.1:{self._udp_port}")
+
+    def _handle_datagram(self, sock: socket.socket, data: bytes, address: Any, received: float) -> None:
+        """Inject a datagram's commands and answer a stats request."""
+        commands, want_stats, errors = parse_commands(data)
+        for error in errors:
+            print(f"[Control] Ignoring malformed command: {error!r}")
+        if commands:
+            self._gpio_handler.inject(commands, received, self.stats.record)
+        if want_stats and address:
+            try:
+                sock.sendto(json.dumps(self.stats.summary()).encode('utf-8'), address)
+            except OSError as e:
+                print(f"[Control] Could not send stats to {address}: {e}")
+
+    def stop(self) -> None:
+        """Signal the thread to stop."""
+        self._shutdown_event.set()
+
+    def run(self) -> None:
+        """Main thread loop."""
+        try:
+            self._open()
+        except OSError as e:
+            print(f"[Control] Could not open control socket: {e}")
+            return
+
+        try:
+            while not self._shutdown_event.is_set():
+                readable, _, _ = select.select(self._sockets, [], [], 0.5)
+                for sock in readable:
+                    try:
+                        data, address = sock.recvfrom(65536)
+                    except OSError:
+                        continue
+                    self._handle_datagram(sock, data, address, time.monotonic())
+        finally:
+            for sock in self._sockets:
+                sock.close()
+            if self._socket_path and os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+            summary = self.stats.summary()
+            if summary['count']:
+                print(f"[Control] Command latency: {summary}")
@@ -0,0 +1,321 @@
+"""
+Derivatives Module
+----------------
+Display-resolution copies of large images, built ahead of time.
+
+Stock photos are often several times the screen's resolution, and every
+player that shows one decodes the full image and scales it down. This
+module builds, once per image, a copy already fitted to the display:
+JPEGs are decoded at reduced scale with Pillow's draft mode (the DCT does
+the first 2-8x of the reduction), other formats with reduce(), then the
+result is resampled to fit. Builds run in a process pool using every core,
+recording each derivative as it completes; closing the cache stops a
+build after the images already in a worker.
+
+Derivatives are stored as <size>/<xx>/<digest>.jpg (or .png for images with
+transparency) in the cache directory, keyed by the source's content hash
+and the target size. A SQLite index maps each source path and mtime to its
+derivative, so resolve() costs one stat and one lookup. Until a source's
+derivative is built, and for images that are already small enough or
+animated, resolve() returns the source itself.
+
+Build the derivatives of a config's media, or of image folders, with:
+    python -m atc_engine.derivatives --config atc_engine/config.json
+    python -m atc_engine.derivatives --size 1920x1080 gpio_slideshow/image_sets/*
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config_loader import get_cache_dir, stat_paths
+from .media_store import file_digest
+
+DEFAULT_SIZE = (1920, 1080)
+JPEG_QUALITY = 90
+# Builders run below the players' priority
+WORKER_NICENESS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS derivatives (
+    path TEXT NOT NULL,
+    target TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    name TEXT,
+    PRIMARY KEY (path, target)
+)
+"""
+
+def _init_worker() -> None:
+    try:
+        os.nice(WORKER_NICENESS)
+    except OSError:
+        pass
+
+def build_derivative(source: str, target_dir: str,
+                     size: Tuple[int, int]) -> Optional[Tuple[str, int, int, str, Optional[str]]]:
+    """Build the derivative of one source (runs in a pool worker).
+
+    Returns (path, mtime_ns, size, digest, derivative name), the name being
+    None when the source is displayed as is; None if the source is unreadable.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        st = os.stat(source)
+        digest = file_digest(source)
+    except OSError as e:
+        print(f"[Derivatives] Cannot read {source}: {e}")
+        return None
+    width, height = size
+    try:
+        with Image.open(source) as image:
+            if getattr(image, 'n_frames', 1) > 1:
+                return source, st.st_mtime_ns, st.st_size, digest, None
+            transposed = image.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+            shown_width, shown_height = (image.height, image.width) if transposed else image.size
+            if shown_width <= width and shown_height <= height:
+                return source, st.st_mtime_ns, st.st_size, digest, None
+
+            has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            mode = 'RGBA' if has_alpha else 'RGB'
+            ext = '.png' if has_alpha else '.jpg'
+            name = digest + ext
+            derivative_path = os.path.join(target_dir, name[:2], name)
+            if os.path.exists(derivative_path):
+                return source, st.st_mtime_ns, st.st_size, digest, name
+
+            # JPEG: decode straight at the smallest DCT scale still covering the target
+            image.draft(mode, (height, width) if transposed else (width, height))
+            image = ImageOps.exif_transpose(image)
+            factor = min(image.width // width, image.height // height)
+            if factor >= 2:
+                image = image.reduce(factor)
+            if image.mode != mode:
+                image = image.convert(mode)
+            image.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+            os.makedirs(os.path.dirname(derivative_path), exist_ok=True)
+            temp_path = f"{derivative_path}.{os.getpid()}.tmp"
+            if has_alpha:
+                image.save(temp_path, 'PNG')
+            else:
+                image.save(temp_path, 'JPEG', quality=JPEG_QUALITY)
+            os.replace(temp_path, derivative_path)
+    except Exception as e:
+        print(f"[Derivatives] Cannot build derivative of {source}: {e}")
+        return None
+    return source, st.st_mtime_ns, st.st_size, digest, name
+
+class DerivativeCache:
+    """Builds display-resolution derivatives in the background and resolves sources to them."""
+
+    def __init__(self, cache_dir: str, size: Tuple[int, int] = DEFAULT_SIZE, workers: Optional[int] = None):
+        self.size = tuple(size)
+        self._target = f"{self.size[0]}x{self.size[1]}"
+        self._target_dir = os.path.join(cache_dir, self._target)
+        self._workers = workers or os.cpu_count() or 1
+        os.makedirs(self._target_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'derivatives.sqlite'), check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._requests: "queue.Queue[Optional[Tuple[List[str], Optional[Callable[[int], None]]]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # Set by close(): a running build stops at its next completed image
+        self._stopping = threading.Event()
+
+    def resolve(self, path: str) -> str:
+        """The derivative to display for a source, or the source itself."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return path
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name FROM derivatives WHERE path = ? AND target = ? AND mtime_ns = ? AND size = ?",
+                (os.path.abspath(path), self._target, st.st_mtime_ns, st.st_size)
+            ).fetchone()
+        if not row or row[0] is None:
+            return path
+        return os.path.join(self._target_dir, row[0][:2], row[0])
+
+    def resolve_all(self, paths: Iterable[str]) -> List[str]:
+        """resolve() for each path, in order."""
+        return [self.resolve(path) for path in paths]
+
+    def build(self, paths: Iterable[str]) -> int:
+        """Build the derivatives of every new or changed source in a process pool; returns the count built."""
+        sources = [os.path.abspath(path) for path in paths]
+        mtimes = stat_paths(sources)
+        with self._lock:
+            known = {
+                row[0]: row[1:]
+                for row in self._conn.execute(
+                    "SELECT path, mtime_ns, size, name FROM derivatives WHERE target = ?", (self._target,))
+            }
+        stale = []
+        for path, mtime_ns in mtimes.items():
+            if mtime_ns is None or not os.path.isfile(path):
+                continue
+            entry = known.get(path)
+            if (entry is not None and entry[0] == mtime_ns and entry[1] == os.path.getsize(path)
+                    and (entry[2] is None or os.path.exists(os.path.join(self._target_dir, entry[2][:2], entry[2])))):
+                continue
+            stale.append(path)
+        if not stale:
+            return 0
+
+        started = time.monotonic()
+        built = checked = 0
+        # Spawned, not forked: the engine's other threads may hold locks at fork time
+        executor = ProcessPoolExecutor(max_workers=min(self._workers, len(stale)), initializer=_init_worker,
+                                       mp_context=multiprocessing.get_context('spawn'))
+        futures = []
+        try:
+            futures = [executor.submit(build_derivative, path, self._target_dir, self.size) for path in stale]
+            for future in as_completed(futures):
+                if self._stopping.is_set():
+                    break
+                checked += 1
+                row = future.result()
+                if row is None:
+                    continue
+                path, mtime_ns, size, digest, name = row
+                # Recorded as each image completes, so an interrupted build keeps its progress
+                with self._lock:
+                    if self._stopping.is_set():
+                        break
+                    self._conn.execute("INSERT OR REPLACE INTO derivatives VALUES (?, ?, ?, ?, ?, ?)",
+                                       (path, self._target, mtime_ns, size, digest, name))
+                    self._conn.commit()
+                if name is not None:
+                    built += 1
+        finally:
+            # Queued images are dropped on close; only those already in a worker are finished
+            # (cancelled by hand: shutdown's cancel_futures needs Python 3.9)
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+        print(f"[Derivatives] {checked} of {len(stale)} images checked, {built} derivatives at {self._target} "
+              f"in {time.monotonic() - started:.1f}s")
+        return built
+
+    def submit(self, paths: Iterable[str], on_built: Optional[Callable[[int], None]] = None) -> None:
+        """Queue sources for build() on the background thread (started on first use).
+
+        on_built, if given, is called on that thread with the number of
+        derivatives built once the batch holding these sources is done.
+        """
+        paths = list(paths)
+        if not paths:
+            return
+        with self._lock:
+            if self._stopping.is_set():
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="DerivativeBuildThread", daemon=True)
+                self._thread.start()
+        self._requests.put((paths, on_built))
+
+    def _run(self) -> None:
+        """Background thread: builds queued batches (merged while the previous batch built)."""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            paths, callbacks = list(request[0]), [request[1]]
+            while True:
+                try:
+                    more = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    return
+                paths.extend(more[0])
+                callbacks.append(more[1])
+            try:
+                built = self.build(paths)
+            except Exception as e:
+                print(f"[Derivatives] Error building derivatives: {e}")
+                continue
+            if self._stopping.is_set():
+                return
+            for callback in callbacks:
+                if callback is not None:
+                    try:
+                        callback(built)
+                    except Exception as e:
+                        print(f"[Derivatives] Error in build callback: {e}")
+
+    def close(self) -> None:
+        """Stop the background thread (abandoning queued batches) and close the index."""
+        self._stopping.set()
+        self._requests.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        with self._lock:
+            self._conn.close()
+
+def open_derivative_cache(settings: Dict[str, Any]) -> Optional[DerivativeCache]:
+    """The derivative cache for a config's settings; None if disabled, Pillow is missing or it cannot be opened."""
+    from .framebuffer import pillow_available
+
+    if not settings.get('derivatives', True):
+        return None
+    if not pillow_available():
+        print("[Derivatives] Pillow not installed; displaying source images")
+        return None
+    try:
+        return DerivativeCache(get_cache_dir(settings, 'derivatives'), settings.get('derivative_size', DEFAULT_SIZE))
+    except (OSError, sqlite3.Error) as e:
+        print(f"[Derivatives] Cannot open derivative cache: {e}")
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build display-resolution derivatives of images.")
+    parser.add_argument("paths", nargs='*', help="Image files or folders (default: the config's media)")
+    parser.add_argument("--config", default='atc_engine/config.json', help="Engine config (media and cache dir)")
+    parser.add_argument("--size", help="Target size as WIDTHxHEIGHT (default: the config's derivative_size)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    from .config_loader import load_config
+    from .media_index import collect_media_files
+    from .media_files import find_images
+
+    config = load_config(args.config)
+    settings = config['settings']
+    size = settings.get('derivative_size', DEFAULT_SIZE)
+    if args.size:
+        try:
+            size = tuple(int(value) for value in args.size.lower().split('x'))
+        except ValueError:
+            size = ()
+        if len(size) != 2:
+            print(f"Error: invalid size '{args.size}' (expected WIDTHxHEIGHT)")
+            sys.exit(1)
+
+    paths: List[str] = []
+    for path in args.paths:
+        paths.extend(find_images(path) if os.path.isdir(path) else [path])
+    if not args.paths:
+        paths = collect_media_files(config)
+
+    cache = DerivativeCache(get_cache_dir(settings, 'derivatives'), size, args.workers)
+    try:
+        cache.build(paths)
+    finally:
+        cache.close()
+
+if __name__ == "__main__":
+    main()
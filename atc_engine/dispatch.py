@@ -0,0 +1,227 @@
+"""
+Dispatch Module
+-------------
+Indexes the media and action triggers of a config by button combination.
+
+ButtonManager uses the index to find combinations whose hold time has
+passed, and ActionHandler uses it to look up what a combination triggers.
+The index can be updated in place from a config diff, so a reload only
+touches the combinations whose triggers changed.
+
+When several combinations are active at once, resolve() keeps only the
+winners: a combination is suppressed while a superset of it is held (or,
+once the superset has fired, until all of its buttons are released), and
+overlapping combinations are arbitrated by their `priority`. The containment
+relations are precomputed once per config, so resolving is cheap per tick.
+
+Toggle buttons with a `layer` key select keymap layers. Every layer is
+compiled into its own LayerTable holding the layer's triggers plus the base
+triggers it does not shadow, so a lookup costs the same however many layers
+there are.
+"""
+
+from typing import AbstractSet, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+Combo = Tuple[str, ...]
+
+def get_button_combo(trigger_config: Dict[str, Any]) -> Optional[Combo]:
+    """Return the sorted button combination of a trigger, or None if it has no button."""
+    if 'button' not in trigger_config:
+        return None
+    buttons = trigger_config['button'] if isinstance(trigger_config['button'], list) else [trigger_config['button']]
+    return tuple(sorted(buttons))
+
+def get_layer_buttons(config: Dict[str, Any]) -> Dict[str, str]:
+    """Return button name -> layer name for the layer selector buttons of a config."""
+    return {
+        name: button_config['layer']
+        for name, button_config in config['buttons'].items()
+        if 'layer' in button_config
+    }
+
+class LayerTable:
+    """Maps button combinations to the media and actions they trigger on one layer.
+
+    Triggers belonging to the layer shadow base-layer triggers on the same
+    combination; base triggers on other combinations stay reachable.
+    """
+
+    def __init__(self, config: Dict[str, Any], layer: Optional[str] = None):
+        self.layer = layer
+        # combination -> minimum hold time of any trigger using it
+        self.hold_times: Dict[Combo, float] = {}
+        # combination -> media / action names, in config order
+        self.media: Dict[Combo, List[str]] = {}
+        self.actions: Dict[Combo, List[str]] = {}
+        # (section, name) -> combination for every indexed trigger
+        self._entries: Dict[Tuple[str, str], Combo] = {}
+        # combination -> highest priority of its triggers
+        self.priorities: Dict[Combo, int] = {}
+        # combination -> strict supersets / all other combinations sharing a button
+        self.supersets: Dict[Combo, Tuple[Combo, ...]] = {}
+        self.conflicts: Dict[Combo, Tuple[Combo, ...]] = {}
+        # (section, name) -> (hold time, priority, belongs to this layer)
+        self._by_combo: Dict[Combo, Dict[Tuple[str, str], Tuple[float, int, bool]]] = {}
+
+        default_hold = config['settings']['default_combo_hold_time']
+        for section in ('media', 'actions'):
+            for name, trigger_config in config[section].items():
+                self._add(section, name, trigger_config, default_hold)
+        for combo in list(self._by_combo):
+            self._rebuild(combo)
+        self._build_lattice()
+
+    def _add(self, section: str, name: str, trigger_config: Dict[str, Any], default_hold: float) -> Optional[Combo]:
+        """Index one trigger if it is on this layer or the base layer; returns its combination."""
+        trigger_layer = trigger_config.get('layer')
+        if trigger_layer is not None and trigger_layer != self.layer:
+            return None
+        combo = get_button_combo(trigger_config)
+        if combo is None:
+            return None
+        hold_time = trigger_config.get('hold_time', default_hold)
+        priority = trigger_config.get('priority', 0)
+        self._entries[(section, name)] = combo
+        self._by_combo.setdefault(combo, {})[(section, name)] = (hold_time, priority, trigger_layer is not None)
+        return combo
+
+    def _remove(self, section: str, name: str) -> Optional[Combo]:
+        """Drop one trigger from the index; returns its combination."""
+        combo = self._entries.pop((section, name), None)
+        if combo is None:
+            return None
+        triggers = self._by_combo[combo]
+        del triggers[(section, name)]
+        if not triggers:
+            del self._by_combo[combo]
+        return combo
+
+    def _rebuild(self, combo: Combo) -> None:
+        """Recompute the lookups of a combination from the triggers indexed on it."""
+        triggers = self._by_combo.get(combo, {})
+        if any(own for _, _, own in triggers.values()):
+            triggers = {key: value for key, value in triggers.items() if value[2]}
+
+        for section, targets in (('media', self.media), ('actions', self.actions)):
+            names = [name for (trigger_section, name) in triggers if trigger_section == section]
+            if names:
+                targets[combo] = names
+            else:
+                targets.pop(combo, None)
+
+        if triggers:
+            self.hold_times[combo] = min(hold for hold, _, _ in triggers.values())
+            self.priorities[combo] = max(priority for _, priority, _ in triggers.values())
+        else:
+            self.hold_times.pop(combo, None)
+            self.priorities.pop(combo, None)
+
+    def _build_lattice(self) -> None:
+        """Precompute, for every combination, its strict supersets and its conflicts."""
+        by_button: Dict[str, List[Combo]] = {}
+        for combo in self.hold_times:
+            for button in combo:
+                by_button.setdefault(button, []).append(combo)
+
+        self.supersets = {}
+        self.conflicts = {}
+        for combo in self.hold_times:
+            buttons = set(combo)
+            related = {other for button in combo for other in by_button[button] if other != combo}
+            self.supersets[combo] = tuple(other for other in related if buttons < set(other))
+            self.conflicts[combo] = tuple(related)
+
+    def resolve(self, active: Iterable[Combo], pressed: AbstractSet[str],
+                fired: AbstractSet[Combo] = frozenset()) -> List[Combo]:
+        """Pick the combinations that should fire from those whose hold time passed.
+
+        A combination is suppressed while all buttons of a strict superset
+        with at least its priority are held (even before the superset's hold
+        time passes, so the subset never flashes up first), and while such a
+        superset is in `fired` (it fired and not all of its buttons have been
+        released, so releasing its buttons one by one does not fire the
+        subset). Remaining combinations that share buttons are arbitrated by
+        priority, then by size.
+        """
+        priorities = self.priorities
+        candidates = [
+            combo for combo in active
+            if not any((superset in fired or pressed.issuperset(superset))
+                       and priorities[superset] >= priorities[combo]
+                       for superset in self.supersets[combo])
+        ]
+        if len(candidates) < 2:
+            return candidates
+
+        candidates.sort(key=lambda combo: (-priorities[combo], -len(combo), combo))
+        chosen: Set[Combo] = set()
+        for combo in candidates:
+            if not any(other in chosen for other in self.conflicts[combo]):
+                chosen.add(combo)
+        return [combo for combo in candidates if combo in chosen]
+
+    def update(self, new_config: Dict[str, Any], diff: Any) -> Set[Combo]:
+        """Apply a ConfigDiff to the index; returns the combinations that changed."""
+        affected: Set[Combo] = set()
+        default_hold = new_config['settings']['default_combo_hold_time']
+        rebuild_all = 'default_combo_hold_time' in diff.settings_changed
+
+        for section in ('media', 'actions'):
+            added, removed, changed = diff.section(section)
+            names: Iterable[str] = (set(new_config[section]) | removed) if rebuild_all else removed | changed | added
+            for name in names:
+                affected.add(self._remove(section, name))
+                if name in new_config[section]:
+                    affected.add(self._add(section, name, new_config[section][name], default_hold))
+
+        affected.discard(None)
+        for combo in affected:
+            self._rebuild(combo)
+        if affected:
+            self._build_lattice()
+        return affected
+
+class DispatchTable:
+    """The per-layer trigger tables of a config (the base layer is None)."""
+
+    def __init__(self, config: Dict[str, Any]):
+        # button name -> layer it selects
+        self.layer_buttons: Dict[str, str] = get_layer_buttons(config)
+        self.layers: Dict[Optional[str], LayerTable] = {None: LayerTable(config)}
+        for layer in set(self.layer_buttons.values()):
+            self.layers[layer] = LayerTable(config, layer)
+
+    def table(self, layer: Optional[str] = None) -> LayerTable:
+        """The table for a layer, falling back to the base layer for unknown names."""
+        return self.layers.get(layer) or self.layers[None]
+
+    @property
+    def hold_times(self) -> Dict[Combo, float]:
+        """Hold times of the base layer."""
+        return self.layers[None].hold_times
+
+    @property
+    def media(self) -> Dict[Combo, List[str]]:
+        """Media lookups of the base layer."""
+        return self.layers[None].media
+
+    @property
+    def actions(self) -> Dict[Combo, List[str]]:
+        """Action lookups of the base layer."""
+        return self.layers[None].actions
+
+    def update(self, new_config: Dict[str, Any], diff: Any) -> Set[Combo]:
+        """Apply a ConfigDiff to every layer; returns the combinations that changed on any layer."""
+        self.layer_buttons = get_layer_buttons(new_config)
+        new_layers = set(self.layer_buttons.values())
+        affected: Set[Combo] = set()
+
+        for layer in list(self.layers):
+            if layer is not None and layer not in new_layers:
+                affected.update(self.layers.pop(layer).hold_times)
+        for layer, table in self.layers.items():
+            affected |= table.update(new_config, diff)
+        for layer in new_layers - set(self.layers):
+            self.layers[layer] = LayerTable(new_config, layer)
+            affected.update(self.layers[layer].hold_times)
+        return affected
@@ -0,0 +1,315 @@
+"""
+Display Power Module
+------------------
+Turns the display output on and off without spawning a process per toggle.
+
+The output state is queried once and cached. Toggles go through a persistent
+X connection (DPMS via python-xlib), a kept-open sysfs framebuffer blank
+attribute, or a long-lived shell helper running xrandr, whichever is
+available. A fake backend is provided for tests and simulation.
+"""
+
+import os
+import select
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+FB_BLANK_UNBLANK = b'0'
+FB_BLANK_POWERDOWN = b'4'
+
+class DisplayPowerBackend:
+    """Base class for display power backends."""
+
+    name = 'base'
+
+    def query(self) -> Optional[bool]:
+        """Return True if the output is on, False if off, None if unknown."""
+        return None
+
+    def set_power(self, on: bool) -> bool:
+        """Turn the output on or off; returns True on success."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any persistent connection."""
+
+class FakeDisplayBackend(DisplayPowerBackend):
+    """In-memory backend that records requested power changes."""
+
+    name = 'fake'
+
+    def __init__(self, initial_on: bool = True, fail: bool = False):
+        self.is_on = initial_on
+        self.fail = fail
+        self.calls: List[bool] = []
+        self.queries = 0
+
+    def query(self) -> Optional[bool]:
+        self.queries += 1
+        return self.is_on
+
+    def set_power(self, on: bool) -> bool:
+        self.calls.append(on)
+        if self.fail:
+            return False
+        self.is_on = on
+        return True
+
+class XlibDpmsBackend(DisplayPowerBackend):
+    """Controls display power through DPMS on a persistent X connection."""
+
+    name = 'xlib'
+
+    def __init__(self, display_name: str = ':0'):
+        from Xlib import display as xdisplay
+        from Xlib.ext import dpms
+        self._dpms = dpms
+        self._display = xdisplay.Display(display_name)
+        if not self._display.has_extension('DPMS'):
+            self._display.close()
+            raise RuntimeError(f"X display {display_name} has no DPMS extension")
+        self._display.dpms_enable()
+        self._display.sync()
+
+    def query(self) -> Optional[bool]:
+        info = self._display.dpms_info()
+        return info.power_level == self._dpms.DPMSModeOn
+
+    def set_power(self, on: bool) -> bool:
+        self._display.dpms_force_level(self._dpms.DPMSModeOn if on else self._dpms.DPMSModeOff)
+        self._display.sync()
+        return True
+
+    def close(self) -> None:
+        self._display.close()
+
+class SysfsBackend(DisplayPowerBackend):
+    """Blanks the framebuffer through a kept-open sysfs attribute (no X needed)."""
+
+    name = 'sysfs'
+
+    def __init__(self, fb_name: str = 'fb0', drm_connector: Optional[str] = None):
+        self._blank_path = os.path.join('/sys/class/graphics', fb_name, 'blank')
+        self._fd = os.open(self._blank_path, os.O_WRONLY)
+        self._dpms_path = None
+        if drm_connector:
+            self._dpms_path = os.path.join('/sys/class/drm', drm_connector, 'dpms')
+
+    def query(self) -> Optional[bool]:
+        # fb 'blank' is write-only in practice; DRM exposes a readable dpms state
+        if not self._dpms_path:
+            return None
+        try:
+            with open(self._dpms_path, 'r') as f:
+                return f.read().strip() == 'On'
+        except OSError:
+            return None
+
+    def set_power(self, on: bool) -> bool:
+        try:
+            os.pwrite(self._fd, FB_BLANK_UNBLANK if on else FB_BLANK_POWERDOWN, 0)
+            return True
+        except OSError as e:
+            print(f"[Display] Error writing {self._blank_path}: {e}")
+            return False
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+class XrandrHelperBackend(DisplayPowerBackend):
+    """Runs xrandr through one long-lived shell instead of a Python subprocess per toggle.
+
+    The shell still forks xrandr for each command; only the Python-side
+    process setup is saved. Prefer the xlib backend where python-xlib is
+    installed.
+    """
+
+    name = 'xrandr'
+    _sentinel = '__atc_display_done__'
+    # Seconds an xrandr command may take before the helper is restarted
+    COMMAND_TIMEOUT = 5.0
+
+    def __init__(self, output_name: str = 'HDMI-1', display_name: str = ':0'):
+        if shutil.which('xrandr') is None:
+            raise RuntimeError("xrandr command not found")
+        self._output_name = output_name
+        self._env = os.environ.copy()
+        self._env['DISPLAY'] = display_name
+        self._helper: Optional[subprocess.Popen] = None
+        self._buffer = b''
+        self._start_helper()
+        # Verify the X display is reachable; keep the result for the controller's initial query
+        self._initial_query = self._run('--query')
+        if self._initial_query is None:
+            self.close()
+            raise RuntimeError(f"cannot query X display {display_name} with xrandr")
+
+    def _start_helper(self) -> None:
+        """Start (or restart) the shell that runs xrandr commands."""
+        self._helper = subprocess.Popen(
+            ['/bin/sh'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=self._env,
+            # Own process group, so a hung xrandr is killed along with the shell
+            start_new_session=True,
+        )
+        self._buffer = b''
+
+    def _stop_helper(self) -> None:
+        """Kill the helper and any xrandr it is running, e.g. when a command hangs."""
+        try:
+            os.killpg(self._helper.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self._helper.wait()
+        self._helper.stdin.close()
+        self._helper.stdout.close()
+
+    def _run(self, args: str) -> Optional[List[str]]:
+        """Run an xrandr command in the helper; returns its output lines or None on failure.
+
+        A command that does not finish within COMMAND_TIMEOUT seconds is
+        abandoned and the helper restarted, so a hung X server cannot block
+        the caller for good.
+        """
+        if self._helper.poll() is not None:
+            print("[Display] xrandr helper exited; restarting it")
+            self._stop_helper()
+            self._start_helper()
+        try:
+            self._helper.stdin.write(f"xrandr {args}; echo {self._sentinel} $?\n".encode())
+            self._helper.stdin.flush()
+        except OSError as e:
+            print(f"[Display] Cannot write to xrandr helper: {e}")
+            return None
+
+        fd = self._helper.stdout.fileno()
+        deadline = time.monotonic() + self.COMMAND_TIMEOUT
+        lines = []
+        while True:
+            while b'\n' in self._buffer:
+                raw, self._buffer = self._buffer.split(b'\n', 1)
+                line = raw.decode(errors='replace')
+                if line.startswith(self._sentinel):
+                    return lines if line.split()[1] == '0' else None
+                lines.append(line)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                print(f"[Display] xrandr {args} timed out; restarting helper")
+                self._stop_helper()
+                self._start_helper()
+                return None
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                print("[Display] xrandr helper exited")
+                return None
+            self._buffer += chunk
+
+    def query(self) -> Optional[bool]:
+        lines, self._initial_query = self._initial_query or self._run('--query'), None
+        if lines is None:
+            return None
+        for line in lines:
+            if line.startswith(self._output_name + ' '):
+                # An active output lists its geometry, e.g. "HDMI-1 connected 1920x1080+0+0"
+                fields = line.split()
+                return len(fields) > 2 and fields[1] == 'connected' and any('+' in f for f in fields[2:4])
+        return None
+
+    def set_power(self, on: bool) -> bool:
+        mode = '--auto' if on else '--off'
+        return self._run(f"--output {self._output_name} {mode}") is not None
+
+    def close(self) -> None:
+        if self._helper.poll() is None:
+            self._helper.stdin.close()
+            try:
+                self._helper.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                self._helper.kill()
+                self._helper.wait()
+        self._helper.stdout.close()
+
+class DisplayPowerController:
+    """Tracks and toggles display power, caching the output state."""
+
+    def __init__(self, backend: DisplayPowerBackend):
+        self._backend = backend
+        self._lock = threading.Lock()
+        state = backend.query()
+        # Assume on when the backend cannot tell; the first toggle then turns it off
+        self._is_on = True if state is None else state
+        print(f"[Display] Using '{backend.name}' backend, output is {'on' if self._is_on else 'off'}")
+
+    @property
+    def is_on(self) -> bool:
+        """Cached power state of the output."""
+        return self._is_on
+
+    @property
+    def backend_name(self) -> str:
+        """Name of the backend in use."""
+        return self._backend.name
+
+    def set_power(self, on: bool) -> bool:
+        """Turn the output on or off, skipping the request if already in that state."""
+        with self._lock:
+            if on == self._is_on:
+                return True
+            if not self._backend.set_power(on):
+                print(f"[Display] Failed to turn output {'on' if on else 'off'}")
+                return False
+            self._is_on = on
+            print(f"[Display] Output turned {'on' if on else 'off'}")
+            return True
+
+    def toggle(self) -> bool:
+        """Flip the output power state."""
+        with self._lock:
+            target = not self._is_on
+        return self.set_power(target)
+
+    def refresh(self) -> bool:
+        """Re-query the backend, e.g. after something else changed the output."""
+        with self._lock:
+            state = self._backend.query()
+            if state is not None:
+                self._is_on = state
+            return self._is_on
+
+    def close(self) -> None:
+        """Close the backend."""
+        self._backend.close()
+
+def _create_backend(name: str, settings: Dict[str, Any]) -> DisplayPowerBackend:
+    """Instantiate a backend by name from settings."""
+    display_name = settings.get('display', os.environ.get('DISPLAY', ':0'))
+    if name == 'xlib':
+        return XlibDpmsBackend(display_name)
+    if name == 'xrandr':
+        return XrandrHelperBackend(settings.get('display_output', 'HDMI-1'), display_name)
+    if name == 'sysfs':
+        return SysfsBackend(settings.get('framebuffer_name', 'fb0'), settings.get('drm_connector'))
+    if name == 'fake':
+        return FakeDisplayBackend()
+    raise ValueError(f"Unknown display power backend '{name}'")
+
+def create_display_power(settings: Dict[str, Any]) -> Optional[DisplayPowerController]:
+    """Create a controller for the 'display_power_backend' setting ('auto' by default)."""
+    requested = settings.get('display_power_backend', 'auto')
+    candidates = ['xlib', 'xrandr', 'sysfs'] if requested == 'auto' else [requested]
+
+    for name in candidates:
+        try:
+            return DisplayPowerController(_create_backend(name, settings))
+        except Exception as e:
+            print(f"[Display] Backend '{name}' unavailable: {e}")
+
+    print("[Display] No display power backend available; HDMI control will only be logged")
+    return None
@@ -0,0 +1,256 @@
+"""
+Event Journal Module
+------------------
+A fixed-size, memory-mapped ring of the most recent engine events, kept
+for post-mortem analysis after a freeze, crash or reboot.
+
+Every event is one 64-byte record packed straight into the mapped file:
+button edges, combinations and gestures fired, media switches, player
+(re)starts and action timings. Recording is a struct pack into the mapping
+with no system calls, so it can sit on the GPIO thread's hot path. The
+kernel keeps the pages when the process dies; the main loop also flushes
+them to disk every few seconds so they survive a hard reboot.
+
+Each record carries its sequence number, so a reader can order the ring
+and skip a record that was being overwritten when the process stopped.
+
+Decode a journal with:
+    python -m atc_engine.event_journal --config atc_engine/config.json
+    python -m atc_engine.event_journal path/to/event_journal.bin --last 50
+    python -m atc_engine.event_journal --previous    # the run before the last restart
+"""
+
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from .config_loader import get_cache_dir
+
+MAGIC = b'ATCJ'
+VERSION = 1
+DEFAULT_CAPACITY = 4096
+JOURNAL_FILE = 'event_journal.bin'
+# The previous run's journal is kept alongside with this suffix
+PREVIOUS_SUFFIX = '.prev'
+
+# magic, version, record size, capacity, process id, journal opened (wall time)
+_HEADER = struct.Struct('<4sIIIId')
+_HEADER_SIZE = 64
+# sequence, wall time, event type, two integers, a float and a short text
+_RECORD = struct.Struct('<QdB3xiid28s')
+_TEXT_SIZE = 28
+
+# Event types
+EDGE = 1
+COMBO = 2
+GESTURE = 3
+MEDIA = 4
+PLAYER = 5
+ACTION = 6
+MARK = 7
+
+EVENT_NAMES = {
+    EDGE: 'edge', COMBO: 'combo', GESTURE: 'gesture', MEDIA: 'media',
+    PLAYER: 'player', ACTION: 'action', MARK: 'mark',
+}
+
+class Event(NamedTuple):
+    """One decoded journal record."""
+    seq: int
+    time: float
+    kind: int
+    a: int
+    b: int
+    value: float
+    text: str
+
+    def describe(self) -> str:
+        """Human-readable form of the event's fields."""
+        if self.kind == EDGE:
+            return f"{self.text} {'pressed' if self.a == 0 else 'released'}"
+        if self.kind == COMBO:
+            return f"{self.text} fired"
+        if self.kind == GESTURE:
+            return f"{self.text} recognized"
+        if self.kind == MEDIA:
+            return f"showing {self.text}"
+        if self.kind == PLAYER:
+            previous = f", previous exited with {self.b}" if self.a and self.b != -1 else ''
+            return f"{self.text} started (PID {self.a}{previous})" if self.a else f"{self.text} failed to start"
+        if self.kind == ACTION:
+            return f"{self.text} took {self.value * 1000:.1f} ms"
+        return self.text
+
+class EventJournal:
+    """Writer side of the journal; records are dropped until open() succeeds."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._capacity = 0
+        # next() on a count is atomic under the GIL, so writers on any thread get unique slots
+        self._seq = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        return self._mm is not None
+
+    def open(self, path: str, capacity: int = DEFAULT_CAPACITY) -> None:
+        """Map (creating or resizing) the journal file and start recording.
+
+        The ring is reset; the previous run's journal is first moved to
+        <path>.prev so the events leading up to a crash or reboot survive
+        the restart.
+        """
+        size = _HEADER_SIZE + capacity * _RECORD.size
+        try:
+            if os.path.getsize(path) > 0:
+                os.replace(path, path + PREVIOUS_SUFFIX)
+        except OSError:
+            pass  # No previous journal
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            mm = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        mm[:size] = bytes(size)
+        _HEADER.pack_into(mm, 0, MAGIC, VERSION, _RECORD.size, capacity, os.getpid(), time.time())
+        self._capacity = capacity
+        self._seq = itertools.count(1)
+        self.path = path
+        self._mm = mm
+        print(f"[Journal] Recording {capacity} events to {path}")
+
+    def record(self, kind: int, text: str = '', a: int = 0, b: int = 0, value: float = 0.0) -> None:
+        """Append one event (a no-op while the journal is closed)."""
+        mm = self._mm
+        if mm is None:
+            return
+        seq = next(self._seq)
+        offset = _HEADER_SIZE + (seq % self._capacity) * _RECORD.size
+        try:
+            _RECORD.pack_into(mm, offset, seq, time.time(), kind, a, b, value,
+                              text.encode('utf-8')[:_TEXT_SIZE])
+        except ValueError:
+            pass  # Closed by another thread
+
+    def edge(self, button: str, state: int) -> None:
+        self.record(EDGE, button, state)
+
+    def combo(self, combo: Iterable[str], layer: Optional[str] = None) -> None:
+        text = '+'.join(combo)
+        self.record(COMBO, f"{text}@{layer}" if layer else text)
+
+    def gesture(self, name: str) -> None:
+        self.record(GESTURE, name)
+
+    def media(self, name: str) -> None:
+        self.record(MEDIA, name)
+
+    def player(self, name: str, pid: int, previous_returncode: Optional[int] = None) -> None:
+        """A player process (re)start; pid 0 means it failed to start."""
+        self.record(PLAYER, name, pid, -1 if previous_returncode is None else previous_returncode)
+
+    def action(self, name: str, duration: float) -> None:
+        self.record(ACTION, name, value=duration)
+
+    def mark(self, text: str) -> None:
+        self.record(MARK, text)
+
+    def flush(self) -> None:
+        """Write the mapped pages to disk (call off the hot path)."""
+        if self._mm is not None:
+            try:
+                self._mm.flush()
+            except (OSError, ValueError):
+                pass
+
+    def close(self) -> None:
+        """Flush and unmap the journal."""
+        mm, self._mm = self._mm, None
+        if mm is not None:
+            mm.flush()
+            mm.close()
+
+# Shared by the whole process
+journal = EventJournal()
+
+def journal_path(settings: Dict[str, Any]) -> str:
+    """Location of the journal for a config's settings."""
+    return os.path.join(get_cache_dir(settings), JOURNAL_FILE)
+
+def read_journal(path: str) -> List[Event]:
+    """Decode a journal file into its events, oldest first."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be an event journal")
+    magic, version, record_size, capacity, _, _ = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} event journal")
+
+    events = []
+    for slot in range(min(capacity, (len(data) - _HEADER_SIZE) // _RECORD.size)):
+        seq, timestamp, kind, a, b, value, text = _RECORD.unpack_from(data, _HEADER_SIZE + slot * _RECORD.size)
+        # Empty slots have seq 0; a slot whose seq does not map to it was torn mid-write
+        if seq == 0 or seq % capacity != slot:
+            continue
+        events.append(Event(seq, timestamp, kind, a, b, value,
+                            text.rstrip(b'\0').decode('utf-8', 'replace')))
+    events.sort(key=lambda event: event.seq)
+    return events
+
+def journal_info(path: str) -> Dict[str, Any]:
+    """Header fields of a journal file."""
+    with open(path, 'rb') as f:
+        _, version, _, capacity, pid, opened = _HEADER.unpack(f.read(_HEADER.size))
+    return {'version': version, 'capacity': capacity, 'pid': pid, 'opened': opened}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Decode the engine's event journal.")
+    parser.add_argument("path", nargs='?', help="Journal file (default: the one in the config's cache dir)")
+    parser.add_argument("--config", default='atc_engine/config.json', help="Engine config used to locate the journal")
+    parser.add_argument("--previous", action='store_true', help="Read the journal of the run before the last restart")
+    parser.add_argument("--last", type=int, default=0, help="Only show the last N events")
+    parser.add_argument("--type", choices=sorted(EVENT_NAMES.values()), action='append',
+                        help="Only show events of this type (repeatable)")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        from .config_loader import load_config
+        path = journal_path(load_config(args.config)['settings'])
+    if args.previous:
+        path += PREVIOUS_SUFFIX
+
+    try:
+        info = journal_info(path)
+        events = read_journal(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Error: cannot read journal: {e}")
+        sys.exit(1)
+
+    opened = datetime.fromtimestamp(info['opened']).isoformat(sep=' ', timespec='seconds')
+    print(f"Journal {path}: PID {info['pid']}, opened {opened}, "
+          f"{len(events)} of {info['capacity']} slots used")
+    if args.type:
+        events = [event for event in events if EVENT_NAMES.get(event.kind) in args.type]
+    if args.last:
+        events = events[-args.last:]
+
+    previous = None
+    for event in events:
+        stamp = datetime.fromtimestamp(event.time).isoformat(sep=' ', timespec='milliseconds')
+        delta = f"+{(event.time - previous) * 1000:8.1f}ms" if previous is not None else ' ' * 11
+        previous = event.time
+        print(f"{event.seq:>8} {stamp} {delta} {EVENT_NAMES.get(event.kind, event.kind):<8} {event.describe()}")
+
+if __name__ == "__main__":
+    main()
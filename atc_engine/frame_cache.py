@@ -0,0 +1,138 @@
+"""
+Frame Cache Module
+----------------
+Persistent cache of images pre-scaled to the display resolution and stored
+in the display's native pixel format.
+
+Each entry is a raw file keyed by source path, source mtime and display
+geometry. Entries are memory-mapped read-only, so showing a cached frame
+costs a page-cache read instead of a decode and rescale. Entry names start
+with a hash of the source path, and building an entry deletes the other
+entries of that source, so an edited image (or a new display geometry)
+replaces its old frame instead of leaving it behind.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from .framebuffer import FramebufferGeometry, load_frame
+
+class FrameCache:
+    """Stores display-ready raw frames on disk and serves them as mmaps."""
+
+    def __init__(self, cache_dir: str, geometry: FramebufferGeometry):
+        self._cache_dir = cache_dir
+        self.geometry = geometry
+        self._lock = threading.Lock()
+        # source path -> (entry key, mapped entry)
+        self._mapped: Dict[str, Tuple[str, mmap.mmap]] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_key(self, source_path: str) -> Optional[str]:
+        """Build the cache key for a source file, or None if it is missing.
+
+        The key is <source path hash>-<hash of path, mtime and geometry>.
+        """
+        source_path = os.path.abspath(source_path)
+        try:
+            mtime_ns = os.stat(source_path).st_mtime_ns
+        except OSError:
+            return None
+        g = self.geometry
+        key = f"{source_path}|{mtime_ns}|{g.width}x{g.height}|{g.bits_per_pixel}|{g.stride}"
+        path_hash = hashlib.sha1(source_path.encode('utf-8')).hexdigest()[:16]
+        return f"{path_hash}-{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+    def _entry_path(self, key: str) -> str:
+        """Location of the raw file for a cache key."""
+        return os.path.join(self._cache_dir, f"{key}.raw")
+
+    def _evict_stale(self, key: str) -> None:
+        """Delete the entries of the same source built for another mtime or geometry."""
+        prefix = key.split('-', 1)[0] + '-'
+        current = f"{key}.raw"
+        try:
+            names = os.listdir(self._cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(prefix) and name.endswith('.raw') and name != current:
+                try:
+                    os.remove(os.path.join(self._cache_dir, name))
+                except OSError:
+                    pass
+
+    def _build_entry(self, source_path: str, entry_path: str) -> bool:
+        """Decode, scale and convert a source image into a cache entry."""
+        try:
+            frame = load_frame(source_path, self.geometry)
+        except Exception as e:
+            print(f"[FrameCache] Error converting {source_path}: {e}")
+            return False
+
+        # Write to a temporary file first so readers never map a partial entry
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(frame)
+            os.replace(tmp_path, entry_path)
+            return True
+        except OSError as e:
+            print(f"[FrameCache] Error writing cache entry {entry_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def _map_entry(self, entry_path: str) -> Optional[mmap.mmap]:
+        """Memory-map a cache entry read-only."""
+        try:
+            with open(entry_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size != self.geometry.frame_bytes:
+                    print(f"[FrameCache] Discarding truncated entry {entry_path}")
+                    os.remove(entry_path)
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+    def get(self, source_path: str) -> Optional[mmap.mmap]:
+        """Return a read-only mapping of the display frame for a source image."""
+        key = self._entry_key(source_path)
+        if key is None:
+            print(f"[FrameCache] Source image not found: {source_path}")
+            return None
+
+        with self._lock:
+            mapped = self._mapped.get(source_path)
+            if mapped and mapped[0] == key:
+                return mapped[1]
+
+            entry_path = self._entry_path(key)
+            frame_map = self._map_entry(entry_path)
+            if frame_map is None:
+                if not self._build_entry(source_path, entry_path):
+                    return None
+                self._evict_stale(key)
+                frame_map = self._map_entry(entry_path)
+                if frame_map is None:
+                    return None
+
+            # Source changed since it was last mapped; drop the stale mapping
+            if mapped:
+                mapped[1].close()
+            self._mapped[source_path] = (key, frame_map)
+            return frame_map
+
+    def warm(self, source_paths: Iterable[str]) -> int:
+        """Build and map entries for the given images; returns how many are ready."""
+        return sum(1 for path in source_paths if self.get(path) is not None)
+
+    def close(self) -> None:
+        """Unmap all open entries."""
+        with self._lock:
+            for _, frame_map in self._mapped.values():
+                frame_map.close()
+            self._mapped.clear()
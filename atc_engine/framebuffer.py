@@ -0,0 +1,304 @@
+"""
+Framebuffer Module
+----------------
+Renders images straight into a Linux framebuffer device via mmap, without X11.
+
+Frames are scaled and converted to the device's native pixel format ahead of
+time, so showing an image is a single memory copy into the mapped device.
+A plain file can stand in for the device (pass an explicit geometry).
+
+The geometry comes from the FBIOGET_VSCREENINFO/FBIOGET_FSCREENINFO ioctls:
+the visible resolution, the line length and the panning offset of the page
+being scanned out. The virtual size can be larger (double buffering) and
+only determines where that page lies in device memory.
+"""
+
+import importlib.util
+import mmap
+import os
+import struct
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Supported native pixel formats: name -> bytes per pixel
+PIXEL_FORMATS = {
+    'RGB565': 2,
+    'BGR888': 3,
+    'BGRX8888': 4,
+}
+
+# Default pixel format for each framebuffer bit depth
+_BPP_TO_FORMAT = {
+    16: 'RGB565',
+    24: 'BGR888',
+    32: 'BGRX8888',
+}
+
+# ioctls of <linux/fb.h>
+FBIOGET_VSCREENINFO = 0x4600
+FBIOGET_FSCREENINFO = 0x4602
+# struct fb_var_screeninfo starts with xres, yres, xres_virtual, yres_virtual, xoffset, yoffset, bits_per_pixel
+_VAR_SCREENINFO = struct.Struct('=7I')
+_VAR_SCREENINFO_SIZE = 160
+# struct fb_fix_screeninfo up to line_length (native alignment, unsigned long smem_start)
+_FIX_SCREENINFO = struct.Struct('16sLIIIIHHHI')
+_FIX_SCREENINFO_SIZE = 128
+
+class FramebufferGeometry:
+    """Describes the resolution and memory layout of a framebuffer."""
+
+    def __init__(self, width: int, height: int, bits_per_pixel: int = 32, stride: Optional[int] = None,
+                 offset: int = 0):
+        if bits_per_pixel not in _BPP_TO_FORMAT:
+            raise ValueError(f"Unsupported framebuffer depth: {bits_per_pixel} bpp")
+        self.width = width
+        self.height = height
+        self.bits_per_pixel = bits_per_pixel
+        self.pixel_format = _BPP_TO_FORMAT[bits_per_pixel]
+        self.bytes_per_pixel = PIXEL_FORMATS[self.pixel_format]
+        self.stride = stride if stride else width * self.bytes_per_pixel
+        if self.stride < width * self.bytes_per_pixel:
+            raise ValueError(f"Stride {self.stride} too small for width {width}")
+        # Byte offset of the visible page in device memory (non-zero when panned)
+        self.offset = offset
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Visible resolution as (width, height)."""
+        return (self.width, self.height)
+
+    @property
+    def frame_bytes(self) -> int:
+        """Number of bytes in one full frame."""
+        return self.stride * self.height
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FramebufferGeometry):
+            return NotImplemented
+        return (self.width, self.height, self.bits_per_pixel, self.stride) == \
+               (other.width, other.height, other.bits_per_pixel, other.stride)
+
+    def __repr__(self) -> str:
+        return f"FramebufferGeometry({self.width}x{self.height}, {self.bits_per_pixel}bpp, stride={self.stride})"
+
+def _read_sysfs(fb_name: str, attribute: str) -> Optional[str]:
+    """Read a framebuffer attribute from sysfs, returning None if unavailable."""
+    try:
+        with open(os.path.join('/sys/class/graphics', fb_name, attribute), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _query_screeninfo(device_path: str) -> Optional[FramebufferGeometry]:
+    """Read the visible geometry of a framebuffer device with the screeninfo ioctls."""
+    import fcntl
+
+    try:
+        fd = os.open(device_path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        var_info = bytearray(_VAR_SCREENINFO_SIZE)
+        fix_info = bytearray(_FIX_SCREENINFO_SIZE)
+        fcntl.ioctl(fd, FBIOGET_VSCREENINFO, var_info)
+        fcntl.ioctl(fd, FBIOGET_FSCREENINFO, fix_info)
+    except OSError:
+        return None  # Not a framebuffer device (e.g. a plain file)
+    finally:
+        os.close(fd)
+    width, height, _, _, x_offset, y_offset, bits_per_pixel = _VAR_SCREENINFO.unpack_from(var_info)
+    line_length = _FIX_SCREENINFO.unpack_from(fix_info)[-1]
+    offset = y_offset * line_length + x_offset * bits_per_pixel // 8
+    return FramebufferGeometry(width, height, bits_per_pixel, line_length or None, offset)
+
+def _query_sysfs(device_path: str) -> Optional[FramebufferGeometry]:
+    """Read the visible geometry of a framebuffer from sysfs (current mode, stride and pan)."""
+    fb_name = os.path.basename(device_path)
+    modes = _read_sysfs(fb_name, 'modes')
+    bits_per_pixel = _read_sysfs(fb_name, 'bits_per_pixel')
+    if not modes or not bits_per_pixel:
+        return None
+    # The current mode is listed first, e.g. "U:1920x1080p-60"
+    resolution = modes.splitlines()[0].split(':')[-1].split('p')[0].split('i')[0]
+    width, height = (int(v) for v in resolution.split('x'))
+    stride = _read_sysfs(fb_name, 'stride')
+    pan = _read_sysfs(fb_name, 'pan')
+    x_offset, y_offset = (int(v) for v in pan.split(',')) if pan else (0, 0)
+    bits_per_pixel_value = int(bits_per_pixel)
+    line_length = int(stride) if stride else width * bits_per_pixel_value // 8
+    return FramebufferGeometry(width, height, bits_per_pixel_value, line_length,
+                               y_offset * line_length + x_offset * bits_per_pixel_value // 8)
+
+def query_geometry(device_path: str) -> Optional[FramebufferGeometry]:
+    """Query the visible geometry of a framebuffer device (e.g. /dev/fb0).
+
+    Uses the screeninfo ioctls, falling back to the current mode in sysfs.
+    """
+    try:
+        return _query_screeninfo(device_path) or _query_sysfs(device_path)
+    except ValueError as e:
+        print(f"[Framebuffer] Error reading geometry of {device_path}: {e}")
+        return None
+
+def pillow_available() -> bool:
+    """Check whether Pillow is installed, without importing it."""
+    return importlib.util.find_spec('PIL') is not None
+
+def fit_image(image: "Image.Image", size: Tuple[int, int]) -> "Image.Image":
+    """Scale an image to fit size preserving aspect ratio, centered on black."""
+    from PIL import Image
+
+    screen_width, screen_height = size
+    scale_factor = min(screen_width / image.width, screen_height / image.height)
+    new_width = max(1, int(image.width * scale_factor))
+    new_height = max(1, int(image.height * scale_factor))
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    scaled = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    canvas = Image.new('RGB', size, (0, 0, 0))
+    canvas.paste(scaled, ((screen_width - new_width) // 2, (screen_height - new_height) // 2))
+    return canvas
+
+def pack_pixels(image: "Image.Image", pixel_format: str) -> bytes:
+    """Convert an RGB image to raw bytes in the given native pixel format."""
+    if pixel_format == 'BGRX8888':
+        return image.tobytes('raw', 'BGRX')
+    if pixel_format == 'BGR888':
+        return image.tobytes('raw', 'BGR')
+    if pixel_format == 'RGB565':
+        # Build the low and high bytes of each little-endian 16-bit pixel as
+        # separate 8-bit planes, then interleave them via an LA image.
+        from PIL import Image, ImageChops
+        red, green, blue = image.split()
+        low = ImageChops.add(green.point(lambda v: (v & 0x1C) << 3), blue.point(lambda v: v >> 3))
+        high = ImageChops.add(red.point(lambda v: v & 0xF8), green.point(lambda v: v >> 5))
+        return Image.merge('LA', (low, high)).tobytes()
+    raise ValueError(f"Unsupported pixel format: {pixel_format}")
+
+def render_frame(image: "Image.Image", geometry: FramebufferGeometry) -> bytes:
+    """Produce a full device frame (including stride padding) for an image."""
+    packed = pack_pixels(fit_image(image, geometry.size), geometry.pixel_format)
+    row_bytes = geometry.width * geometry.bytes_per_pixel
+    if geometry.stride == row_bytes:
+        return packed
+
+    padding = bytes(geometry.stride - row_bytes)
+    return b''.join(
+        packed[row * row_bytes:(row + 1) * row_bytes] + padding
+        for row in range(geometry.height)
+    )
+
+def load_frame(path: str, geometry: FramebufferGeometry) -> bytes:
+    """Decode an image file and convert it into a device frame."""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Pillow is required to convert images for the framebuffer")
+    with Image.open(path) as image:
+        return render_frame(image, geometry)
+
+class FramebufferDevice:
+    """A memory-mapped framebuffer device (or a plain file standing in for one)."""
+
+    def __init__(self, device_path: str = '/dev/fb0', geometry: Optional[FramebufferGeometry] = None):
+        self._device_path = device_path
+        self.geometry = geometry or query_geometry(device_path)
+        if self.geometry is None:
+            raise ValueError(f"Cannot determine geometry of '{device_path}'; pass it explicitly")
+
+        self._fd = os.open(device_path, os.O_RDWR | os.O_CREAT, 0o644)
+        # The visible page starts at the panning offset; map everything up to its end
+        self._start = self.geometry.offset
+        self._end = self._start + self.geometry.frame_bytes
+        try:
+            if os.path.isfile(device_path) and os.fstat(self._fd).st_size < self._end:
+                os.ftruncate(self._fd, self._end)
+            self._map = mmap.mmap(self._fd, self._end, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except Exception:
+            os.close(self._fd)
+            raise
+        print(f"[Framebuffer] Opened {device_path}: {self.geometry}")
+
+    def blit(self, frame) -> None:
+        """Copy a full pre-converted frame (bytes-like) into the device."""
+        if len(frame) != self.geometry.frame_bytes:
+            raise ValueError(f"Frame size {len(frame)} does not match device frame size {self.geometry.frame_bytes}")
+        self._map[self._start:self._end] = frame
+
+    def clear(self) -> None:
+        """Fill the device with black."""
+        self._map[self._start:self._end] = bytes(self.geometry.frame_bytes)
+
+    def close(self) -> None:
+        """Unmap and close the device."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class FramebufferRenderer:
+    """Displays images on a framebuffer using frames converted ahead of time.
+
+    With a frame cache, frames come from memory-mapped cache entries and are
+    copied straight into the device; otherwise they are held in memory.
+    """
+
+    def __init__(self, device_path: str = '/dev/fb0', geometry: Optional[FramebufferGeometry] = None,
+                 frame_cache: Optional[Any] = None):
+        self._device = FramebufferDevice(device_path, geometry)
+        self._frame_cache = frame_cache
+        self._frames: Dict[str, bytes] = {}
+        self._current_path: Optional[str] = None
+        if frame_cache is not None and frame_cache.geometry != self.geometry:
+            raise ValueError(f"Frame cache geometry {frame_cache.geometry} does not match device {self.geometry}")
+
+    @property
+    def geometry(self) -> FramebufferGeometry:
+        """Geometry of the underlying device."""
+        return self._device.geometry
+
+    def preload(self, paths) -> None:
+        """Convert images to native frames ahead of display."""
+        if self._frame_cache is not None:
+            self._frame_cache.warm(paths)
+            return
+        for path in paths:
+            if path in self._frames:
+                continue
+            try:
+                self._frames[path] = load_frame(path, self.geometry)
+            except Exception as e:
+                print(f"[Framebuffer] Error preparing frame for {path}: {e}")
+
+    def _get_frame(self, path: str):
+        """Return the prepared frame for a path, preparing it if needed."""
+        if self._frame_cache is not None:
+            return self._frame_cache.get(path)
+        if path not in self._frames:
+            self.preload([path])
+        return self._frames.get(path)
+
+    def show(self, path: str) -> bool:
+        """Show an image, converting it first if it was not preloaded."""
+        frame = self._get_frame(path)
+        if frame is None:
+            return False
+        self._device.blit(frame)
+        self._current_path = path
+        return True
+
+    def clear(self) -> None:
+        """Blank the screen."""
+        self._device.clear()
+        self._current_path = None
+
+    def close(self) -> None:
+        """Release the device and any prepared frames."""
+        self._frames.clear()
+        self._device.close()
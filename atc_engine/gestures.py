@@ -0,0 +1,197 @@
+"""
+Gestures Module
+-------------
+Recognizes taps, double taps, long presses and button sequences.
+
+All gestures in the config's `gestures` section are compiled into one trie
+of press/release edges. Each debounced edge moves the recognizer along a
+single transition (a dict lookup), so the work per event does not depend on
+how many gestures are configured. Timing limits are checked against the
+timestamps of the current path when a gesture completes. A gesture whose
+edges are a prefix of another one (a tap on a button that also has a double
+tap) is held back until the longer gesture can no longer match.
+
+Gestures reuse the existing targets: each names a `media` or an `action`
+entry of the config. A gesture with a `layer` key only fires while that
+layer is active; gestures without one fire on every layer.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+GESTURE_TYPES = ('tap', 'double_tap', 'long_press', 'sequence')
+
+# Default timing limits in seconds
+DEFAULT_TAP_TIME = 0.3
+DEFAULT_DOUBLE_TAP_WINDOW = 0.4
+DEFAULT_LONG_PRESS_TIME = 1.0
+DEFAULT_SEQUENCE_WINDOW = 1.0
+
+PRESS = 'press'
+RELEASE = 'release'
+
+# An edge of one button
+Symbol = Tuple[str, str]
+
+class Gesture:
+    """A compiled gesture: its edge symbols, timing limits and target."""
+
+    __slots__ = ('name', 'section', 'target', 'layer', 'symbols', 'gaps', 'hold_time', 'repeat')
+
+    def __init__(self, name: str, gesture_config: Dict[str, Any]):
+        self.name = name
+        # Layer the gesture belongs to (None fires on every layer)
+        self.layer: Optional[str] = gesture_config.get('layer')
+        if 'media' in gesture_config:
+            self.section, self.target = 'media', gesture_config['media']
+        else:
+            self.section, self.target = 'actions', gesture_config['action']
+        # Long presses fire on a timer rather than on an edge
+        self.hold_time: Optional[float] = None
+        self.repeat: Optional[float] = None
+
+        gesture_type = gesture_config['type']
+        if gesture_type == 'tap':
+            button = gesture_config['button']
+            self.symbols: List[Symbol] = [(button, PRESS), (button, RELEASE)]
+            # Maximum seconds between each symbol and the one before it
+            self.gaps: List[Optional[float]] = [None, gesture_config.get('max_duration', DEFAULT_TAP_TIME)]
+        elif gesture_type == 'double_tap':
+            button = gesture_config['button']
+            window = gesture_config.get('window', DEFAULT_DOUBLE_TAP_WINDOW)
+            self.symbols = [(button, PRESS), (button, RELEASE), (button, PRESS)]
+            self.gaps = [None, window, window]
+        elif gesture_type == 'long_press':
+            self.symbols = [(gesture_config['button'], PRESS)]
+            self.gaps = [None]
+            self.hold_time = gesture_config.get('threshold', DEFAULT_LONG_PRESS_TIME)
+            self.repeat = gesture_config.get('repeat')
+        elif gesture_type == 'sequence':
+            window = gesture_config.get('window', DEFAULT_SEQUENCE_WINDOW)
+            self.symbols = []
+            for button in gesture_config['buttons']:
+                self.symbols += [(button, PRESS), (button, RELEASE)]
+            # The sequence completes on the press of its last button
+            self.symbols.pop()
+            self.gaps = [None] + [window] * (len(self.symbols) - 1)
+        else:
+            raise ValueError(f"Gesture '{name}' has invalid type '{gesture_type}'")
+
+    def timing_ok(self, times: List[float]) -> bool:
+        """Check the gaps between the edge timestamps of a completed path."""
+        for i, gap in enumerate(self.gaps):
+            if gap is not None and times[i] - times[i - 1] > gap:
+                return False
+        return True
+
+class _Node:
+    """A state of the recognizer: the edges seen so far on the current path."""
+
+    __slots__ = ('children', 'accept', 'hold', 'timeout')
+
+    def __init__(self):
+        self.children: Dict[Symbol, '_Node'] = {}
+        # Gesture completed by reaching this node
+        self.accept: Optional[Gesture] = None
+        # Long press that fires while the button stays down in this node
+        self.hold: Optional[Gesture] = None
+        # Longest gap any continuation allows before the path is abandoned
+        self.timeout = 0.0
+
+def compile_gestures(gestures_config: Dict[str, Dict[str, Any]]) -> _Node:
+    """Build the recognizer trie; raises ValueError for ambiguous gestures."""
+    root = _Node()
+    for name, gesture_config in gestures_config.items():
+        gesture = Gesture(name, gesture_config)
+        node = root
+        for symbol, gap in zip(gesture.symbols, gesture.gaps):
+            node.timeout = max(node.timeout, gap or 0.0)
+            node = node.children.setdefault(symbol, _Node())
+
+        if gesture.hold_time is not None:
+            if node.hold is not None:
+                raise ValueError(f"Gestures '{node.hold.name}' and '{name}' are both long presses of the same button")
+            node.hold = gesture
+        else:
+            if node.accept is not None:
+                raise ValueError(f"Gestures '{node.accept.name}' and '{name}' have the same button sequence")
+            node.accept = gesture
+    return root
+
+class GestureEngine:
+    """Runs the compiled recognizer over debounced button edges."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self._root = compile_gestures(config.get('gestures', {}))
+        self._node = self._root
+        # Timestamps of the edges on the current path
+        self._times: List[float] = []
+        # Time the active long press last fired (None until it fires)
+        self._hold_fired_at: Optional[float] = None
+        self._fired: List[Gesture] = []
+
+    @property
+    def empty(self) -> bool:
+        """True if no gestures are configured."""
+        return not self._root.children
+
+    def _reset(self) -> None:
+        self._node = self._root
+        self._times = []
+        self._hold_fired_at = None
+
+    def _finish_pending(self) -> None:
+        """Fire the gesture completed at the current node (if its timing held) and reset."""
+        gesture = self._node.accept
+        if gesture is not None and self._hold_fired_at is None and gesture.timing_ok(self._times):
+            self._fired.append(gesture)
+        self._reset()
+
+    def feed(self, button: str, pressed: bool, timestamp: float) -> None:
+        """Advance the recognizer by one edge."""
+        if not self._root.children:
+            return
+        symbol = (button, PRESS if pressed else RELEASE)
+        self.poll_timers(timestamp)
+
+        if self._hold_fired_at is not None:
+            # The release that ends a long press is not part of any other gesture
+            held_button = self._node.hold.symbols[0][0]
+            self._reset()
+            if symbol == (held_button, RELEASE):
+                return
+
+        child = self._node.children.get(symbol)
+        if child is None and self._node is not self._root:
+            self._finish_pending()
+            child = self._root.children.get(symbol)
+        if child is None:
+            return
+
+        self._node = child
+        self._times.append(timestamp)
+        if child.accept is not None and not child.children and child.hold is None:
+            self._finish_pending()
+
+    def poll_timers(self, timestamp: float) -> None:
+        """Fire long presses and abandon paths whose continuation window passed."""
+        node = self._node
+        if node is self._root:
+            return
+        elapsed = timestamp - self._times[-1]
+        if node.hold is not None:
+            # The button is still down; nothing times out until it is released
+            if self._hold_fired_at is None:
+                if elapsed >= node.hold.hold_time:
+                    self._hold_fired_at = timestamp
+                    self._fired.append(node.hold)
+            elif node.hold.repeat and timestamp - self._hold_fired_at >= node.hold.repeat:
+                self._hold_fired_at = timestamp
+                self._fired.append(node.hold)
+        elif elapsed > node.timeout:
+            self._finish_pending()
+
+    def poll(self, timestamp: float) -> List[Gesture]:
+        """Run timers and return the gestures recognized since the last poll."""
+        self.poll_timers(timestamp)
+        fired, self._fired = self._fired, []
+        return fired
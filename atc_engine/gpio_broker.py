@@ -0,0 +1,550 @@
+"""
+GPIO Broker Module
+----------------
+One process owns the GPIO pins and shares their states with any number of
+subscribers.
+
+The broker configures the pins, samples them once per interval and
+publishes the timestamped states plus a ring of recent edges in a shared
+memory file. A sequence counter around every update (a seqlock) lets
+readers take consistent snapshots without locks or syscalls. On every edge
+the broker sends a one-byte datagram to each subscriber's socket, so
+subscribers can sleep until something changes.
+
+The header carries the broker's PID. A reader that finds an update left
+unfinished checks that the broker is still alive rather than waiting on it
+forever, and a subscriber that sees a new PID (a restarted broker, which
+resets the shared state) subscribes again and re-adds its pins.
+
+The control socket is only accessible to the broker's user, and
+subscribers can only add pins the broker was started with or allowed
+(--allow).
+
+GPIOSubscriber mirrors the parts of pyA64's gpio module the scripts use
+(init, setcfg, pullup, input, cleanup), and open_gpio() returns a subscriber
+when a broker is running and pyA64's gpio module otherwise.
+
+Usage:
+    python -m atc_engine.gpio_broker --config atc_engine/config.json
+    python -m atc_engine.gpio_broker --pins 32 33 34 --interval 0.01
+    python -m atc_engine.gpio_broker --config atc_engine/config.json --allow 71
+"""
+
+import argparse
+import json
+import mmap
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+_SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else '/tmp'
+DEFAULT_SHM_PATH = os.path.join(_SHM_DIR, 'atc_gpio_broker')
+DEFAULT_CONTROL_PATH = '/tmp/atc_gpio_broker.sock'
+
+MAGIC = b'AGPB'
+VERSION = 1
+MAX_PINS = 64
+RING_SIZE = 1024
+
+# magic, version, max pins, ring size, pin count, broker PID, sequence, sample time, edges written
+_HEADER = struct.Struct('<4sIIIIIQdQ')
+# pin number, state, time of last edge
+_PIN = struct.Struct('<IId')
+# edge time, pin number, new state
+_EDGE = struct.Struct('<dII')
+
+_PID_OFFSET = 20
+_SEQ_OFFSET = 24
+_PINS_OFFSET = _HEADER.size
+_RING_OFFSET = _PINS_OFFSET + MAX_PINS * _PIN.size
+SHM_SIZE = _RING_OFFSET + RING_SIZE * _EDGE.size
+
+# Seconds a reader waits on an unfinished update before checking the broker is alive
+READ_CHECK_INTERVAL = 0.05
+# Seconds after which a reader gives up on an update a live broker never finishes
+READ_TIMEOUT = 1.0
+
+Edge = Tuple[float, int, int]
+
+class BrokerUnavailable(RuntimeError):
+    """The broker stopped (or stalled) in the middle of an update."""
+
+class SharedState:
+    """The broker's shared memory layout, for writing (broker) or reading (subscribers)."""
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        flags = os.O_RDWR | os.O_CREAT if writable else os.O_RDONLY
+        fd = os.open(path, flags, 0o644)
+        try:
+            if writable:
+                os.ftruncate(fd, SHM_SIZE)
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mm = mmap.mmap(fd, SHM_SIZE, access=access)
+        finally:
+            os.close(fd)
+        if writable:
+            self._reset()
+        elif self._mm[:4] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a GPIO broker state file")
+
+    # --- Writer side (broker) ---
+
+    def _reset(self) -> None:
+        """Clear the state left by a previous broker, as one update readers can see happening."""
+        # Keep counting from the old sequence (odd while resetting, even after) so a reader
+        # mid-snapshot sees the change, even if the old broker died with an update open
+        old_seq = struct.unpack_from('<Q', self._mm, _SEQ_OFFSET)[0]
+        seq = old_seq + 1 if old_seq % 2 == 0 else old_seq + 2
+        struct.pack_into('<Q', self._mm, _SEQ_OFFSET, seq)
+        self._mm[_PINS_OFFSET:] = bytes(SHM_SIZE - _PINS_OFFSET)
+        self.write_header(0, seq, 0.0, 0)
+        self.end_write(seq)
+
+    def begin_write(self) -> int:
+        """Mark the state as being updated (odd sequence); returns the sequence."""
+        seq = struct.unpack_from('<Q', self._mm, _SEQ_OFFSET)[0] + 1
+        struct.pack_into('<Q', self._mm, _SEQ_OFFSET, seq)
+        return seq
+
+    def end_write(self, seq: int) -> None:
+        """Publish the update (even sequence)."""
+        struct.pack_into('<Q', self._mm, _SEQ_OFFSET, seq + 1)
+
+    def write_pin(self, slot: int, pin: int, state: int, edge_time: float) -> None:
+        _PIN.pack_into(self._mm, _PINS_OFFSET + slot * _PIN.size, pin, state, edge_time)
+
+    def write_edge(self, index: int, edge: Edge) -> None:
+        _EDGE.pack_into(self._mm, _RING_OFFSET + (index % RING_SIZE) * _EDGE.size, *edge)
+
+    def write_header(self, pin_count: int, seq: int, sample_time: float, edge_count: int) -> None:
+        _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, MAX_PINS, RING_SIZE, pin_count, os.getpid(),
+                          seq, sample_time, edge_count)
+
+    # --- Reader side (subscribers) ---
+
+    def broker_pid(self) -> int:
+        """PID of the broker that last reset the state (0 if none has)."""
+        return struct.unpack_from('<I', self._mm, _PID_OFFSET)[0]
+
+    def broker_alive(self) -> bool:
+        """Check whether the broker process that publishes the state still exists."""
+        pid = self.broker_pid()
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # Exists, owned by another user
+        return True
+
+    def _read_consistent(self, reader):
+        """Run reader until it sees a snapshot no write overlapped (seqlock read).
+
+        Raises BrokerUnavailable if an update stays unfinished because the
+        broker died, or stays unfinished for READ_TIMEOUT seconds.
+        """
+        started = check_at = None
+        while True:
+            seq = struct.unpack_from('<Q', self._mm, _SEQ_OFFSET)[0]
+            if not seq & 1:
+                result = reader()
+                if struct.unpack_from('<Q', self._mm, _SEQ_OFFSET)[0] == seq:
+                    return result
+                continue
+            # An update takes microseconds; only a stuck one gets this far repeatedly
+            now = time.monotonic()
+            if started is None:
+                started, check_at = now, now + READ_CHECK_INTERVAL
+            elif now >= check_at:
+                if not self.broker_alive():
+                    raise BrokerUnavailable(f"GPIO broker (PID {self.broker_pid()}) died during an update")
+                if now - started >= READ_TIMEOUT:
+                    raise BrokerUnavailable(f"GPIO broker (PID {self.broker_pid()}) stalled during an update")
+                check_at = now + READ_CHECK_INTERVAL
+            time.sleep(0)
+
+    def header(self) -> Tuple[int, float, int]:
+        """(pin count, sample time, edges written)."""
+        def read():
+            _, _, _, _, pin_count, _, _, sample_time, edge_count = _HEADER.unpack_from(self._mm, 0)
+            return pin_count, sample_time, edge_count
+        return self._read_consistent(read)
+
+    def pins(self) -> List[Tuple[int, int, float]]:
+        """(pin, state, last edge time) for every published pin."""
+        def read():
+            pin_count = _HEADER.unpack_from(self._mm, 0)[4]
+            return [_PIN.unpack_from(self._mm, _PINS_OFFSET + slot * _PIN.size) for slot in range(pin_count)]
+        return self._read_consistent(read)
+
+    def pin_state(self, slot: int) -> int:
+        """State of the pin in a slot."""
+        return self._read_consistent(lambda: _PIN.unpack_from(self._mm, _PINS_OFFSET + slot * _PIN.size)[1])
+
+    def edges_since(self, edge_count: int) -> Tuple[List[Edge], int, int]:
+        """Edges written after edge_count: (edges, new edge count, edges lost to ring overrun)."""
+        def read():
+            total = _HEADER.unpack_from(self._mm, 0)[8]
+            first = max(edge_count, total - RING_SIZE)
+            edges = [_EDGE.unpack_from(self._mm, _RING_OFFSET + (i % RING_SIZE) * _EDGE.size)
+                     for i in range(first, total)]
+            return edges, total, first - edge_count
+        return self._read_consistent(read)
+
+    def close(self) -> None:
+        self._mm.close()
+
+class GPIOBroker:
+    """Owns the pins, samples them and publishes states and edges."""
+
+    def __init__(self, gpio: Any, pins: List[int], interval: float = 0.01,
+                 shm_path: str = DEFAULT_SHM_PATH, control_path: str = DEFAULT_CONTROL_PATH,
+                 allowed_pins: Optional[List[int]] = None):
+        self._gpio = gpio
+        # Pins subscribers may ask for with `add`: the published ones plus allowed_pins
+        self._allowed_pins: Set[int] = set(pins) | set(allowed_pins or [])
+        self._interval = interval
+        self._control_path = control_path
+        self._shutdown_event = threading.Event()
+        self._state = SharedState(shm_path, writable=True)
+        self._slots: Dict[int, int] = {}
+        self._states: List[int] = []
+        self._edge_times: List[float] = []
+        self._edge_count = 0
+        self._subscribers: Set[Any] = set()
+
+        self._gpio.init()
+        for pin in pins:
+            self._add_pin(pin)
+
+        if os.path.exists(control_path):
+            os.remove(control_path)
+        self._control = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Created owner-only so other local users cannot subscribe or add pins
+        old_umask = os.umask(0o177)
+        try:
+            self._control.bind(control_path)
+        finally:
+            os.umask(old_umask)
+        self._control.setblocking(False)
+
+    def _add_pin(self, pin: int) -> None:
+        """Configure a pin as a pulled-up input and start publishing it."""
+        if pin in self._slots:
+            return
+        if len(self._slots) >= MAX_PINS:
+            print(f"[Broker] Cannot add pin {pin}: all {MAX_PINS} slots in use")
+            return
+        self._gpio.setcfg(pin, self._gpio.INPUT)
+        self._gpio.pullup(pin, self._gpio.PULLUP)
+        state = self._gpio.input(pin)
+        slot = len(self._slots)
+        self._slots[pin] = slot
+        self._states.append(state)
+        self._edge_times.append(0.0)
+
+        seq = self._state.begin_write()
+        self._state.write_pin(slot, pin, state, 0.0)
+        self._state.write_header(len(self._slots), seq, time.monotonic(), self._edge_count)
+        self._state.end_write(seq)
+        print(f"[Broker] Publishing pin {pin} (slot {slot})")
+
+    def _handle_control(self) -> None:
+        """Process subscribe/unsubscribe/add-pin requests."""
+        while True:
+            try:
+                data, address = self._control.recvfrom(256)
+            except (BlockingIOError, InterruptedError):
+                return
+            parts = data.decode('ascii', 'replace').split()
+            if not parts:
+                continue
+            if parts[0] == 'sub' and address:
+                self._subscribers.add(address)
+            elif parts[0] == 'unsub':
+                self._subscribers.discard(address)
+            elif parts[0] == 'add' and len(parts) == 2 and parts[1].isdigit():
+                if int(parts[1]) not in self._allowed_pins:
+                    print(f"[Broker] Refusing to add pin {parts[1]}: not in the allowed pins")
+                    continue
+                try:
+                    self._add_pin(int(parts[1]))
+                except Exception as e:
+                    print(f"[Broker] Error adding pin {parts[1]}: {e}")
+
+    def _notify(self) -> None:
+        """Wake every subscriber; forget the ones that went away."""
+        for address in list(self._subscribers):
+            try:
+                self._control.sendto(b'!', address)
+            except (BlockingIOError, InterruptedError):
+                pass  # Subscriber's queue is full; it has wakeups pending anyway
+            except OSError:
+                self._subscribers.discard(address)
+
+    def sample(self) -> int:
+        """Read every pin once and publish the result; returns the number of edges."""
+        now = time.monotonic()
+        edges = []
+        for pin, slot in self._slots.items():
+            try:
+                state = self._gpio.input(pin)
+            except Exception as e:
+                print(f"[Broker] Error reading pin {pin}: {e}")
+                continue
+            if state != self._states[slot]:
+                self._states[slot] = state
+                self._edge_times[slot] = now
+                edges.append((slot, pin, state))
+
+        seq = self._state.begin_write()
+        for slot, pin, state in edges:
+            self._state.write_pin(slot, pin, state, now)
+            self._state.write_edge(self._edge_count, (now, pin, state))
+            self._edge_count += 1
+        self._state.write_header(len(self._slots), seq, now, self._edge_count)
+        self._state.end_write(seq)
+
+        if edges:
+            self._notify()
+        return len(edges)
+
+    def stop(self) -> None:
+        self._shutdown_event.set()
+
+    def run(self) -> None:
+        """Sample until stopped."""
+        print(f"[Broker] Sampling {len(self._slots)} pins every {self._interval * 1000:.0f} ms")
+        try:
+            while not self._shutdown_event.is_set():
+                self.sample()
+                readable, _, _ = select.select([self._control], [], [], self._interval)
+                if readable:
+                    self._handle_control()
+        finally:
+            self._control.close()
+            if os.path.exists(self._control_path):
+                os.remove(self._control_path)
+            self._state.close()
+            print("[Broker] Stopped")
+
+class GPIOSubscriber:
+    """Reads pin states published by a GPIOBroker; a drop-in for pyA64's gpio module."""
+
+    INPUT = 0
+    OUTPUT = 1
+    PULLNONE = 0
+    PULLUP = 1
+    PULLDOWN = 2
+    LOW = 0
+    HIGH = 1
+
+    def __init__(self, shm_path: str = DEFAULT_SHM_PATH, control_path: str = DEFAULT_CONTROL_PATH):
+        self._state = SharedState(shm_path)
+        self._control_path = control_path
+        self._slots: Dict[int, int] = {}
+        # Abstract-namespace address: nothing to clean up if the process dies
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(f"\0atc_gpio_sub_{os.getpid()}_{id(self)}")
+        self._socket.setblocking(False)
+        self._socket.sendto(b'sub', control_path)
+        self._edge_count = self._state.header()[2]
+        self._broker_pid = self._state.broker_pid()
+        # Pins asked for through setcfg, re-added if the broker restarts
+        self._pins: Set[int] = set()
+        # While the broker is unavailable, pins read released until this time, then it is tried again
+        self._unavailable_until: Optional[float] = None
+
+    def _check_broker(self) -> bool:
+        """Re-subscribe after a broker restart; False while the broker is unavailable."""
+        pid = self._state.broker_pid()
+        if self._unavailable_until is not None:
+            if pid == self._broker_pid and time.monotonic() < self._unavailable_until:
+                return False
+            self._unavailable_until = None
+        if pid == self._broker_pid:
+            return True
+        print(f"[Broker] Broker restarted (PID {self._broker_pid} -> {pid}); subscribing again")
+        self._broker_pid = pid
+        self._slots = {}
+        self._socket.sendto(b'sub', self._control_path)
+        for pin in sorted(self._pins):
+            self.setcfg(pin, self.INPUT)
+        self._edge_count = self._state.header()[2]
+        return True
+
+    def _unavailable(self, error: Exception) -> None:
+        """Note that the broker cannot be read, logging once per outage."""
+        if self._unavailable_until is None:
+            print(f"[Broker] {error}; pins read as released until it is back")
+        self._unavailable_until = time.monotonic() + 1.0
+
+    def _refresh_slots(self) -> None:
+        self._slots = {pin: slot for slot, (pin, _, _) in enumerate(self._state.pins())}
+
+    def init(self) -> None:
+        """The broker initializes the hardware; nothing to do."""
+
+    def setcfg(self, pin: int, mode: int) -> None:
+        """Make sure the broker publishes a pin (inputs only)."""
+        if mode != self.INPUT:
+            raise ValueError("GPIO broker subscribers can only use pins as inputs")
+        self._pins.add(pin)
+        if pin in self._slots:
+            return
+        self._refresh_slots()
+        if pin in self._slots:
+            return
+        self._socket.sendto(f"add {pin}".encode('ascii'), self._control_path)
+        deadline = time.monotonic() + 1.0
+        while pin not in self._slots:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"GPIO broker did not start publishing pin {pin}")
+            time.sleep(0.01)
+            self._refresh_slots()
+
+    def getcfg(self, pin: int) -> int:
+        return self.INPUT
+
+    def pullup(self, pin: int, mode: int) -> None:
+        """The broker configures pulls; nothing to do."""
+
+    def input(self, pin: int) -> int:
+        """Latest sampled state of a pin (HIGH while the broker is unavailable)."""
+        try:
+            if not self._check_broker():
+                return self.HIGH
+            slot = self._slots.get(pin)
+            if slot is None:
+                self.setcfg(pin, self.INPUT)
+                slot = self._slots[pin]
+            return self._state.pin_state(slot)
+        except (RuntimeError, OSError) as e:
+            self._unavailable(e)
+            return self.HIGH
+
+    def states(self) -> Tuple[float, Dict[int, int]]:
+        """(sample time, pin -> state) for all published pins."""
+        self._check_broker()
+        pins = self._state.pins()
+        return self._state.header()[1], {pin: state for pin, state, _ in pins}
+
+    def edges(self) -> List[Edge]:
+        """Edges since the previous call, oldest first, as (time, pin, state)."""
+        self._check_broker()
+        edges, self._edge_count, lost = self._state.edges_since(self._edge_count)
+        if lost:
+            print(f"[Broker] Subscriber fell behind; {lost} edges lost")
+        return edges
+
+    def fileno(self) -> int:
+        """Readable whenever the broker published an edge (for select/poll)."""
+        return self._socket.fileno()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep until the broker reports an edge; returns False on timeout."""
+        readable, _, _ = select.select([self._socket], [], [], timeout)
+        if not readable:
+            return False
+        while True:
+            try:
+                self._socket.recv(64)
+            except (BlockingIOError, InterruptedError):
+                return True
+
+    def cleanup(self) -> None:
+        """Unsubscribe and release the shared state."""
+        try:
+            self._socket.sendto(b'unsub', self._control_path)
+        except OSError:
+            pass
+        self._socket.close()
+        self._state.close()
+
+class SimulatedGPIO:
+    """Stand-in for pyA64's gpio module: every pin reads released (HIGH)."""
+
+    INPUT = 0
+    PULLUP = 1
+
+    def init(self) -> None: pass
+    def setcfg(self, pin: int, mode: int) -> None: pass
+    def pullup(self, pin: int, mode: int) -> None: pass
+    def input(self, pin: int) -> int: return 1
+
+def broker_running(control_path: str = DEFAULT_CONTROL_PATH) -> bool:
+    """Check whether a broker is listening on its control socket."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.connect(control_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+def open_gpio(shm_path: str = DEFAULT_SHM_PATH, control_path: str = DEFAULT_CONTROL_PATH) -> Any:
+    """Return a GPIOSubscriber if a broker is running, else pyA64's gpio module.
+
+    Raises ImportError when there is no broker and pyA64 is not installed.
+    """
+    if broker_running(control_path):
+        try:
+            subscriber = GPIOSubscriber(shm_path, control_path)
+            print("[Broker] Using shared GPIO states from the broker")
+            return subscriber
+        except (OSError, ValueError) as e:
+            print(f"[Broker] Broker found but unusable ({e}); accessing GPIO directly")
+    from pyA64.gpio import gpio
+    return gpio
+
+def _config_pins(config_path: str) -> List[int]:
+    """Pins of the buttons in an engine config file."""
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    return [button['value'] for button in config.get('buttons', {}).values()]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Share GPIO pin states with multiple processes.")
+    parser.add_argument("--config", action="append", default=[],
+                        help="Engine config whose button pins to publish (repeatable)")
+    parser.add_argument("--pins", type=int, nargs='*', default=[], help="Additional pins to publish")
+    parser.add_argument("--allow", type=int, nargs='*', default=[],
+                        help="Pins subscribers may add on request besides the published ones")
+    parser.add_argument("--interval", type=float, default=0.01, help="Sampling interval in seconds (default: 0.01)")
+    parser.add_argument("--shm", default=DEFAULT_SHM_PATH, help=f"Shared state file (default: {DEFAULT_SHM_PATH})")
+    parser.add_argument("--control", default=DEFAULT_CONTROL_PATH,
+                        help=f"Control socket (default: {DEFAULT_CONTROL_PATH})")
+    parser.add_argument("--simulate", action="store_true", help="Use the simulated GPIO instead of pyA64")
+    args = parser.parse_args()
+
+    pins = list(args.pins)
+    for config_path in args.config:
+        pins.extend(_config_pins(config_path))
+
+    if args.simulate:
+        gpio = SimulatedGPIO()
+    else:
+        try:
+            from pyA64.gpio import gpio
+        except ImportError:
+            print("Error: pyA64 library not found. Use --simulate to run without hardware.")
+            sys.exit(1)
+
+    broker = GPIOBroker(gpio, list(dict.fromkeys(pins)), args.interval, args.shm, args.control, args.allow)
+    try:
+        broker.run()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
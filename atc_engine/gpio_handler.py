@@ -2,11 +2,17 @@
 GPIO Handler Module
 ------------------
 Handles GPIO pin monitoring and initialization.
+
+With the `gpio_broker` setting on (or "auto" while a broker is running), the
+pins are read from the shared GPIO broker instead of the hardware, so several
+programs can watch the same buttons.
 """
 
 import threading
 import time
-from typing import Dict, Any
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Any, Iterator, List, Optional, Set, Tuple
 
 try:
     from pyA64.gpio import gpio
@@ -22,6 +28,9 @@ except ImportError:
         def input(self, pin): return 1
     gpio = MockGPIO()
 
+# A queued control command: (kind, name, monotonic receive time, completion callback)
+InjectedCommand = Tuple[str, str, float, Optional[Callable[[float], None]]]
+
 class GPIOMonitor(threading.Thread):
     """Handles GPIO pin monitoring and initialization."""
 
@@ -30,15 +39,25 @@ class GPIOMonitor(threading.Thread):
         super().__init__(name="GPIOHandlerThread")
         self.daemon = True
         self._shutdown_event = threading.Event()
-        self._lock = threading.Lock()
+        # Set to run a poll tick immediately (shutdown or injected commands)
+        self._wake_event = threading.Event()
+        self._lock = threading.RLock()
+        self._gpio_ready = False
+        # pyA64's gpio module, or a GPIOSubscriber when reading through the broker
+        self._gpio: Any = gpio
+
+        # Control commands waiting for the next tick, and buttons held down by them
+        self._injected: Deque[InjectedCommand] = deque()
+        self._virtual_pressed: Set[str] = set()
+        # Seconds until the queued commands can continue (None when nothing is held back)
+        self._injected_delay: Optional[float] = None
         
         self._config = config
         self._button_manager = button_manager
         self._action_handler = action_handler
         
-        # Extract settings
+        # Extract settings (debouncing is done by the button manager)
         self._poll_interval = float(self._config['settings']['poll_interval'])
-        self._debounce_time = float(self._config['settings']['debounce_time'])
         
         # Map button names to GPIO pins
         self._pin_to_button = {}
@@ -47,28 +66,130 @@ class GPIOMonitor(threading.Thread):
         
         print("[GPIO] Handler initialized")
 
+    def _configure_pin(self, pin: int) -> None:
+        """Configure a single pin as an input with pull-up."""
+        self._gpio.setcfg(pin, self._gpio.INPUT)
+        self._gpio.pullup(pin, self._gpio.PULLUP)
+        print(f"[GPIO] Configured pin {pin} as INPUT with PULLUP")
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Hold off polling while the block runs (e.g. during a config reload)."""
+        with self._lock:
+            yield
+
+    def apply_config(self, new_config: Dict[str, Any], diff: Any) -> None:
+        """Adopt a reloaded config, reconfiguring only pins of changed buttons."""
+        with self._lock:
+            self._config = new_config
+            self._poll_interval = float(new_config['settings']['poll_interval'])
+
+            if not diff.touched('buttons'):
+                return
+            self._pin_to_button = {
+                button_config['value']: button_name
+                for button_name, button_config in new_config['buttons'].items()
+            }
+            if not self._gpio_ready:
+                return
+            added, _, changed = diff.section('buttons')
+            for button_name in added | changed:
+                try:
+                    self._configure_pin(new_config['buttons'][button_name]['value'])
+                except Exception as e:
+                    print(f"[GPIO] Error configuring pin for '{button_name}': {e}")
+
+    def _select_gpio(self) -> Any:
+        """Pick direct pin access or the shared broker, per the `gpio_broker` setting."""
+        use_broker = self._config['settings'].get('gpio_broker', 'auto')
+        if use_broker is False:
+            return gpio
+        from .gpio_broker import GPIOSubscriber, broker_running
+        if use_broker == 'auto' and not broker_running():
+            return gpio
+        print("[GPIO] Reading pins through the GPIO broker")
+        return GPIOSubscriber()
+
     def _init_gpio(self) -> bool:
         """Initialize GPIO hardware."""
         try:
-            gpio.init()
+            self._gpio = self._select_gpio()
+            self._gpio.init()
             for pin in self._pin_to_button.keys():
-                gpio.setcfg(pin, gpio.INPUT)
-                gpio.pullup(pin, gpio.PULLUP)
-                print(f"[GPIO] Configured pin {pin} as INPUT with PULLUP")
+                self._configure_pin(pin)
+            self._gpio_ready = True
             return True
         except Exception as e:
             print(f"[GPIO] Error initializing GPIO: {e}")
             return False
 
+    def inject(self, commands: List[Tuple[str, str]], received: float,
+               done: Optional[Callable[[float], None]] = None) -> None:
+        """Queue control commands to be applied on the next tick, which runs immediately.
+
+        Commands are ('press' | 'release', button) or ('media' | 'action', name).
+        done(latency) is called for each command once it has been applied.
+        """
+        # deque.append is thread-safe; the GPIO thread drains the queue under its lock
+        for kind, name in commands:
+            self._injected.append((kind, name, received, done))
+        self._wake_event.set()
+
+    def _apply_injected(self) -> List[InjectedCommand]:
+        """Apply queued press/release commands as virtual button states.
+
+        Each injected level is held until the button manager would accept
+        the next edge (at least debounce_time), so a press and release sent
+        in one batch are not swallowed as a bounce. The rest of the queue
+        waits, and the poll loop wakes again when the hold is over.
+        """
+        applied: List[InjectedCommand] = []
+        edged: Set[str] = set()
+        while self._injected:
+            command = self._injected[0]
+            kind, name = command[0], command[1]
+            if kind in ('press', 'release'):
+                if name in edged:
+                    # Applied next tick, once this tick has fed the first edge to the button manager
+                    self._injected_delay = 0.0
+                    break
+                if name not in self._config['buttons']:
+                    print(f"[GPIO] Ignoring control command for unknown button '{name}'")
+                else:
+                    delay = self._button_manager.edge_settle_time(name)
+                    if delay > 0:
+                        self._injected_delay = delay
+                        break
+                    edged.add(name)
+                    if kind == 'press':
+                        self._virtual_pressed.add(name)
+                    else:
+                        self._virtual_pressed.discard(name)
+            applied.append(self._injected.popleft())
+        return applied
+
+    def _edge_accepted(self, kind: str, name: str) -> bool:
+        """True if an injected press/release is now the button's debounced level."""
+        if kind not in ('press', 'release'):
+            return True
+        if name not in self._config['buttons']:
+            return False
+        return self._button_manager.is_button_pressed(name) == (kind == 'press')
+
     def _handle_pin_states(self) -> None:
         """Process current GPIO pin states and update button manager."""
         current_time = time.monotonic()
+        self._injected_delay = None
+        injected = self._apply_injected() if self._injected else []
 
         # Read all configured pins
         for pin, button_name in self._pin_to_button.items():
             try:
                 # Read current pin state
-                current_state = gpio.input(pin)
+                current_state = self._gpio.input(pin)
+                # Buttons held through the control socket read as pressed
+                if button_name in self._virtual_pressed:
+                    current_state = 0
                 
                 # Update button manager with new state
                 # Note: LOW (0) means pressed, HIGH (1) means released
@@ -80,16 +201,34 @@ class GPIOMonitor(threading.Thread):
         # Get current button states from manager
         button_state = {
             "pressed_buttons": self._button_manager.get_pressed_buttons(),
-            "active_combinations": self._button_manager.get_active_combinations()
+            "active_combinations": self._button_manager.get_active_combinations(),
+            "active_layer": self._button_manager.active_layer,
+            "gestures": self._button_manager.poll_gestures(),
         }
         
         # Update action handler with current state
         self._action_handler.handle_button_state(button_state)
 
+        for kind, name, received, done in injected:
+            if kind == 'media':
+                if name in self._config['media']:
+                    self._action_handler.trigger_media(name)
+                else:
+                    print(f"[GPIO] Ignoring control command for unknown media '{name}'")
+            elif kind == 'action':
+                if name in self._config['actions']:
+                    self._action_handler.trigger_action(name)
+                else:
+                    print(f"[GPIO] Ignoring control command for unknown action '{name}'")
+            # Latency is only recorded for edges the button manager accepted
+            if done and self._edge_accepted(kind, name):
+                done(time.monotonic() - received)
+
     def stop(self) -> None:
         """Signal the thread to stop and cleanup resources."""
         print("[GPIO] Stop requested")
         self._shutdown_event.set()
+        self._wake_event.set()
         
         # Clean up handlers
         if self._action_handler:
@@ -104,8 +243,16 @@ class GPIOMonitor(threading.Thread):
             return
 
         while not self._shutdown_event.is_set():
+            # Cleared before the tick so commands injected during it wake the next one
+            self._wake_event.clear()
             with self._lock:
                 self._handle_pin_states()
-            self._shutdown_event.wait(timeout=self._poll_interval)
+            timeout = self._poll_interval
+            if self._injected_delay is not None:
+                timeout = min(timeout, self._injected_delay)
+            self._wake_event.wait(timeout=timeout)
 
+        # A GPIOSubscriber (pyA64's module needs no cleanup)
+        if self._gpio is not gpio:
+            self._gpio.cleanup()
         print("[GPIO] Thread finished")
\ No newline at end of file
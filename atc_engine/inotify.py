@@ -0,0 +1,124 @@
+"""
+Inotify Module
+------------
+Minimal ctypes wrapper around the Linux inotify API.
+
+Used to watch config files and media folders without polling. Callers should
+check inotify_available() and fall back to mtime polling where it is not.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+from typing import List, Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+def _get_libc() -> Optional[ctypes.CDLL]:
+    """Load libc with the inotify entry points, or return None."""
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            getattr(libc, 'inotify_init1')  # AttributeError on systems without inotify
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+def inotify_available() -> bool:
+    """Check whether inotify can be used on this system."""
+    return _get_libc() is not None
+
+class InotifyEvent:
+    """A single inotify event."""
+
+    __slots__ = ('wd', 'mask', 'cookie', 'name')
+
+    def __init__(self, wd: int, mask: int, cookie: int, name: str):
+        self.wd = wd
+        self.mask = mask
+        self.cookie = cookie
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"InotifyEvent(wd={self.wd}, mask={self.mask:#x}, name={self.name!r})"
+
+class Inotify:
+    """An inotify instance with its watches."""
+
+    def __init__(self):
+        self._libc = _get_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def fileno(self) -> int:
+        """File descriptor, for use with select/poll."""
+        return self._fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """Watch a path for the events in mask; returns the watch descriptor."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        """Remove a watch (ignores watches the kernel already dropped)."""
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read_events(self, timeout: Optional[float] = None) -> List[InotifyEvent]:
+        """Wait up to timeout seconds for events and return them (empty on timeout)."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+            events.append(InotifyEvent(wd, mask, cookie, name))
+        return events
+
+    def close(self) -> None:
+        """Close the inotify instance and all its watches."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def split_watch_target(path: str) -> Tuple[str, str]:
+    """Return (directory, filename) to watch for a file, so renames are seen."""
+    path = os.path.abspath(path)
+    return os.path.dirname(path), os.path.basename(path)
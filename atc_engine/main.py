@@ -4,13 +4,39 @@ ATC Engine - Main Entry Point
 Initializes and runs the application.
 """
 
+import argparse
 import os
-from atc_engine.app import Application
+import sys
+from atc_engine.startup_profile import profiler
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
 
 def main():
     """Main entry point for the ATC Engine application."""
-    config_path = os.path.join(os.path.dirname(__file__), "config.json")
-    app = Application(config_path)
+    parser = argparse.ArgumentParser(description="GPIO button driven media engine.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH,
+                        help="Path to the configuration JSON file")
+    parser.add_argument("--build-snapshot", action="store_true",
+                        help="Validate the config, write its compiled snapshot and exit")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print per-phase import and init times once the first frame is shown")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profiler.enable()
+
+    if args.build_snapshot:
+        from atc_engine.config_snapshot import build_snapshot
+        try:
+            build_snapshot(args.config)
+        except Exception as e:
+            print(f"[App] Failed to build snapshot: {e}")
+            sys.exit(1)
+        return
+
+    with profiler.phase('import application'):
+        from atc_engine.app import Application
+    app = Application(args.config)
     
     try:
         app.run()
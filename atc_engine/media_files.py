@@ -0,0 +1,22 @@
+"""
+Media Files Module
+----------------
+Discovery of the image files in a folder.
+
+Shared by the renderers and by the modules that index, store and derive
+images, none of which should need the renderer backends to list a folder.
+"""
+
+import glob
+import os
+from typing import List
+
+IMAGE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp')
+
+def find_images(folder_path: str) -> List[str]:
+    """Find image files in a folder, sorted by path."""
+    files = []
+    for ext in IMAGE_EXTENSIONS:
+        files.extend(glob.glob(os.path.join(folder_path, ext)))
+    files.sort()
+    return files
@@ -0,0 +1,182 @@
+"""
+Media Index Module
+----------------
+Preflight of configured media and a persistent index of image metadata.
+
+At config load every image referenced by the config (including the images
+inside `slide` folders) has its header read in a thread pool. Dimensions,
+format, frame count and a decode cost estimate are stored in a small SQLite
+database keyed by path and mtime, so broken files are reported up front,
+renderers can plan scaling without opening files, and later boots only
+re-scan files that changed. Rows of files no longer referenced are pruned
+after each preflight, so the index tracks the current media set.
+
+The engine runs the preflight in the background; until it finishes,
+renderers treat unknown images as readable.
+"""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from .config_loader import get_cache_dir, stat_paths
+from .media_files import find_images
+
+PREFLIGHT_WORKERS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    format TEXT,
+    width INTEGER,
+    height INTEGER,
+    frames INTEGER,
+    decode_cost REAL,
+    error TEXT
+)
+"""
+
+class MediaInfo(NamedTuple):
+    """Header metadata of one image file."""
+    path: str
+    mtime_ns: int
+    size: int
+    format: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    frames: Optional[int]
+    # Estimated decode work in megapixels (all frames, before scaling)
+    decode_cost: Optional[float]
+    # Set when the file could not be identified as an image
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def read_media_info(path: str, mtime_ns: int) -> MediaInfo:
+    """Read an image's header (and frame count for animations) without decoding pixels."""
+    from PIL import Image
+
+    size = 0
+    try:
+        size = os.path.getsize(path)
+        with Image.open(path) as image:
+            width, height = image.size
+            # n_frames walks the frame headers of animated formats only
+            frames = getattr(image, 'n_frames', 1)
+            image_format = image.format
+    except Exception as e:
+        return MediaInfo(path, mtime_ns, size, None, None, None, None, None, str(e) or type(e).__name__)
+    decode_cost = width * height * frames / 1e6
+    return MediaInfo(path, mtime_ns, size, image_format, width, height, frames, decode_cost, None)
+
+def collect_media_files(config: Dict[str, Any]) -> List[str]:
+    """All image files referenced by a config: still/flash paths and slide folder contents."""
+    files: List[str] = []
+    for media_config in config['media'].values():
+        mode, path = media_config['mode'], media_config['path']
+        if mode == 'slide' and os.path.isdir(path):
+            files.extend(find_images(path))
+        elif mode in ('still', 'flash', 'slide'):
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+def collect_media_paths(config: Dict[str, Any], media_store: Optional[Any] = None) -> List[str]:
+    """collect_media_files(), resolved through a media store if one is given."""
+    files = collect_media_files(config)
+    if media_store is None:
+        return files
+    return list(dict.fromkeys(media_store.resolve_all(files)))
+
+class MediaIndex:
+    """SQLite-backed index of image metadata, keyed by path and mtime."""
+
+    def __init__(self, db_path: str):
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[MediaInfo]:
+        """Indexed metadata of a file, or None if unknown or the file changed since."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM media WHERE path = ? AND mtime_ns = ?", (path, mtime_ns)
+            ).fetchone()
+        return MediaInfo(*row) if row else None
+
+    def preflight(self, paths: Iterable[str], workers: int = PREFLIGHT_WORKERS) -> Dict[str, MediaInfo]:
+        """Index every path, reading headers only for files that are new or changed.
+
+        Rows of files not in paths (or gone) are deleted afterwards. Returns
+        the metadata of every existing path; missing files are skipped.
+        """
+        mtimes = stat_paths(paths)
+        with self._lock:
+            known = {
+                row[0]: MediaInfo(*row)
+                for row in self._conn.execute("SELECT * FROM media")
+            }
+
+        results: Dict[str, MediaInfo] = {}
+        stale = []
+        for path, mtime_ns in mtimes.items():
+            if mtime_ns is None:
+                continue
+            info = known.get(path)
+            if info is not None and info.mtime_ns == mtime_ns:
+                results[path] = info
+            else:
+                stale.append((path, mtime_ns))
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                scanned = list(executor.map(lambda item: read_media_info(*item), stale))
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", scanned
+                )
+                self._conn.commit()
+            for info in scanned:
+                results[info.path] = info
+
+        pruned = [(path,) for path in known if mtimes.get(path) is None]
+        if pruned:
+            with self._lock:
+                self._conn.executemany("DELETE FROM media WHERE path = ?", pruned)
+                self._conn.commit()
+
+        print(f"[MediaIndex] Preflight: {len(results)} files, {len(stale)} scanned, "
+              f"{len(results) - len(stale)} unchanged, {len(pruned)} pruned")
+        return results
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+def open_media_index(settings: Dict[str, Any]) -> Optional[MediaIndex]:
+    """Open the media index in the configured cache dir (run preflight() to fill it).
+
+    Returns None (after printing why) if Pillow is missing or the index cannot be opened.
+    """
+    from .framebuffer import pillow_available
+
+    if not pillow_available():
+        print("[MediaIndex] Pillow not installed; skipping media preflight")
+        return None
+    try:
+        return MediaIndex(os.path.join(get_cache_dir(settings), 'media_index.sqlite'))
+    except (OSError, sqlite3.Error) as e:
+        print(f"[MediaIndex] Cannot open media index: {e}")
+        return None
@@ -0,0 +1,298 @@
+"""
+Media Store Module
+----------------
+Content-addressed storage of the images referenced by a config.
+
+Every file is hashed (SHA-256) once and stored as objects/<xx>/<digest><ext>
+under the store directory, so an image copied into several folders is kept
+once. A SQLite manifest maps each source path, with its mtime and size, to
+its object; resolve() turns a configured path into the object path with one
+stat and one lookup. Players, renderers and the derived caches (media
+index, frame cache, decoded-image memos), which are all keyed by path,
+then see one file per unique image: one page-cache copy, one cache entry.
+
+Ingesting only hashes files that are new or changed since the last run.
+The engine ingests in the background; until a file is stored, resolve()
+returns its source path, so renderers show the source meanwhile.
+Sources are left alone unless dedupe is requested, which replaces each
+source with a hard link to its object to reclaim the duplicated storage.
+Linked files share their content and are read-only: replace such a file
+(write a new file and rename it over the old one) rather than editing it.
+
+Ingest the media of a config, or image folders, with:
+    python -m atc_engine.media_store --config atc_engine/config.json
+    python -m atc_engine.media_store --store /var/lib/atc_media --dedupe gpio_slideshow/image_sets/*
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .config_loader import stat_paths
+
+# hashlib releases the GIL while hashing, so a few threads keep the storage busy
+INGEST_WORKERS = 4
+_CHUNK_SIZE = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    digest TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+class IngestResult(NamedTuple):
+    """Outcome of one ingest() call."""
+    # source path -> object path, for every source that could be stored
+    objects: Dict[str, str]
+    # Files hashed because they were new or changed
+    hashed: int
+    # Objects added to the store
+    added: int
+    # Bytes held by duplicate sources (sum of each object's size beyond its first copy)
+    duplicate_bytes: int
+    # Sources replaced by hard links to their objects
+    linked: int
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, as hex."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _hash_source(path: str) -> Optional[Tuple[str, int, int, str]]:
+    """(path, mtime_ns, size, digest) of a file, stat'ed before reading; None if unreadable."""
+    try:
+        st = os.stat(path)
+        return path, st.st_mtime_ns, st.st_size, file_digest(path)
+    except OSError as e:
+        print(f"[MediaStore] Cannot read {path}: {e}")
+        return None
+
+class MediaStore:
+    """Content-addressed object directory with a manifest of the sources stored in it."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._objects_dir = os.path.join(root, 'objects')
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, 'manifest.sqlite'), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _object_path(self, name: str) -> str:
+        return os.path.join(self._objects_dir, name[:2], name)
+
+    def resolve(self, path: str) -> str:
+        """The object holding a file's current content, or the path itself if it is not stored."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return path
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT objects.name FROM files JOIN objects USING (digest)"
+                " WHERE files.path = ? AND files.mtime_ns = ? AND files.size = ?",
+                (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+            ).fetchone()
+        return self._object_path(row[0]) if row else path
+
+    def resolve_all(self, paths: Iterable[str]) -> List[str]:
+        """resolve() for each path, in order."""
+        return [self.resolve(path) for path in paths]
+
+    def _store_object(self, source: str, digest: str) -> Optional[str]:
+        """Put a source's content in the store as a new object; returns its name."""
+        name = digest + os.path.splitext(source)[1].lower()
+        object_path = self._object_path(name)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        # Unique per call: several threads may store the same new content at once
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix=name + '.', dir=os.path.dirname(object_path))
+        try:
+            os.close(fd)
+            shutil.copyfile(source, temp_path)
+            # The copy must still be the content that was hashed
+            if file_digest(temp_path) != digest:
+                print(f"[MediaStore] {source} changed while being stored; skipping")
+                os.remove(temp_path)
+                return None
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, object_path)
+        except OSError as e:
+            print(f"[MediaStore] Cannot store {source}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return None
+        return name
+
+    def _link_source(self, source: str, object_path: str) -> bool:
+        """Replace a source with a hard link to its object; False if it already is one or cannot be."""
+        try:
+            if os.path.samefile(source, object_path):
+                return False
+            temp_path = f"{source}.{os.getpid()}.{threading.get_ident()}.link"
+            os.link(object_path, temp_path)
+            os.replace(temp_path, source)
+        except OSError as e:
+            print(f"[MediaStore] Cannot link {source} to the store: {e}")
+            return False
+        return True
+
+    def ingest(self, paths: Iterable[str], dedupe: bool = False,
+               workers: int = INGEST_WORKERS) -> IngestResult:
+        """Store the content of every file, hashing only files that are new or changed.
+
+        With dedupe, each source is replaced by a hard link to its object
+        (the store must be on the same filesystem as the sources).
+        """
+        sources = [os.path.abspath(path) for path in paths]
+        mtimes = stat_paths(sources)
+        with self._lock:
+            known = {
+                row[0]: row[1:]
+                for row in self._conn.execute("SELECT path, mtime_ns, size, digest FROM files")
+            }
+            objects = {row[0]: (row[1], row[2]) for row in self._conn.execute("SELECT * FROM objects")}
+
+        digests: Dict[str, str] = {}
+        stale = []
+        for path, mtime_ns in mtimes.items():
+            if mtime_ns is None or not os.path.isfile(path):
+                continue
+            entry = known.get(path)
+            if (entry is not None and entry[0] == mtime_ns and entry[1] == os.path.getsize(path)
+                    and entry[2] in objects and os.path.exists(self._object_path(objects[entry[2]][0]))):
+                digests[path] = entry[2]
+            else:
+                stale.append(path)
+
+        hashed = []
+        if stale:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                hashed = [row for row in executor.map(_hash_source, stale) if row is not None]
+        for path, _, _, digest in hashed:
+            digests[path] = digest
+
+        added = []
+        for path, _, size, digest in hashed:
+            if digest in objects and os.path.exists(self._object_path(objects[digest][0])):
+                continue
+            name = self._store_object(path, digest)
+            if name is None:
+                del digests[path]
+                continue
+            objects[digest] = (name, size)
+            added.append((digest, name, size))
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?)", added)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                [row for row in hashed if row[0] in digests]
+            )
+            self._conn.commit()
+
+        result = {path: self._object_path(objects[digest][0]) for path, digest in digests.items()}
+        linked = 0
+        if dedupe:
+            for path, object_path in result.items():
+                if self._link_source(path, object_path):
+                    linked += 1
+            if linked:
+                # Linked sources take the object's mtime; record it so they still resolve
+                rows = []
+                for path, digest in digests.items():
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    rows.append((path, st.st_mtime_ns, st.st_size, digest))
+                with self._lock:
+                    self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows)
+                    self._conn.commit()
+
+        copies: Dict[str, int] = {}
+        for digest in digests.values():
+            copies[digest] = copies.get(digest, 0) + 1
+        duplicate_bytes = sum((count - 1) * objects[digest][1] for digest, count in copies.items())
+
+        print(f"[MediaStore] Ingested {len(result)} files: {len(copies)} unique, {len(hashed)} hashed, "
+              f"{len(added)} stored, {duplicate_bytes / 1e6:.1f} MB in duplicates"
+              + (f", {linked} linked" if dedupe else ''))
+        return IngestResult(result, len(hashed), len(added), duplicate_bytes, linked)
+
+    def close(self) -> None:
+        """Close the manifest."""
+        with self._lock:
+            self._conn.close()
+
+def open_media_store(settings: Dict[str, Any]) -> Optional[MediaStore]:
+    """Open the store named by the `media_store` setting (run ingest() to fill it).
+
+    Returns None if no store is configured or it cannot be opened.
+    """
+    root = settings.get('media_store')
+    if not root:
+        return None
+    try:
+        return MediaStore(root)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[MediaStore] Cannot open media store {root}: {e}")
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Store media by content, keeping one copy of each image.")
+    parser.add_argument("paths", nargs='*', help="Image files or folders to ingest (default: the config's media)")
+    parser.add_argument("--config", default='atc_engine/config.json', help="Engine config whose media to ingest")
+    parser.add_argument("--store", help="Store directory (default: the config's media_store setting)")
+    parser.add_argument("--dedupe", action='store_true',
+                        help="Replace each source with a hard link to its stored object")
+    args = parser.parse_args()
+
+    from .media_files import find_images
+
+    root = args.store
+    paths: List[str] = []
+    for path in args.paths:
+        paths.extend(find_images(path) if os.path.isdir(path) else [path])
+    if root is None or not args.paths:
+        from .config_loader import load_config
+        from .media_index import collect_media_files
+        config = load_config(args.config)
+        root = root or config['settings'].get('media_store')
+        if not args.paths:
+            paths = collect_media_files(config)
+    if not root:
+        print("Error: no store directory (pass --store or set 'media_store' in the config)")
+        sys.exit(1)
+
+    store = MediaStore(root)
+    try:
+        store.ingest(paths, dedupe=args.dedupe)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,787 @@
+"""
+Renderer Module
+-------------
+One interface for every way this project puts an image on screen.
+
+Each backend (feh, mpv, pygame, tkinter, framebuffer) is wrapped in an
+adapter exposing show, slideshow, flash, scroll and stop. A probe times each
+available backend's switch latency and memory use on the current machine and
+picks the fastest backend for every media mode.
+"""
+
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config_loader import get_cache_dir
+from .event_journal import journal
+from .media_files import find_images
+
+MEDIA_MODES = ('still', 'slide', 'flash', 'scroll_text')
+
+# Flash timing shared by all backends (matches image_flash.py)
+FLASH_DUTY_CYCLE = 0.75
+FLASH_PERIOD = 1.0
+
+# Screen-fitted images kept per in-process backend
+IMAGE_CACHE_SIZE = 16
+
+def read_text_lines(path: str) -> List[str]:
+    """Read the lines of a scroll text file, never returning an empty list."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        print(f"[Renderer] Error reading text file {path}: {e}")
+        lines = []
+    return lines or [" "]
+
+class ImageCache:
+    """Decoded images by path, dropping the least recently used beyond a cap."""
+
+    def __init__(self, size: int = IMAGE_CACHE_SIZE):
+        self._size = size
+        self._items: 'OrderedDict[str, Any]' = OrderedDict()
+
+    def get(self, path: str, load: Callable[[str], Any]) -> Any:
+        """The cached image for a path, loading (and possibly evicting) on a miss."""
+        if path in self._items:
+            self._items.move_to_end(path)
+            return self._items[path]
+        item = self._items[path] = load(path)
+        if len(self._items) > self._size:
+            self._items.popitem(last=False)
+        return item
+
+def _read_rss_kb(pid: Optional[int] = None) -> int:
+    """Resident set size of a process in kB (0 if unavailable)."""
+    status_path = f"/proc/{pid if pid else 'self'}/status"
+    try:
+        with open(status_path, 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+def _read_proc_cpu(pid: int) -> Optional[Tuple[str, int]]:
+    """Return (state, utime+stime) for a process, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return fields[0], int(fields[11]) + int(fields[12])
+    except (OSError, IndexError, ValueError):
+        return None
+
+class Renderer:
+    """Base class for display backends."""
+
+    name = 'base'
+    modes: Tuple[str, ...] = ()
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self._settings = settings or {}
+        self._lock = threading.Lock()
+        # Optional MediaIndex used to skip images known to be unreadable
+        self.media_index: Optional[Any] = None
+        # Optional MediaStore resolving paths to one stored copy per unique image
+        self.media_store: Optional[Any] = None
+        # Optional DerivativeCache supplying display-resolution copies of large images
+        self.derivatives: Optional[Any] = None
+        # Slide folder -> (folder mtime, resolved images), until media_changed() or the folder changes
+        self._folder_listings: Dict[str, Tuple[Optional[int], List[str]]] = {}
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Check whether this backend can run on the current machine."""
+        return False
+
+    def supports(self, mode: str) -> bool:
+        """Check whether this backend can display the given media mode."""
+        return mode in self.modes
+
+    def _filter_readable(self, paths: List[str]) -> List[str]:
+        """Drop images the media index has recorded as unreadable."""
+        if self.media_index is None:
+            return paths
+        readable = []
+        for path in paths:
+            info = self.media_index.get(path)
+            if info is not None and not info.ok:
+                print(f"[Renderer] Skipping unreadable image {path}: {info.error}")
+            else:
+                readable.append(path)
+        return readable
+
+    def _folder_images(self, folder_path: str) -> List[str]:
+        """The readable images of a slide folder, resolved through the media store and derivatives.
+
+        The listing is cached until the folder's mtime changes or media_changed() is called.
+        """
+        try:
+            mtime_ns: Optional[int] = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        cached = self._folder_listings.get(folder_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        images = find_images(folder_path)
+        if self.media_store is not None:
+            images = self.media_store.resolve_all(images)
+        images = self._filter_readable(images)
+        if self.derivatives is not None:
+            images = self.derivatives.resolve_all(images)
+        self._folder_listings[folder_path] = (mtime_ns, images)
+        return images
+
+    def media_changed(self) -> None:
+        """Forget cached folder listings (after an ingest, preflight or derivative build)."""
+        self._folder_listings = {}
+
+    def play(self, mode: str, path: str) -> bool:
+        """Display media in the given mode."""
+        if mode in ('still', 'flash'):
+            if self.media_store is not None:
+                path = self.media_store.resolve(path)
+            if not self._filter_readable([path]):
+                return False
+            if self.derivatives is not None:
+                path = self.derivatives.resolve(path)
+        if mode == 'still':
+            return self.show(path)
+        if mode == 'slide':
+            return self.slideshow(path, self._settings.get('slide_delay', 3))
+        if mode == 'flash':
+            return self.flash(path)
+        if mode == 'scroll_text':
+            return self.scroll(path)
+        print(f"[Renderer] Unknown media mode: {mode}")
+        return False
+
+    def show(self, path: str) -> bool:
+        """Show a single image until stopped."""
+        raise NotImplementedError
+
+    def slideshow(self, folder_path: str, delay: float) -> bool:
+        """Cycle through the images in a folder until stopped."""
+        raise NotImplementedError
+
+    def flash(self, path: str) -> bool:
+        """Flash a single image on and off until stopped."""
+        raise NotImplementedError
+
+    def scroll(self, path: str) -> bool:
+        """Scroll the lines of a text file across the screen."""
+        raise NotImplementedError
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        """Block until the last requested media is on screen."""
+        return True
+
+    def memory_kb(self) -> int:
+        """Memory attributable to this backend (0 if unknown)."""
+        return 0
+
+    def stop(self) -> None:
+        """Stop displaying the current media."""
+
+    def close(self) -> None:
+        """Release all resources held by the backend."""
+        self.stop()
+
+class ProcessRenderer(Renderer):
+    """Base for backends that display media in an external player process."""
+
+    executable = ''
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        super().__init__(settings)
+        self._process: Optional[subprocess.Popen] = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return shutil.which(cls.executable) is not None
+
+    def _launch(self, args: List[str]) -> bool:
+        """Replace the running player process with a new one."""
+        with self._lock:
+            # Exit status of a previous player that quit (or crashed) on its own
+            previous_returncode = self._process.poll() if self._process else None
+            self._terminate()
+            command = [self.executable] + args
+            try:
+                self._process = subprocess.Popen(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                print(f"[Renderer] Started {self.name} (PID: {self._process.pid})")
+                journal.player(self.name, self._process.pid, previous_returncode)
+                return True
+            except (FileNotFoundError, OSError) as e:
+                print(f"[Renderer] Error starting {self.name}: {e}")
+                journal.player(self.name, 0)
+                self._process = None
+                return False
+
+    def _terminate(self) -> None:
+        """Terminate the player process, killing it if it does not exit."""
+        process = self._process
+        self._process = None
+        if not process or process.poll() is not None:
+            return
+        try:
+            process.terminate()
+            process.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            print(f"[Renderer] {self.name} did not terminate gracefully, killing...")
+            process.kill()
+            process.wait()
+        except Exception as e:
+            print(f"[Renderer] Error stopping {self.name}: {e}")
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        """Wait until the player has gone idle, as an approximation of "drawn".
+
+        External players give no readiness signal, so this polls /proc every
+        10 ms until the process sleeps with unchanged CPU time. The result is
+        approximate: it can return early if the player idles before the
+        frame is presented (e.g. waiting on the compositor), and late by up
+        to one polling interval. Probe latencies of process backends carry
+        that error.
+        """
+        process = self._process
+        if not process:
+            return False
+        deadline = time.monotonic() + timeout
+        last_cpu = None
+        while time.monotonic() < deadline:
+            sample = _read_proc_cpu(process.pid)
+            if sample is None or process.poll() is not None:
+                return False
+            state, cpu = sample
+            if state == 'S' and cpu == last_cpu:
+                return True
+            last_cpu = cpu
+            time.sleep(0.01)
+        return False
+
+    def memory_kb(self) -> int:
+        return _read_rss_kb(self._process.pid) if self._process else 0
+
+    def stop(self) -> None:
+        with self._lock:
+            self._terminate()
+
+class FehRenderer(ProcessRenderer):
+    """Displays stills and slideshows with feh."""
+
+    name = 'feh'
+    executable = 'feh'
+    modes = ('still', 'slide')
+    _base_args = ['--fullscreen', '--auto-zoom', '--hide-pointer', '--borderless',
+                  '--quiet', '--image-bg', 'black']
+
+    def show(self, path: str) -> bool:
+        return self._launch(self._base_args + [path])
+
+    def slideshow(self, folder_path: str, delay: float) -> bool:
+        images = self._folder_images(folder_path)
+        if not images:
+            print(f"[Renderer] No images found in {folder_path}")
+            return False
+        return self._launch(self._base_args + ['--slideshow-delay', str(delay)] + images)
+
+class MpvRenderer(ProcessRenderer):
+    """Displays stills, animated GIFs and slideshows with mpv."""
+
+    name = 'mpv'
+    executable = 'mpv'
+    modes = ('still', 'slide')
+    _base_args = ['--fs', '--no-osc', '--really-quiet']
+
+    def show(self, path: str) -> bool:
+        extra = ['--hwdec=auto', '--framedrop=vo'] if path.lower().endswith('.gif') else []
+        return self._launch(self._base_args + extra + ['--loop-file=inf', path])
+
+    def slideshow(self, folder_path: str, delay: float) -> bool:
+        images = self._folder_images(folder_path)
+        if not images:
+            print(f"[Renderer] No images found in {folder_path}")
+            return False
+        return self._launch(self._base_args + [f'--image-display-duration={delay}', '--loop-playlist=inf'] + images)
+
+class ThreadRenderer(Renderer):
+    """Base for in-process backends whose display must be driven from one thread.
+
+    Commands are queued to a render thread that owns the display. Subclasses
+    implement _open, _draw (one frame of the current program) and _close.
+    """
+
+    # Seconds between redraws while a program animates
+    frame_interval = 1.0 / 60
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        super().__init__(settings)
+        self._commands: "queue.Queue[Optional[Tuple[int, Tuple[str, Tuple]]]]" = queue.Queue()
+        self._drawn = threading.Condition()
+        self._submitted_seq = 0
+        self._drawn_seq = 0
+        self._thread: Optional[threading.Thread] = None
+        self._program: Optional[Tuple[str, Tuple]] = None
+        self._program_start = 0.0
+
+    def _submit(self, command: str, *args: Any, start: bool = True) -> bool:
+        """Queue a program for the render thread, starting the thread if needed."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if not start:
+                    return False
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}RenderThread", daemon=True)
+                self._thread.start()
+                journal.player(self.name, os.getpid())
+            self._submitted_seq += 1
+            self._commands.put((self._submitted_seq, (command, args)))
+        return True
+
+    def show(self, path: str) -> bool:
+        return self._submit('still', path)
+
+    def slideshow(self, folder_path: str, delay: float) -> bool:
+        images = self._folder_images(folder_path)
+        if not images:
+            print(f"[Renderer] No images found in {folder_path}")
+            return False
+        return self._submit('slide', images, delay)
+
+    def flash(self, path: str) -> bool:
+        return self._submit('flash', path)
+
+    def scroll(self, path: str) -> bool:
+        return self._submit('scroll_text', read_text_lines(path))
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        target = self._submitted_seq
+        with self._drawn:
+            return self._drawn.wait_for(lambda: self._drawn_seq >= target, timeout)
+
+    def memory_kb(self) -> int:
+        # In-process backends share the engine's address space; report the whole process
+        return _read_rss_kb()
+
+    def stop(self) -> None:
+        self._submit('blank', start=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                self._commands.put(None)
+                self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _open(self) -> None:
+        """Open the display (called on the render thread)."""
+        raise NotImplementedError
+
+    def _draw(self, program: Tuple[str, Tuple], elapsed: float) -> bool:
+        """Draw one frame of a program; return True if it needs further frames."""
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        """Close the display (called on the render thread)."""
+
+    def _run(self) -> None:
+        """Render thread loop: apply queued programs and animate the current one."""
+        try:
+            self._open()
+        except Exception as e:
+            print(f"[Renderer] Error opening {self.name} display: {e}")
+            return
+
+        animating = False
+        seq = 0
+        while True:
+            try:
+                # Block while nothing animates; otherwise only drain pending commands
+                command = self._commands.get(timeout=self.frame_interval if animating else None)
+                if command is None:
+                    break
+                seq, self._program = command
+                self._program_start = time.monotonic()
+            except queue.Empty:
+                pass
+
+            if self._program is None:
+                continue
+            try:
+                animating = self._draw(self._program, time.monotonic() - self._program_start)
+            except Exception as e:
+                print(f"[Renderer] Error drawing {self._program[0]} with {self.name}: {e}")
+                animating = False
+            with self._drawn:
+                self._drawn_seq = seq
+                self._drawn.notify_all()
+
+        self._close()
+
+class PygameRenderer(ThreadRenderer):
+    """Displays every media mode with pygame."""
+
+    name = 'pygame'
+    modes = ('still', 'slide', 'flash', 'scroll_text')
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import pygame  # noqa: F401
+            return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')
+                        or os.path.exists('/dev/fb0'))
+        except ImportError:
+            return False
+
+    def _open(self) -> None:
+        import pygame
+        self._pygame = pygame
+        pygame.init()
+        self._screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        info = pygame.display.Info()
+        self._screen_size = (info.current_w, info.current_h)
+        self._font = pygame.font.Font(None, max(20, self._screen_size[1] // 4))
+        self._images = ImageCache()
+        self._lines: Dict[str, Any] = {}
+        pygame.mouse.set_visible(False)
+
+    def _load(self, path: str) -> Tuple[Any, Tuple[int, int]]:
+        """An image scaled to fit the screen and its position, from the image cache."""
+        return self._images.get(path, self._scale)
+
+    def _scale(self, path: str) -> Tuple[Any, Tuple[int, int]]:
+        """Load and scale an image to fit the screen."""
+        image = self._pygame.image.load(path).convert()
+        screen_width, screen_height = self._screen_size
+        scale_factor = min(screen_width / image.get_width(), screen_height / image.get_height())
+        size = (int(image.get_width() * scale_factor), int(image.get_height() * scale_factor))
+        scaled = self._pygame.transform.scale(image, size)
+        return scaled, ((screen_width - size[0]) // 2, (screen_height - size[1]) // 2)
+
+    def _draw(self, program: Tuple[str, Tuple], elapsed: float) -> bool:
+        self._pygame.event.pump()
+        mode, args = program
+        self._screen.fill((0, 0, 0))
+        animating = False
+
+        if mode == 'still':
+            self._screen.blit(*self._load(args[0]))
+        elif mode == 'slide':
+            images, delay = args
+            self._screen.blit(*self._load(images[int(elapsed // delay) % len(images)]))
+            animating = True
+        elif mode == 'flash':
+            if (elapsed % FLASH_PERIOD) < FLASH_DUTY_CYCLE * FLASH_PERIOD:
+                self._screen.blit(*self._load(args[0]))
+            animating = True
+        elif mode == 'scroll_text':
+            animating = self._draw_scroll(args[0], elapsed)
+
+        self._pygame.display.flip()
+        return animating
+
+    def _draw_scroll(self, lines: List[str], elapsed: float) -> bool:
+        """Draw the scrolling text at its position for the elapsed time."""
+        speed = self._settings.get('scroll_speed', 2400)  # pixels per second
+        screen_width, screen_height = self._screen_size
+        offset = elapsed * speed
+        for line in lines:
+            if line not in self._lines:
+                self._lines[line] = self._font.render(line if line.strip() else " ", True, (255, 255, 255))
+            rendered = self._lines[line]
+            travel = screen_width + rendered.get_width()
+            if offset < travel:
+                self._screen.blit(rendered, (screen_width - offset, (screen_height - rendered.get_height()) // 2))
+                return True
+            offset -= travel
+        return False
+
+    def _close(self) -> None:
+        self._pygame.quit()
+
+class TkRenderer(ThreadRenderer):
+    """Displays stills, slideshows and flashing images with tkinter and PIL."""
+
+    name = 'tkinter'
+    modes = ('still', 'slide', 'flash')
+    frame_interval = 0.05
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import tkinter  # noqa: F401
+            from PIL import ImageTk  # noqa: F401
+        except ImportError:
+            return False
+        return bool(os.environ.get('DISPLAY'))
+
+    def _open(self) -> None:
+        import tkinter as tk
+        from PIL import ImageTk
+        self._image_tk = ImageTk
+        self._root = tk.Tk()
+        self._root.attributes('-fullscreen', True)
+        self._root.configure(background='black', cursor='none')
+        self._canvas = tk.Canvas(self._root, bg='black', highlightthickness=0)
+        self._canvas.pack(expand=True, fill=tk.BOTH)
+        self._root.update()
+        self._screen_size = (self._root.winfo_screenwidth(), self._root.winfo_screenheight())
+        self._photos = ImageCache()
+        self._shown: Optional[str] = None
+
+    def _photo(self, path: str) -> Any:
+        """An image fitted to the screen as a PhotoImage, from the image cache."""
+        return self._photos.get(path, self._load_photo)
+
+    def _load_photo(self, path: str) -> Any:
+        """Load an image fitted to the screen as a PhotoImage."""
+        from PIL import Image
+        from .framebuffer import fit_image
+        with Image.open(path) as image:
+            return self._image_tk.PhotoImage(fit_image(image, self._screen_size))
+
+    def _display(self, path: Optional[str]) -> None:
+        """Put an image (or black for None) on the canvas if not already shown."""
+        if path == self._shown:
+            return
+        self._canvas.delete('all')
+        if path:
+            self._canvas.create_image(0, 0, anchor='nw', image=self._photo(path))
+        self._shown = path
+
+    def _draw(self, program: Tuple[str, Tuple], elapsed: float) -> bool:
+        mode, args = program
+        animating = mode in ('slide', 'flash')
+        if mode == 'still':
+            self._display(args[0])
+        elif mode == 'slide':
+            images, delay = args
+            self._display(images[int(elapsed // delay) % len(images)])
+        elif mode == 'flash':
+            on = (elapsed % FLASH_PERIOD) < FLASH_DUTY_CYCLE * FLASH_PERIOD
+            self._display(args[0] if on else None)
+        else:
+            self._display(None)
+        self._root.update()
+        return animating
+
+    def _close(self) -> None:
+        self._root.destroy()
+
+class FramebufferAdapter(ThreadRenderer):
+    """Displays stills, slideshows and flashing images on a Linux framebuffer."""
+
+    name = 'framebuffer'
+    modes = ('still', 'slide', 'flash')
+    frame_interval = 0.02
+
+    @classmethod
+    def is_available(cls) -> bool:
+        from .framebuffer import pillow_available
+        return pillow_available() and os.access('/dev/fb0', os.W_OK)
+
+    def _open(self) -> None:
+        from .framebuffer import FramebufferGeometry, FramebufferRenderer, query_geometry
+        from .frame_cache import FrameCache
+        device_path = self._settings.get('framebuffer_device', '/dev/fb0')
+        geometry = query_geometry(device_path)
+        if geometry is None and 'framebuffer_geometry' in self._settings:
+            # [width, height, bits_per_pixel], e.g. for a plain file standing in for the device
+            geometry = FramebufferGeometry(*self._settings['framebuffer_geometry'])
+        frame_cache = None
+        if geometry is not None:
+            frame_cache = FrameCache(get_cache_dir(self._settings, 'frames'), geometry)
+        self._fb = FramebufferRenderer(device_path, geometry, frame_cache=frame_cache)
+        self._shown: Optional[str] = None
+
+    def _display(self, path: Optional[str]) -> None:
+        """Blit an image (or black for None) unless it is already on screen."""
+        if path == self._shown:
+            return
+        if path:
+            self._fb.show(path)
+        else:
+            self._fb.clear()
+        self._shown = path
+
+    def _draw(self, program: Tuple[str, Tuple], elapsed: float) -> bool:
+        mode, args = program
+        if mode == 'still':
+            self._display(args[0])
+        elif mode == 'slide':
+            images, delay = args
+            self._display(images[int(elapsed // delay) % len(images)])
+        elif mode == 'flash':
+            on = (elapsed % FLASH_PERIOD) < FLASH_DUTY_CYCLE * FLASH_PERIOD
+            self._display(args[0] if on else None)
+        else:
+            self._display(None)
+        return mode in ('slide', 'flash')
+
+    def _close(self) -> None:
+        self._fb.close()
+
+# All known backends, in order of preference when probing is not possible
+BACKENDS = {
+    cls.name: cls for cls in (FramebufferAdapter, MpvRenderer, FehRenderer, PygameRenderer, TkRenderer)
+}
+
+class ProbeResult:
+    """Switch latency and memory measured for one backend and media mode."""
+
+    def __init__(self, backend: str, mode: str, latency: float, memory_kb: int):
+        self.backend = backend
+        self.mode = mode
+        self.latency = latency
+        self.memory_kb = memory_kb
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'backend': self.backend, 'mode': self.mode, 'latency': self.latency, 'memory_kb': self.memory_kb}
+
+def _probe_sample(mode: str, image_a: str, image_b: str, folder: str, text_path: str) -> List[Tuple[str, str]]:
+    """Two (mode, path) requests to switch between when timing a mode."""
+    if mode == 'slide':
+        return [(mode, folder), (mode, folder)]
+    if mode == 'scroll_text':
+        return [(mode, text_path), (mode, text_path)]
+    return [(mode, image_a), (mode, image_b)]
+
+def probe_backends(image_a: str, image_b: str, folder: str, text_path: str,
+                   backends: Optional[List[str]] = None) -> List[ProbeResult]:
+    """Time each available backend's media switch and measure its memory.
+
+    For every supported mode the backend first displays one sample and then
+    switches to another; the second switch (warm) is what gets timed.
+    """
+    results = []
+    for name in backends or list(BACKENDS):
+        cls = BACKENDS[name]
+        if not cls.is_available():
+            print(f"[Renderer] Probe: backend '{name}' not available")
+            continue
+
+        renderer = cls()
+        try:
+            for mode in cls.modes:
+                first, second = _probe_sample(mode, image_a, image_b, folder, text_path)
+                renderer.play(*first)
+                if not renderer.wait_ready():
+                    print(f"[Renderer] Probe: '{name}' did not become ready for {mode}")
+                    continue
+                start = time.monotonic()
+                renderer.play(*second)
+                if not renderer.wait_ready():
+                    continue
+                latency = time.monotonic() - start
+                results.append(ProbeResult(name, mode, latency, renderer.memory_kb()))
+                print(f"[Renderer] Probe: {name}/{mode} switch {latency * 1000:.1f} ms, {renderer.memory_kb()} kB")
+        except Exception as e:
+            print(f"[Renderer] Probe: backend '{name}' failed: {e}")
+        finally:
+            renderer.close()
+    return results
+
+def select_backends(results: List[ProbeResult]) -> Dict[str, str]:
+    """Pick the fastest backend for each mode, breaking ties on memory use."""
+    selection: Dict[str, ProbeResult] = {}
+    for result in results:
+        best = selection.get(result.mode)
+        if best is None or (result.latency, result.memory_kb) < (best.latency, best.memory_kb):
+            selection[result.mode] = result
+    return {mode: result.backend for mode, result in selection.items()}
+
+def load_backend_selection(settings: Dict[str, Any]) -> Dict[str, str]:
+    """Load the probed per-mode selection saved in the cache directory."""
+    selection_path = os.path.join(get_cache_dir(settings), 'renderer_probe.json')
+    try:
+        with open(selection_path, 'r') as f:
+            return json.load(f).get('selection', {})
+    except (OSError, ValueError):
+        return {}
+
+def save_backend_selection(settings: Dict[str, Any], results: List[ProbeResult]) -> Dict[str, str]:
+    """Select backends from probe results and save the choice to the cache directory."""
+    selection = select_backends(results)
+    selection_path = os.path.join(get_cache_dir(settings), 'renderer_probe.json')
+    with open(selection_path, 'w') as f:
+        json.dump({'selection': selection, 'results': [r.to_dict() for r in results]}, f, indent=2)
+    print(f"[Renderer] Saved backend selection: {selection}")
+    return selection
+
+def create_renderers(settings: Dict[str, Any]) -> Dict[str, Renderer]:
+    """Build the mode -> renderer mapping requested by the 'renderer' setting.
+
+    The setting may name a single backend, map modes to backends, or be
+    "auto" to use the saved probe selection (falling back to the first
+    available backend in BACKENDS order for each mode).
+    """
+    requested = settings.get('renderer')
+    if not requested:
+        return {}
+
+    if requested == 'auto':
+        choice = load_backend_selection(settings)
+    elif isinstance(requested, str):
+        choice = {mode: requested for mode in MEDIA_MODES}
+    else:
+        choice = dict(requested)
+
+    instances: Dict[str, Renderer] = {}
+    renderers: Dict[str, Renderer] = {}
+    for mode in MEDIA_MODES:
+        candidates = [choice[mode]] if mode in choice else []
+        if requested == 'auto':
+            candidates += [name for name, cls in BACKENDS.items() if mode in cls.modes]
+
+        for name in candidates:
+            cls = BACKENDS.get(name)
+            if cls is None:
+                print(f"[Renderer] Unknown backend '{name}' for mode '{mode}'")
+                continue
+            if mode not in cls.modes or not cls.is_available():
+                continue
+            if name not in instances:
+                instances[name] = cls(settings)
+            renderers[mode] = instances[name]
+            break
+        else:
+            print(f"[Renderer] No available backend for mode '{mode}'; media will only be logged")
+
+    return renderers
+
+def main() -> None:
+    """Probe available backends and save the fastest one for each mode."""
+    import argparse
+    from .config_loader import load_config
+
+    parser = argparse.ArgumentParser(description="Probe display backends and pick the fastest per media mode.")
+    parser.add_argument("image_a", help="First sample image")
+    parser.add_argument("image_b", help="Second sample image")
+    parser.add_argument("folder", help="Sample folder for slideshow mode")
+    parser.add_argument("text", help="Sample text file for scroll mode")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(__file__), "config.json"),
+                        help="Engine config whose settings locate the cache directory")
+    parser.add_argument("--backend", action="append", choices=list(BACKENDS),
+                        help="Only probe this backend (may be repeated)")
+    args = parser.parse_args()
+
+    settings = load_config(args.config)['settings']
+    results = probe_backends(args.image_a, args.image_b, args.folder, args.text, args.backend)
+    save_backend_selection(settings, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Sampling Profiler Module
+----------------------
+On-demand, low-overhead profiling of a running process, driven by signals.
+
+A background thread samples the stacks of all other threads with
+sys._current_frames() at a fixed interval and counts identical stacks. When
+the capture ends the counts are written as a collapsed-stack file (one
+`thread;outer;...;inner count` line per stack), the input format of
+flamegraph.pl, inferno and speedscope.
+
+install_signal_handlers() wires it up:
+    kill -USR1 <pid>    start a capture, or stop the running one and write it
+    kill -USR2 <pid>    capture for a fixed number of seconds, then write it
+
+Nothing runs between captures.
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Optional
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_CAPTURE_SECONDS = 30.0
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples all threads' stacks while a capture runs and writes collapsed stacks."""
+
+    def __init__(self, output_dir: str, interval: float = DEFAULT_INTERVAL):
+        self._output_dir = output_dir
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None) -> bool:
+        """Start a capture (ending after duration seconds, if given); False if one is running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop_event, duration),
+                name="SamplingProfilerThread", daemon=True,
+            )
+            self._thread.start()
+        limit = f" for {duration:g}s" if duration else ''
+        print(f"[Profiler] Sampling every {self._interval * 1000:.0f} ms{limit}")
+        return True
+
+    def stop(self) -> None:
+        """End the running capture; the sampler thread writes the output."""
+        self._stop_event.set()
+
+    def toggle(self) -> None:
+        """Start a capture, or stop the running one."""
+        if not self.start():
+            self.stop()
+
+    def _run(self, stop_event: threading.Event, duration: Optional[float]) -> None:
+        """Sampler thread: collect stacks until stopped or the duration passes."""
+        own_id = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + duration if duration else None
+
+        while not stop_event.wait(self._interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[';'.join(reversed(labels))] += 1
+            samples += 1
+            if deadline and time.monotonic() >= deadline:
+                break
+
+        self._write(stacks, samples, time.monotonic() - started)
+
+    def _write(self, stacks: Counter, samples: int, elapsed: float) -> None:
+        """Write one capture as a collapsed-stack file."""
+        path = os.path.join(self._output_dir, time.strftime('profile-%Y%m%d-%H%M%S') + f"-{os.getpid()}.folded")
+        try:
+            os.makedirs(self._output_dir, exist_ok=True)
+            with open(path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"[Profiler] Could not write profile: {e}")
+            return
+        print(f"[Profiler] {samples} samples over {elapsed:.1f}s written to {path}")
+
+def install_signal_handlers(output_dir: str, capture_seconds: float = DEFAULT_CAPTURE_SECONDS,
+                            interval: float = DEFAULT_INTERVAL) -> Optional[SamplingProfiler]:
+    """Toggle a capture on SIGUSR1 and run a bounded one on SIGUSR2 (call from the main thread).
+
+    Returns the profiler, or None if signals cannot be installed here.
+    """
+    profiler = SamplingProfiler(output_dir, interval)
+
+    def handle_toggle(signum, frame):
+        profiler.toggle()
+
+    def handle_capture(signum, frame):
+        if not profiler.start(capture_seconds):
+            print("[Profiler] A capture is already running")
+
+    try:
+        signal.signal(signal.SIGUSR1, handle_toggle)
+        signal.signal(signal.SIGUSR2, handle_capture)
+    except (AttributeError, ValueError) as e:
+        # No SIGUSR1/2 on this platform, or not called from the main thread
+        print(f"[Profiler] Signal-triggered profiling unavailable: {e}")
+        return None
+    print(f"[Profiler] SIGUSR1 toggles profiling, SIGUSR2 profiles for {capture_seconds:g}s "
+          f"(output: {output_dir})")
+    return profiler
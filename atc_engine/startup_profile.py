@@ -0,0 +1,84 @@
+"""
+Startup Profile Module
+--------------------
+Per-phase timing of imports and initialization, enabled by --profile-startup.
+
+Every entry point wraps its heavy imports and init steps in
+`profiler.phase(name)` and calls `profiler.first_frame()` once the first
+image is on screen. When profiling is enabled this prints a report with the
+duration of each phase, the modules it imported, and the time from process
+start (and from boot) to the first frame. When disabled, phases cost almost
+nothing.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+def _process_age() -> Optional[Tuple[float, float]]:
+    """Return (seconds since process start, seconds since boot) from /proc, if available."""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    started_after_boot = start_ticks / os.sysconf('SC_CLK_TCK')
+    return uptime - started_after_boot, uptime
+
+class StartupProfiler:
+    """Records named startup phases and reports them at the first frame."""
+
+    def __init__(self):
+        self.enabled = False
+        self._phases: List[Tuple[str, float, int]] = []
+        self._depth = 0
+        self._created = time.perf_counter()
+        self._reported = False
+
+    def enable(self) -> None:
+        """Turn on recording (call as early as possible in the entry point)."""
+        self.enabled = True
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block and count the modules it imported."""
+        if not self.enabled:
+            yield
+            return
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            label = '  ' * self._depth + name
+            self._phases.append((label, time.perf_counter() - start, len(sys.modules) - modules_before))
+
+    def first_frame(self) -> None:
+        """Mark the first frame as shown and print the report (once)."""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        self.report()
+
+    def report(self) -> None:
+        """Print the recorded phases."""
+        print("[Startup] ---- startup profile ----")
+        for label, duration, modules in self._phases:
+            print(f"[Startup] {duration * 1000:9.1f} ms  {label} (+{modules} modules)")
+        since_profiler = time.perf_counter() - self._created
+        print(f"[Startup] {since_profiler * 1000:9.1f} ms  total since startup_profile import")
+        age = _process_age()
+        if age:
+            since_start, since_boot = age
+            print(f"[Startup] {since_start * 1000:9.1f} ms  since process start")
+            print(f"[Startup] {since_boot:9.2f} s   since boot (time to first frame)")
+        print("[Startup] --------------------------")
+
+# Shared by all entry points in the process
+profiler = StartupProfiler()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Config Load Benchmark
+-------------------
+Generates configs with growing numbers of media entries and times load_config.
+
+Load time should grow roughly linearly with the number of entries: the
+marginal cost of an entry (the slope between consecutive sizes, which
+leaves out the fixed cost of a load) should stay flat. Use --media-dir to point the generated
+media paths at network-synced storage.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from atc_engine.config_loader import load_config
+
+def generate_config(path, media_count, button_count, media_dir):
+    """Writes a config with media_count media entries spread over button combinations."""
+    buttons = {f"btn{i}": {"value": 32 + i, "mode": "press"} for i in range(button_count)}
+    button_names = list(buttons)
+    media = {}
+    for i in range(media_count):
+        media_path = os.path.join(media_dir, f"media_{i}.jpg")
+        if not os.path.exists(media_path):
+            open(media_path, 'wb').close()
+        media[f"media_{i}"] = {
+            "mode": "still",
+            "path": media_path,
+            "button": [button_names[i % button_count], button_names[(i * 7 + 1) % button_count]],
+        }
+    config = {
+        "buttons": buttons,
+        "media": media,
+        "actions": {"hdmi": {"mode": "hdmi_control", "button": button_names[:2]}},
+        "settings": {"default_media_name": "media_0"},
+    }
+    with open(path, 'w') as f:
+        json.dump(config, f)
+
+def time_load(path, repeat):
+    """Best-of-repeat load time in seconds (load_config's own output is suppressed)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_config(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark config loading for large generated configs.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100, 1000, 5000, 10000],
+                        help="Numbers of media entries to generate (default: 100 1000 5000 10000)")
+    parser.add_argument("--buttons", type=int, default=64, help="Number of buttons (default: 64)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best is reported (default: 3)")
+    parser.add_argument("--media-dir", help="Directory for the generated media files (default: a temp dir)")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Fail if the marginal per-entry time grows by more than this factor (default: 3.0)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        media_dir = args.media_dir or tmp_dir
+        os.makedirs(media_dir, exist_ok=True)
+        config_path = os.path.join(tmp_dir, "config.json")
+
+        print(f"{'entries':>10} {'load (ms)':>12} {'per entry (us)':>16} {'marginal (us)':>15}")
+        sizes = sorted(set(args.sizes))
+        if len(sizes) < 3:
+            parser.error("--sizes needs at least three distinct sizes")
+        timings = []
+        for size in sizes:
+            generate_config(config_path, size, args.buttons, media_dir)
+            elapsed = time_load(config_path, args.repeat)
+            marginal = ''
+            if timings:
+                previous_size, previous_elapsed = timings[-1]
+                marginal = f"{(elapsed - previous_elapsed) / (size - previous_size) * 1e6:.1f}"
+            timings.append((size, elapsed))
+            print(f"{size:>10} {elapsed * 1000:>12.1f} {elapsed / size * 1e6:>16.1f} {marginal:>15}")
+
+    # Cost per added entry: the smallest sizes are too fast to time reliably, so the first
+    # slope spans every size but the largest and is compared with the slope up to the largest
+    (first_size, first_time), (middle_size, middle_time), (last_size, last_time) = timings[0], timings[-2], timings[-1]
+    base_slope = (middle_time - first_time) / (middle_size - first_size)
+    top_slope = (last_time - middle_time) / (last_size - middle_size)
+    growth = top_slope / base_slope if base_slope > 0 else float('inf')
+    print(f"Marginal per-entry time grew by {growth:.2f}x from {first_size}-{middle_size} "
+          f"to {middle_size}-{last_size} entries")
+    if growth > args.max_growth:
+        print(f"Error: load time is not bounded (growth above {args.max_growth}x)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
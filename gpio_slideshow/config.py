@@ -35,4 +35,22 @@ INITIAL_FOLDER_KEY = 0       # Which folder key to start with
 
 # Button Settings
 BUTTON_POLL_INTERVAL = 0.05  # How often to check button state (seconds)
-DEBOUNCE_TIME = 0.3         # Ignore button changes for this duration after a press (seconds)
\ No newline at end of file
+DEBOUNCE_TIME = 0.3         # Ignore button changes for this duration after a press (seconds)
+
+# mpv Settings
+MPV_HOT_SPARE = True  # Keep an idle spare mpv to take over at once if the playing one exits
+
+# Profiling Settings (SIGUSR1 toggles the sampling profiler, SIGUSR2 runs a bounded capture)
+PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gpio_slideshow', 'profiles')
+PROFILE_CAPTURE_SECONDS = 30  # Duration of a SIGUSR2 capture (seconds)
+
+# Media Store Settings
+# Images are played from a content-addressed store, so a file copied into several
+# sets is one file for mpv and the page cache. None plays the folders' files directly.
+MEDIA_STORE_DIR = None  # e.g. "/home/olimex/Documents/slide/media_store"
+
+# Derivative Settings
+# Large images are shown from copies fitted to the screen, built in the background
+# by a process pool (requires Pillow). None shows the source images.
+DERIVATIVE_SIZE = (1920, 1080)  # Screen resolution (width, height)
+DERIVATIVE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gpio_slideshow', 'derivatives')
\ No newline at end of file
@@ -3,11 +3,13 @@ GPIO Button monitoring functionality.
 """
 import threading
 import time
-from pyA64.gpio import port, gpio
 
 # Import button-related settings
 from . import config
 
+# pyA64's gpio module (or the shared GPIO broker), opened when the monitor thread initializes GPIO
+gpio = None
+
 class ButtonMonitor(threading.Thread):
     """Monitors GPIO buttons in a separate thread."""
 
@@ -23,7 +25,10 @@ class ButtonMonitor(threading.Thread):
 
     def _init_gpio(self):
         """Initializes GPIO pins."""
+        global gpio
         try:
+            from atc_engine.gpio_broker import open_gpio
+            gpio = open_gpio()
             gpio.init()
             print("[Buttons] GPIO initialized.")
             for pin in self._pin_map.keys():
@@ -0,0 +1,223 @@
+"""
+Cached image discovery for the slideshow folders.
+
+Each folder's sorted image list is built once, in the background at
+startup, with a single os.scandir pass. Folders are then watched with
+inotify and re-listed by the background thread when files are added,
+removed or renamed, so a folder switch reuses a ready list and new files
+show up without a rescan on the button-press path. A switch to a folder
+that is being listed waits for that listing rather than starting another. Where inotify is not
+available (or a watch cannot be added), a cached list is revalidated
+against the folder's mtime, which costs one stat.
+
+With a media store, each listing is ingested when it is built and holds
+the stored copies, so images duplicated across folders share one path.
+With a derivative cache, each listing holds the display-resolution
+derivatives already built and is queued for the missing ones; when a build
+finishes, the listing is resolved again on the build thread. Lookups on a
+folder switch never touch the derivative index.
+"""
+import os
+import threading
+
+from atc_engine.inotify import (
+    IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_MOVE_SELF,
+    IN_MOVED_FROM, IN_MOVED_TO, IN_ONLYDIR, Inotify, inotify_available,
+)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+
+# Events that change a folder's listing
+_WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE
+               | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# Seconds to let a burst of file events settle before re-listing (e.g. a copy of many files)
+SETTLE_SECONDS = 0.2
+
+
+def scan_images(folder_path):
+    """Returns the sorted paths of the images in a folder (hidden files skipped)."""
+    with os.scandir(folder_path) as entries:
+        files = [
+            entry.path for entry in entries
+            if not entry.name.startswith('.') and entry.name.endswith(IMAGE_EXTENSIONS) and entry.is_file()
+        ]
+    files.sort()
+    return files
+
+
+class ImageListCache(threading.Thread):
+    """Keeps the sorted image lists of a set of folders current."""
+
+    def __init__(self, folders, media_store=None, derivatives=None):
+        """
+        Args:
+            folders (iterable): Folders to list
+            media_store (MediaStore): Store to resolve the images through, or None
+            derivatives (DerivativeCache): Cache to resolve and queue the images' derivatives on, or None
+        """
+        super().__init__(name="ImageCacheThread")
+        self.daemon = True
+        self._folders = list(dict.fromkeys(folders))
+        self._media_store = media_store
+        self._derivatives = derivatives
+        self._lock = threading.Lock()
+        # folder -> (sorted image paths, folder mtime_ns when listed)
+        self._listings = {}
+        # Folders kept current by inotify; others are checked against their mtime
+        self._watched = set()
+        # Listed path -> (device, inode) of its file, recorded when the listing is built
+        self._identities = {}
+        # folder -> its images before derivative resolution, to re-resolve after a build
+        self._sources = {}
+        # folder -> event set when the scan in progress for it finishes
+        self._scanning = {}
+        self._shutdown_event = threading.Event()
+
+    def _scan(self, folder_path):
+        """Lists a folder and stores the result; returns the list (None if unreadable)."""
+        try:
+            mtime_ns = os.stat(folder_path).st_mtime_ns
+            images = scan_images(folder_path)
+        except OSError as e:
+            print(f"[ImageCache] Cannot list {folder_path}: {e}")
+            with self._lock:
+                self._listings.pop(folder_path, None)
+            return None
+        if self._media_store is not None:
+            # Only new or changed files are hashed; files that cannot be stored keep their path
+            stored = self._media_store.ingest(images).objects
+            images = [stored.get(os.path.abspath(path), path) for path in images]
+        with self._lock:
+            self._sources[folder_path] = images
+        shown = self._store_listing(folder_path, images, mtime_ns)
+        if self._derivatives is not None:
+            self._derivatives.submit(images, lambda built, folder_path=folder_path: self._rebuilt(folder_path, built))
+        return shown
+
+    def _store_listing(self, folder_path, images, mtime_ns):
+        """Resolves a folder's images to their derivatives and makes them its listing; returns the listing."""
+        if self._derivatives is not None:
+            # Images whose derivative is not built yet are shown from the source
+            images = self._derivatives.resolve_all(images)
+        identities = {}
+        for path in images:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            identities[path] = (st.st_dev, st.st_ino)
+        with self._lock:
+            self._listings[folder_path] = (images, mtime_ns)
+            self._identities.update(identities)
+        return images
+
+    def _rebuilt(self, folder_path, built):
+        """Derivative build callback: re-resolves a folder's listing when new derivatives exist."""
+        if not built or self._shutdown_event.is_set():
+            return
+        with self._lock:
+            sources = self._sources.get(folder_path)
+            cached = self._listings.get(folder_path)
+        if sources is None or cached is None:
+            return
+        self._store_listing(folder_path, sources, cached[1])
+
+    def _scan_once(self, folder_path):
+        """Lists a folder, or waits for the scan another thread is already running; returns the list."""
+        with self._lock:
+            done = self._scanning.get(folder_path)
+            if done is None:
+                self._scanning[folder_path] = threading.Event()
+        if done is not None:
+            done.wait()
+            with self._lock:
+                cached = self._listings.get(folder_path)
+            return cached[0] if cached is not None else None
+        try:
+            return self._scan(folder_path)
+        finally:
+            with self._lock:
+                self._scanning.pop(folder_path).set()
+
+    def identity(self, path):
+        """(device, inode) of a listed image, shared by every path of the same file; None if unknown."""
+        with self._lock:
+            return self._identities.get(path)
+
+    def get(self, folder_path):
+        """Returns the sorted images of a folder, from the cache when it is current."""
+        with self._lock:
+            cached = self._listings.get(folder_path)
+            watched = folder_path in self._watched
+        if cached is not None:
+            images, mtime_ns = cached
+            if watched:
+                return list(images)
+            try:
+                if os.stat(folder_path).st_mtime_ns == mtime_ns:
+                    return list(images)
+            except OSError:
+                pass
+        images = self._scan_once(folder_path)
+        return list(images) if images is not None else []
+
+    def stop(self):
+        """Signals the thread to stop."""
+        self._shutdown_event.set()
+
+    def _watch(self, inotify):
+        """Adds a watch per folder; returns watch descriptor -> folder."""
+        watches = {}
+        for folder_path in self._folders:
+            try:
+                watches[inotify.add_watch(folder_path, _WATCH_MASK)] = folder_path
+            except OSError as e:
+                print(f"[ImageCache] Not watching {folder_path} ({e}); using its mtime instead.")
+        with self._lock:
+            self._watched = set(watches.values())
+        return watches
+
+    def run(self):
+        """Prefills every folder, then re-lists folders as inotify reports changes."""
+        inotify = None
+        watches = {}
+        if inotify_available():
+            try:
+                inotify = Inotify()
+                # Watch before listing so no change between the two is missed
+                watches = self._watch(inotify)
+            except OSError as e:
+                print(f"[ImageCache] inotify unavailable ({e}); using folder mtimes.")
+                inotify = None
+
+        for folder_path in self._folders:
+            if self._shutdown_event.is_set():
+                break
+            with self._lock:
+                listed = folder_path in self._listings
+            if not listed:
+                # A folder switch may have listed (or be listing) it already
+                self._scan_once(folder_path)
+        print(f"[ImageCache] Listed {len(self._folders)} folders ({len(watches)} watched).")
+
+        if inotify is None:
+            return
+        try:
+            while not self._shutdown_event.is_set():
+                events = inotify.read_events(timeout=0.5)
+                if not events:
+                    continue
+                # Let the burst finish, then re-list each affected folder once
+                self._shutdown_event.wait(timeout=SETTLE_SECONDS)
+                events += inotify.read_events(timeout=0)
+                changed = {watches[event.wd] for event in events if event.wd in watches}
+                for event in events:
+                    if event.mask & IN_IGNORED and event.wd in watches:
+                        # The folder itself was removed or moved; fall back to mtime checks
+                        with self._lock:
+                            self._watched.discard(watches.pop(event.wd))
+                for folder_path in changed:
+                    self._scan(folder_path)
+        finally:
+            inotify.close()
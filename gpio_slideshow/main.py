@@ -12,6 +12,7 @@ The Application class coordinates these components and manages the application l
 """
 
 # Standard library imports
+import argparse
 import os
 import sys
 import signal
@@ -23,6 +24,8 @@ from . import config
 from . import slideshow
 from . import gpio_button
 from . import signal_handler
+from atc_engine.sampling_profiler import install_signal_handlers
+from atc_engine.startup_profile import profiler
 
 class Application:
     """
@@ -70,6 +73,7 @@ class Application:
         signal.signal(signal.SIGINT, graceful_shutdown_handler)
         signal.signal(signal.SIGTERM, graceful_shutdown_handler)
         print("[App] Signal handlers set up for graceful shutdown.")
+        install_signal_handlers(config.PROFILE_DIR, config.PROFILE_CAPTURE_SECONDS)
 
     def _check_mpv_installed(self):
         """Verify that the required mpv media player is installed."""
@@ -92,7 +96,9 @@ class Application:
         print("[App] Starting application...")
         self._setup_signal_handlers()
 
-        if not self._check_mpv_installed():
+        with profiler.phase("check mpv"):
+            mpv_installed = self._check_mpv_installed()
+        if not mpv_installed:
             sys.exit(1)
 
         # Validate initial folder key
@@ -166,6 +172,12 @@ class Application:
             self._signal_monitor.stop()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPIO controlled mpv slideshow.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print per-phase import and init times once the first folder is loaded")
+    if parser.parse_args().profile_startup:
+        profiler.enable()
+
     # Validate configuration
     if not isinstance(config.FOLDER_MAP, dict) or not config.FOLDER_MAP:
         print("Error: FOLDER_MAP configuration is invalid or empty.")
@@ -0,0 +1,330 @@
+"""
+Asynchronous client for mpv's JSON IPC socket.
+
+A reader thread consumes everything mpv writes to the socket, so replies
+and events never pile up in the receive buffer. Every command carries a
+request_id; command() returns a Future that is resolved with the reply's
+data (or failed with MpvIpcError) when the matching reply arrives. Events
+such as `file-loaded`, `end-file` and `playback-restart` are delivered to
+subscribed callbacks, and next_event() returns a Future for the next
+occurrence of an event, so callers can tell when a new image is on screen.
+
+MpvPropertyState mirrors a set of mpv properties via observe_property, so
+callers only send set_property for values that actually differ.
+
+When the socket breaks, pending requests fail immediately and the client
+tries to reconnect right away.
+"""
+import itertools
+import json
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class MpvIpcError(Exception):
+    """An mpv command failed, or the IPC connection was lost."""
+
+
+class MpvIpcClient:
+    """Sends commands to mpv and dispatches its replies and events."""
+
+    def __init__(self, socket_path, on_disconnect=None, reconnect_attempts=5, reconnect_delay=0.1):
+        """
+        Args:
+            socket_path (str): Path of mpv's --input-ipc-server socket
+            on_disconnect (callable): Called (on the reader thread) when the connection breaks
+            reconnect_attempts (int): Immediate reconnect attempts after the connection breaks
+            reconnect_delay (float): Seconds between reconnect attempts
+        """
+        self._socket_path = socket_path
+        self._on_disconnect = on_disconnect
+        self._reconnect_attempts = reconnect_attempts
+        self._reconnect_delay = reconnect_delay
+        # Guards the socket, the pending requests and writes
+        self._lock = threading.Lock()
+        self._sock = None
+        self._pending = {}  # request_id -> Future
+        self._request_ids = itertools.count(1)
+        self._subscribers = {}  # event name -> callbacks
+        self._waiters = {}  # event name -> Futures for its next occurrence
+        self._connect_handlers = []
+        self._closed = False
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def connect(self, attempts=5, retry_delay=0.3):
+        """Connects to the socket (retrying while mpv starts up) and starts the reader thread."""
+        self._closed = False
+        for attempt in range(attempts):
+            if self._sock is not None:
+                return True
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(1.0)
+                sock.connect(self._socket_path)
+                sock.settimeout(None)
+            except OSError as e:
+                sock.close()
+                print(f"[MpvIPC] Cannot connect to {self._socket_path}: {e}. Attempt {attempt + 1}/{attempts}.")
+                if attempt < attempts - 1:
+                    time.sleep(retry_delay)
+                continue
+
+            with self._lock:
+                if self._sock is not None:
+                    # Another thread connected meanwhile
+                    sock.close()
+                    return True
+                self._sock = sock
+            threading.Thread(target=self._read_loop, args=(sock,), name="MpvIpcReaderThread", daemon=True).start()
+            print(f"[MpvIPC] Connected to {self._socket_path}.")
+            for handler in list(self._connect_handlers):
+                try:
+                    handler()
+                except Exception as e:
+                    print(f"[MpvIPC] Error in connect handler: {e}")
+            return True
+        return False
+
+    def retarget(self, socket_path, attempts=5, retry_delay=0.05):
+        """Connects to another mpv's socket (e.g. a spare taking over); subscriptions carry over."""
+        self.disconnect()
+        self._socket_path = socket_path
+        return self.connect(attempts, retry_delay)
+
+    def disconnect(self):
+        """Closes the connection without reconnecting; pending requests fail."""
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            self._fail_pending("IPC connection closed")
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def close(self):
+        """Disconnects for good."""
+        self._closed = True
+        self.disconnect()
+
+    def command(self, *args):
+        """Sends a command; returns a Future resolved with the reply's data."""
+        return self.commands([args])[0]
+
+    def commands(self, command_list):
+        """Sends several commands in one socket write; returns one Future per command.
+
+        mpv executes them in order.
+        """
+        futures = [Future() for _ in command_list]
+        if self._sock is None and not self._closed:
+            self.connect(attempts=1)
+        if any(args[0] == 'quit' for args in command_list):
+            # mpv closes the socket when it quits; do not reconnect to the exiting player
+            self._closed = True
+        with self._lock:
+            sock = self._sock
+            if sock is None:
+                for future in futures:
+                    future.set_exception(MpvIpcError("IPC socket not connected"))
+                return futures
+            lines = []
+            request_ids = []
+            for args, future in zip(command_list, futures):
+                request_id = next(self._request_ids)
+                self._pending[request_id] = future
+                request_ids.append(request_id)
+                lines.append(json.dumps({"command": list(args), "request_id": request_id}) + "\n")
+            try:
+                sock.sendall(''.join(lines).encode('utf-8'))
+                return futures
+            except OSError as e:
+                for request_id, future in zip(request_ids, futures):
+                    del self._pending[request_id]
+                    future.set_exception(MpvIpcError(f"Error sending commands: {e}"))
+        # Wake the reader so it notices the broken socket and reconnects
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        return futures
+
+    def request(self, *args, timeout=2.0):
+        """Sends a command and waits for its result; raises MpvIpcError on failure."""
+        try:
+            return self.command(*args).result(timeout=timeout)
+        except FutureTimeoutError:
+            raise MpvIpcError(f"No reply to {args[0]} within {timeout}s")
+
+    def add_connect_handler(self, handler):
+        """Calls handler() after every (re)connection, e.g. to re-register observers."""
+        self._connect_handlers.append(handler)
+
+    def subscribe(self, event, callback):
+        """Calls callback(message) on the reader thread for every `event` ('*' for all events)."""
+        with self._lock:
+            self._subscribers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(event, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def next_event(self, event):
+        """Returns a Future resolved with the next `event` message (register before sending the command)."""
+        future = Future()
+        with self._lock:
+            self._waiters.setdefault(event, []).append(future)
+        return future
+
+    def _read_loop(self, sock):
+        """Reader thread: dispatches replies and events until the socket breaks."""
+        buffer = b''
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    self._dispatch(line)
+        self._connection_lost(sock)
+
+    def _dispatch(self, line):
+        """Routes one message from mpv to its request's Future or the event's subscribers."""
+        try:
+            message = json.loads(line)
+        except ValueError:
+            print(f"[MpvIPC] Ignoring malformed message: {line[:200]!r}")
+            return
+
+        event = message.get('event')
+        if event is None:
+            with self._lock:
+                future = self._pending.pop(message.get('request_id'), None)
+            if future is None:
+                return
+            if message.get('error') == 'success':
+                future.set_result(message.get('data'))
+            else:
+                future.set_exception(MpvIpcError(message.get('error', 'unknown error')))
+            return
+
+        with self._lock:
+            callbacks = self._subscribers.get(event, []) + self._subscribers.get('*', [])
+            waiters = self._waiters.pop(event, [])
+        for future in waiters:
+            future.set_result(message)
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"[MpvIPC] Error in '{event}' handler: {e}")
+
+    def _fail_pending(self, reason):
+        """Fails every outstanding request and event waiter."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, {}
+        for future in pending.values():
+            future.set_exception(MpvIpcError(reason))
+        for futures in waiters.values():
+            for future in futures:
+                future.set_exception(MpvIpcError(reason))
+
+    def _connection_lost(self, sock):
+        """Handles a broken socket: fail pending requests, notify, and reconnect right away."""
+        with self._lock:
+            current = self._sock is sock
+            if current:
+                self._sock = None
+        sock.close()
+        if not current:
+            return  # Closed on purpose by disconnect()
+
+        print("[MpvIPC] IPC connection lost.")
+        self._fail_pending("IPC connection lost")
+        if self._on_disconnect:
+            self._on_disconnect()
+        if not self._closed and self.connect(self._reconnect_attempts, self._reconnect_delay):
+            print("[MpvIPC] Reconnected.")
+
+
+# mpv reports flag-like choices ("no"/"yes") back as booleans
+_CHOICE_VALUES = {'no': False, 'yes': True}
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return _CHOICE_VALUES.get(value, value)
+    return value
+
+
+class MpvPropertyState:
+    """Keeps the current values of some mpv properties, to skip redundant set_property commands."""
+
+    def __init__(self, client, names):
+        """
+        Args:
+            client (MpvIpcClient): Connection to observe the properties on
+            names (iterable): Property names to track
+        """
+        self._client = client
+        self._names = list(names)
+        self._lock = threading.Lock()
+        self._values = {}  # name -> last known value (absent while unknown)
+        client.subscribe('property-change', self._on_change)
+        client.add_connect_handler(self._observe)
+        if client.connected:
+            self._observe()
+
+    def _observe(self):
+        """Registers the observers on the current connection; mpv replies with the current values."""
+        with self._lock:
+            self._values.clear()
+        self._client.commands([
+            ["observe_property", observer_id, name]
+            for observer_id, name in enumerate(self._names, start=1)
+        ])
+
+    def _on_change(self, message):
+        name = message.get('name')
+        if name in self._names:
+            with self._lock:
+                self._values[name] = _normalize(message.get('data'))
+
+    def get(self, name, default=None):
+        """Last known value of a property."""
+        with self._lock:
+            return self._values.get(name, default)
+
+    def set_commands(self, values):
+        """Returns set_property commands for the values that differ from mpv's, assuming they succeed.
+
+        Call invalidate() for a property whose command fails.
+        """
+        commands = []
+        with self._lock:
+            for name, value in values.items():
+                normalized = _normalize(value)
+                if name in self._values and self._values[name] == normalized:
+                    continue
+                self._values[name] = normalized
+                commands.append(["set_property", name, value])
+        return commands
+
+    def invalidate(self, name):
+        """Forgets a property's value so the next set_commands() sends it."""
+        with self._lock:
+            self._values.pop(name, None)
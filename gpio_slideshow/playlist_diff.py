@@ -0,0 +1,113 @@
+"""
+Minimal edits between two mpv playlists.
+
+Folder sets overlap (a set can reuse files from others), so switching
+between them is cheaper as an edit of the loaded playlist than as a full
+replacement: mpv keeps the entries that stay. The edit removes entries
+that are not in the target, appends the missing ones, then moves entries
+into the target order. Entries on the longest run already in target order
+stay put, so the number of moves is as small as possible.
+
+A set can reach a file already in the playlist under another path (a hard
+link, e.g. after `media_store --dedupe`, or a symlink), so reuse_entries()
+first maps each target image to the entry that is the same file, letting
+it count as overlap. Copies with the same content share one path anyway
+when they are played from the media store or as derivatives.
+"""
+import bisect
+
+
+def _longest_increasing_run(positions):
+    """Returns the indices of a longest strictly increasing subsequence of positions."""
+    tails = []  # smallest tail value of an increasing run of each length
+    tail_indices = []
+    previous = [None] * len(positions)
+    for i, position in enumerate(positions):
+        length = bisect.bisect_left(tails, position)
+        if length == len(tails):
+            tails.append(position)
+            tail_indices.append(i)
+        else:
+            tails[length] = position
+            tail_indices[length] = i
+        previous[i] = tail_indices[length - 1] if length else None
+    run = []
+    i = tail_indices[-1] if tail_indices else None
+    while i is not None:
+        run.append(i)
+        i = previous[i]
+    run.reverse()
+    return run
+
+
+def reuse_entries(current, target, identity):
+    """Returns target with each image replaced by the current entry that is the same file, if any.
+
+    Args:
+        current (list): Entries of the loaded playlist
+        target (list): Images of the new playlist
+        identity (callable): Returns a key shared by all paths of one file
+            (e.g. its device and inode), or None if unknown
+    """
+    current_set = set(current)
+    by_identity = {}
+    for entry in current:
+        key = identity(entry)
+        if key is not None:
+            by_identity.setdefault(key, entry)
+
+    # Entries the target already names directly are not available as replacements
+    used = {path for path in target if path in current_set}
+    result = []
+    for path in target:
+        replacement = path
+        if path not in current_set:
+            key = identity(path)
+            entry = by_identity.get(key) if key is not None else None
+            if entry is not None and entry not in used:
+                replacement = entry
+                used.add(entry)
+        result.append(replacement)
+    return result
+
+
+def diff_playlist(current, target):
+    """
+    Computes the edit turning playlist `current` into `target` (entries unique in each).
+
+    Returns:
+        tuple: (removals, additions, moves) where removals are indices to remove in
+        the given (descending) order, additions are entries to append in order, and
+        moves are (from_index, to_index) pairs for mpv's playlist-move, applied after
+        the removals and additions.
+    """
+    target_set = set(target)
+    removals = [i for i in range(len(current) - 1, -1, -1) if current[i] not in target_set]
+
+    playlist = [entry for entry in current if entry in target_set]
+    kept = set(playlist)
+    additions = [entry for entry in target if entry not in kept]
+    playlist += additions
+
+    target_index = {entry: i for i, entry in enumerate(target)}
+    stay = {playlist[i] for i in _longest_increasing_run([target_index[entry] for entry in playlist])}
+
+    moves = []
+    for k, entry in enumerate(target):
+        if entry in stay:
+            continue
+        source = playlist.index(entry)
+        # Place the entry right after its predecessor in the target order
+        destination = playlist.index(target[k - 1]) + 1 if k else 0
+        if destination in (source, source + 1):
+            continue
+        moves.append((source, destination))
+        # playlist-move puts the entry before the one currently at `destination`
+        playlist.pop(source)
+        playlist.insert(destination - 1 if source < destination else destination, entry)
+    return removals, additions, moves
+
+
+def edit_cost(removals, additions, moves):
+    """Number of IPC commands an edit needs (all additions go in one loadlist)."""
+    return len(removals) + len(moves) + (1 if additions else 0)
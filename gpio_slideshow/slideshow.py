@@ -1,22 +1,50 @@
 """
 Slideshow management module for controlling MPV-based image display.
+
+The slideshow thread sleeps on a condition variable and is woken only when
+there is work: a new folder key, the mpv process exiting, or shutdown.
+
+With MPV_HOT_SPARE, a second mpv is kept idle (an idle mpv opens no
+window). When the playing mpv exits, the spare takes over at once and the
+playlist resumes at the image that was showing, with the playback
+properties re-sent; a new spare is then started in the background. If mpv
+exits on the same image twice in quick succession, the playlist resumes at
+the image after it instead.
 """
 import subprocess
 import os
 import time
 import signal
-import glob
 import threading
 import queue
-import json
-import socket
+import tempfile
 
 from . import config
+from . import image_cache
+from . import mpv_ipc
+from . import playlist_diff
+from atc_engine.derivatives import DerivativeCache
+from atc_engine.framebuffer import pillow_available
+from atc_engine.media_store import MediaStore
+from atc_engine.startup_profile import profiler
 
 # Import configuration settings
 FOLDER_MAP = config.FOLDER_MAP
 INITIAL_FOLDER_KEY = config.INITIAL_FOLDER_KEY
 SLIDESHOW_DELAY_SECONDS = config.SLIDESHOW_DELAY_SECONDS
+MEDIA_STORE_DIR = config.MEDIA_STORE_DIR
+DERIVATIVE_SIZE = config.DERIVATIVE_SIZE
+DERIVATIVE_DIR = config.DERIVATIVE_DIR
+MPV_HOT_SPARE = config.MPV_HOT_SPARE
+
+# IPC sockets of the playing and the spare mpv (they swap when the spare takes over)
+MPV_SOCKET_PATHS = ("/tmp/mpvsocket", "/tmp/mpvsocket-spare")
+
+# Seconds to wait before retrying when mpv could not be restarted
+MPV_RESTART_RETRY_SECONDS = 1.0
+
+# mpv exiting again on the same image within this many seconds skips that image on resume
+MPV_REPEAT_CRASH_SECONDS = 30.0
 
 class SlideshowManager(threading.Thread):
     """Manages the mpv slideshow process in a separate thread using IPC."""
@@ -29,101 +57,105 @@ class SlideshowManager(threading.Thread):
         self._target_folder_key = initial_folder_key
         self._current_folder_key = None # Start with none to force initial load
         self._mpv_process = None
-        self._image_files = [] # Represents the currently active set of files in mpv
+        self._image_files = [] # Represents the currently active set of files in mpv (None if unknown)
         self._lock = threading.Lock()
+        # Signalled (with _lock held) whenever the thread has something to do
+        self._wake = threading.Condition(self._lock)
         self._shutdown_event = threading.Event()
-        self._ipc_socket_path = "/tmp/mpvsocket" # IPC socket path
-        self._mpv_socket = None # IPC socket object
+        self._ipc_socket_path = MPV_SOCKET_PATHS[0] # IPC socket path of the playing mpv
+        # Idle mpv ready to take over: (process, socket path, start time), or None
+        self._spare = None
+        self._spare_wanted = MPV_HOT_SPARE
+        # Folder key and playlist (rotated to the image that was showing) to restore after a crash
+        self._resume = None
+        # (monotonic time, image) of the last time mpv exited, to spot an image that keeps crashing it
+        self._last_crash = None
+        # playlist-pos when the IPC connection last broke (a reconnect resets the mirrored properties)
+        self._position_at_disconnect = None
+        # The IPC client wakes this thread when the connection breaks (mpv may have exited)
+        self._ipc = mpv_ipc.MpvIpcClient(self._ipc_socket_path, on_disconnect=self._on_ipc_disconnect)
+        self._ipc.subscribe('end-file', self._on_end_file)
+        # Playback properties mirrored from mpv, so unchanged values are not re-sent
+        self._properties = mpv_ipc.MpvPropertyState(
+            self._ipc, ['image-display-duration', 'loop-playlist', 'loop-file', 'playlist-pos'])
+        # Content-addressed copies of the images, shared by all folders (optional)
+        self._media_store = None
+        if MEDIA_STORE_DIR:
+            try:
+                self._media_store = MediaStore(MEDIA_STORE_DIR)
+            except Exception as e:
+                print(f"[Slideshow] Cannot open media store {MEDIA_STORE_DIR}: {e}. Using folder files.")
+        # Screen-sized copies of large images, built in the background (optional)
+        self._derivatives = None
+        if DERIVATIVE_SIZE and pillow_available():
+            try:
+                self._derivatives = DerivativeCache(DERIVATIVE_DIR, DERIVATIVE_SIZE)
+            except Exception as e:
+                print(f"[Slideshow] Cannot open derivative cache {DERIVATIVE_DIR}: {e}. Using source images.")
+        # Sorted image lists of all folders, kept current in the background
+        self._image_cache = image_cache.ImageListCache(folder_map.values(), self._media_store, self._derivatives)
         print(f"[Slideshow] Initialized. Target key: {self._target_folder_key}")
 
     def _connect_ipc(self):
         """Establishes a connection to the mpv IPC socket with retries."""
-        if self._mpv_socket: # Already connected
-            return True
-
-        max_retries = 5
-        retry_delay = 0.3 # seconds
-
-        for attempt in range(max_retries):
-            try:
-                if not os.path.exists(self._ipc_socket_path):
-                    print(f"[Slideshow] IPC socket file not found: {self._ipc_socket_path}. Attempt {attempt + 1}/{max_retries}. Waiting...")
-                    time.sleep(retry_delay)
-                    continue
-
-                print(f"[Slideshow] Attempting to connect to IPC socket: {self._ipc_socket_path} (Attempt {attempt + 1}/{max_retries})")
-                self._mpv_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                self._mpv_socket.settimeout(1.0) # Set a timeout for the connect operation
-                self._mpv_socket.connect(self._ipc_socket_path)
-                print("[Slideshow] IPC socket connected.")
-                return True
-            except socket.timeout:
-                print(f"[Slideshow] IPC socket connection timed out. Attempt {attempt + 1}/{max_retries}.")
-                self._mpv_socket = None # Ensure socket is None if connect failed
-            except socket.error as e:
-                print(f"[Slideshow] Error connecting to IPC socket: {e}. Attempt {attempt + 1}/{max_retries}.")
-                self._mpv_socket = None # Ensure socket is None if connect failed
-            except Exception as e:
-                print(f"[Slideshow] Unexpected error connecting to IPC socket: {e}. Attempt {attempt + 1}/{max_retries}.")
-                self._mpv_socket = None
-            
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-
-        print(f"[Slideshow] Failed to connect to IPC socket after {max_retries} attempts.")
-        return False
+        return self._ipc.connect(attempts=5, retry_delay=0.3)
 
     def _send_ipc_command(self, cmd_args):
-        """Sends a command to mpv via the IPC socket."""
-        if not self._mpv_socket:
-            print("[Slideshow] IPC socket not connected. Attempting to reconnect...")
-            if not self._connect_ipc():
-                print("[Slideshow] Failed to connect to IPC. Command not sent.")
-                return False
-
-        command_str = json.dumps({"command": cmd_args}) + "\n"
-        try:
-            self._mpv_socket.sendall(command_str.encode('utf-8'))
-            return True
-        except socket.error as e:
-            print(f"[Slideshow] IPC socket error sending command {cmd_args}: {e}")
-            # Connection might be broken, try to clean up
-            if self._mpv_socket:
-                self._mpv_socket.close()
-            self._mpv_socket = None
-            return False
-        except Exception as e:
-            print(f"[Slideshow] Unexpected error sending IPC command {cmd_args}: {e}")
-            return False
+        """Sends a command to mpv via the IPC socket; failures reported by mpv are logged."""
+        return self._send_ipc_commands([cmd_args])[0]
+
+    def _send_ipc_commands(self, command_list):
+        """Sends several commands to mpv in one write; failures reported by mpv are logged."""
+        futures = self._ipc.commands(command_list)
+        for cmd_args, future in zip(command_list, futures):
+            future.add_done_callback(lambda done, cmd_args=cmd_args: self._report_failure(cmd_args, done))
+        return futures
+
+    def _report_failure(self, cmd_args, future):
+        error = future.exception()
+        if error is not None:
+            print(f"[Slideshow] IPC command {cmd_args[0]} failed: {error}")
+            if cmd_args[0] == 'set_property':
+                self._properties.invalidate(cmd_args[1])
+            elif cmd_args[0] in ('loadfile', 'loadlist', 'playlist-remove', 'playlist-move', 'playlist-clear'):
+                # mpv's playlist is no longer known; the next switch replaces it
+                self._image_files = None
+
+    def _write_playlist(self, paths):
+        """Writes paths to a temporary playlist file for loadlist; returns its path."""
+        fd, playlist_path = tempfile.mkstemp(prefix='gpio_slideshow_', suffix='.m3u')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(paths) + '\n')
+        return playlist_path
+
+    def _on_end_file(self, message):
+        """Logs files mpv could not display."""
+        if message.get('reason') == 'error':
+            print(f"[Slideshow] mpv could not play a file: {message.get('file_error', 'unknown error')}")
 
     def _find_images(self, folder_path):
-        """Finds image files in the specified folder."""
-        if not os.path.isdir(folder_path):
-            print(f"[Slideshow] Error: Folder not found or not accessible: {folder_path}")
-            return []
-
-        image_extensions = ('*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp')
-        files = []
-        print(f"[Slideshow] Searching for images in: {folder_path}")
-        for ext in image_extensions:
-            files.extend(glob.glob(os.path.join(folder_path, ext)))
-        files.sort()
-        print(f"[Slideshow] Found {len(files)} images.")
+        """Finds image files in the specified folder (from the listing cache when current)."""
+        files = self._image_cache.get(folder_path)
+        print(f"[Slideshow] Found {len(files)} images in: {folder_path}")
         return files
 
+    def _mpv_command(self, socket_path):
+        """Command line of an idle mpv listening on socket_path."""
+        return [
+            'mpv',
+            f'--input-ipc-server={socket_path}',
+            '--idle', # Start mpv in idle mode, waiting for commands
+            '--fs',   # Fullscreen
+            '--no-osc' # No on-screen controller
+        ]
+
     def _start_mpv(self):
         """Starts the mpv process with IPC enabled and idle."""
         if self._mpv_process and self._mpv_process.poll() is None:
             print("[Slideshow] mpv already running.")
             return self._mpv_process
 
-        command = [
-            'mpv',
-            f'--input-ipc-server={self._ipc_socket_path}',
-            '--idle', # Start mpv in idle mode, waiting for commands
-            '--fs',   # Fullscreen
-            '--no-osc' # No on-screen controller
-        ]
+        command = self._mpv_command(self._ipc_socket_path)
         print(f"[Slideshow] Starting mpv with IPC: {' '.join(command)}")
         try:
             # Clean up old socket file if it exists
@@ -142,6 +174,8 @@ class SlideshowManager(threading.Thread):
 
             if self._connect_ipc():
                 print("[Slideshow] mpv started and IPC connected successfully.")
+                threading.Thread(target=self._watch_process, args=(process,),
+                                 name="MpvWatchThread", daemon=True).start()
                 return process
             else:
                 print("[Slideshow] CRITICAL: Initial IPC connection failed after starting mpv. Terminating and attempting to get stderr.")
@@ -204,12 +238,104 @@ class SlideshowManager(threading.Thread):
                     pass
             return None
 
+    def _start_spare(self):
+        """Starts an idle spare mpv on the other socket, to take over if the playing one exits."""
+        socket_path = next(path for path in MPV_SOCKET_PATHS if path != self._ipc_socket_path)
+        try:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            process = subprocess.Popen(
+                self._mpv_command(socket_path),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        except Exception as e:
+            print(f"[Slideshow] Could not start spare mpv: {e}. Continuing without a spare.")
+            self._spare_wanted = False
+            return
+        print(f"[Slideshow] Spare mpv started with PID: {process.pid} ({socket_path}).")
+        self._spare = (process, socket_path, time.monotonic())
+        threading.Thread(target=self._watch_process, args=(process,),
+                         name="MpvWatchThread", daemon=True).start()
+
+    def _check_spare(self):
+        """Replaces a spare that exited, or starts one if none is running."""
+        if self._spare is not None:
+            process, _, started = self._spare
+            if process.poll() is None:
+                return
+            self._spare = None
+            print(f"[Slideshow] Spare mpv (PID: {process.pid}) exited with code {process.returncode}.")
+            if time.monotonic() - started < MPV_RESTART_RETRY_SECONDS:
+                # Exiting right after start is not going to get better by retrying
+                print("[Slideshow] Spare mpv exited right after starting. Continuing without a spare.")
+                self._spare_wanted = False
+        if self._spare_wanted and not self._shutdown_event.is_set():
+            self._start_spare()
+
+    def _promote_spare(self):
+        """Makes the spare mpv the playing one; False if there is no usable spare."""
+        spare, self._spare = self._spare, None
+        if spare is None:
+            return False
+        process, socket_path, _ = spare
+        if process.poll() is None and self._ipc.retarget(socket_path):
+            self._ipc_socket_path = socket_path
+            self._mpv_process = process
+            return True
+        print("[Slideshow] Spare mpv is not usable.")
+        self._stop_process(process, socket_path)
+        return False
+
+    def _stop_process(self, process, socket_path):
+        """Terminates (then kills) an mpv process and removes its socket."""
+        if process.poll() is None:
+            try:
+                process.terminate()
+                process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if os.path.exists(socket_path):
+            try:
+                os.remove(socket_path)
+            except OSError:
+                pass
+
+    def _watch_process(self, process):
+        """Wakes the slideshow thread as soon as an mpv process exits."""
+        process.wait()
+        self.notify()
+
+    def _on_ipc_disconnect(self):
+        """Remembers where the playlist was before any reconnect, then wakes the thread."""
+        self._position_at_disconnect = self._properties.get('playlist-pos')
+        self.notify()
+
+    def notify(self):
+        """Wakes the slideshow thread to re-check its state."""
+        with self._wake:
+            self._wake.notify()
+
+    def _has_work(self):
+        """Whether the slideshow thread needs to act (call with _lock held)."""
+        return (self._shutdown_event.is_set()
+                or self._target_folder_key != self._current_folder_key
+                or (self._mpv_process is not None and self._mpv_process.poll() is not None)
+                or (self._spare_wanted and (self._spare is None or self._spare[0].poll() is not None)))
+
     def _stop_mpv(self):
         """Stops the mpv slideshow subprocess gracefully using IPC and then terminate/kill."""
         print("[Slideshow] Attempting to stop mpv...")
-        if self._mpv_socket:
+        self._spare_wanted = False
+        spare, self._spare = self._spare, None
+        if spare is not None:
+            print(f"[Slideshow] Stopping spare mpv (PID: {spare[0].pid}).")
+            self._stop_process(spare[0], spare[1])
+        if self._ipc.connected:
             print("[Slideshow] Sending quit command via IPC.")
-            self._send_ipc_command(["quit"])
+            # mpv may exit before replying, so the result is not checked
+            self._ipc.command("quit")
             if self._mpv_process:
                 try:
                     self._mpv_process.wait(timeout=0.5)
@@ -217,9 +343,7 @@ class SlideshowManager(threading.Thread):
                 except subprocess.TimeoutExpired:
                     print("[Slideshow] mpv did not quit via IPC in time.")
                     pass
-            if self._mpv_socket:
-                self._mpv_socket.close()
-                self._mpv_socket = None
+            self._ipc.disconnect()
 
         if self._mpv_process and self._mpv_process.poll() is None:
             print(f"[Slideshow] mpv still running (PID: {self._mpv_process.pid}). Terminating...")
@@ -251,6 +375,7 @@ class SlideshowManager(threading.Thread):
                 if key != self._target_folder_key:
                     print(f"[Slideshow] Request received to switch to folder key: {key}")
                     self._target_folder_key = key
+                    self._wake.notify()
             else:
                 print(f"[Slideshow] Warning: Invalid folder key requested: {key}")
 
@@ -258,60 +383,148 @@ class SlideshowManager(threading.Thread):
         """Signals the thread to stop and cleans up mpv."""
         print("[Slideshow] Stop requested.")
         self._shutdown_event.set()
+        self.notify()
+        self._image_cache.stop()
+        if self._derivatives:
+            # Drops the images still queued, so exit does not wait for the whole build
+            self._derivatives.close()
         self._stop_mpv()
 
+    def _report_on_screen(self, key):
+        """Logs when the first image of a folder is actually displayed (mpv's playback-restart)."""
+        requested = time.monotonic()
+
+        def shown(future):
+            if future.exception() is None:
+                print(f"[Slideshow] Folder key {key} on screen after {(time.monotonic() - requested) * 1000:.0f} ms.")
+                profiler.first_frame()
+
+        self._ipc.next_event('playback-restart').add_done_callback(shown)
+
+    def _load_playlist(self, images, commands):
+        """Makes mpv's playlist `images` and plays it from the first image, after `commands`.
+
+        Returns the playlist as loaded (files already in the playlist under
+        another path are represented by the existing entries).
+
+        When the loaded playlist shares entries with the new one and editing it
+        takes fewer commands than the entries it keeps, only the difference is
+        sent; otherwise the playlist is replaced. Either way it is one write.
+        """
+        current = self._image_files
+        if current:
+            images = playlist_diff.reuse_entries(current, images, self._image_cache.identity)
+        edit = None
+        # A playlist can only be edited by entry when its entries are unique (a set
+        # may hold the same stored image twice)
+        if current and len(set(current)) == len(current) and len(set(images)) == len(images):
+            edit = playlist_diff.diff_playlist(current, images)
+        kept = len(images) - len(edit[1]) if edit else 0
+        playlist_path = None
+        loadlist_index = None
+
+        if edit and kept and playlist_diff.edit_cost(*edit) <= kept:
+            removals, additions, moves = edit
+            print(f"[Slideshow] Editing playlist ({len(images)} images): {len(removals)} removed, "
+                  f"{len(additions)} added, {len(moves)} moved.")
+            commands += [["playlist-remove", index] for index in removals]
+            if len(additions) == 1:
+                commands.append(["loadfile", additions[0], "append"])
+            elif additions:
+                playlist_path = self._write_playlist(additions)
+                loadlist_index = len(commands)
+                commands.append(["loadlist", playlist_path, "append"])
+            commands += [["playlist-move", source, destination] for source, destination in moves]
+            commands.append(["playlist-play-index", 0])
+        else:
+            print(f"[Slideshow] Loading image playlist ({len(images)} images).")
+            # Show the first image right away, then append the rest in a single loadlist
+            commands.append(["loadfile", images[0], "replace"])
+            if len(images) > 1:
+                playlist_path = self._write_playlist(images[1:])
+                loadlist_index = len(commands)
+                commands.append(["loadlist", playlist_path, "append"])
+
+        futures = self._send_ipc_commands(commands)
+        if playlist_path:
+            # mpv has read the file once loadlist replies
+            futures[loadlist_index].add_done_callback(lambda _, path=playlist_path: os.remove(path))
+        return images
+
+    def _load_folder(self, key_to_load):
+        """Replaces mpv's playlist with the images of a folder key."""
+        folder_path = self._folder_map.get(key_to_load)
+        resume, self._resume = self._resume, None
+        if folder_path:
+            if resume and resume[0] == key_to_load:
+                # Continue with the playlist that was playing, from the image that was showing
+                next_images = resume[1]
+                print(f"[Slideshow] Resuming folder key {key_to_load} where it was.")
+            else:
+                next_images = self._find_images(folder_path)
+            if next_images:
+                print(f"[Slideshow] Loading content for key {key_to_load}: {len(next_images)} items.")
+                self._report_on_screen(key_to_load)
+                if len(next_images) == 1 and next_images[0].lower().endswith('.gif'):
+                    print(f"[Slideshow] Loading single GIF: {next_images[0]}")
+                    self._send_ipc_commands([["loadfile", next_images[0], "replace"]] + self._properties.set_commands({
+                        "loop-file": "inf",
+                        "loop-playlist": "no",
+                    }))
+                else:
+                    commands = self._properties.set_commands({
+                        "image-display-duration": self._delay_seconds,
+                        "loop-playlist": "inf",
+                        "loop-file": "no",
+                    })
+                    next_images = self._load_playlist(next_images, commands)
+
+                self._image_files = next_images
+            else:
+                print(f"[Slideshow] No images found for key {key_to_load}. Clearing playlist.")
+                self._send_ipc_command(["playlist-clear"])
+                # playlist-clear keeps the entry that is playing
+                self._image_files = None
+        else:
+            print(f"[Slideshow] Folder path not found for key {key_to_load}. Clearing playlist.")
+            self._send_ipc_command(["playlist-clear"])
+            self._image_files = None
+        with self._lock:
+            self._current_folder_key = key_to_load
+
     def run(self):
         """Main loop for the slideshow manager thread."""
         print("[Slideshow] Thread started.")
+        # Lists the folders while mpv starts
+        self._image_cache.start()
         
-        self._mpv_process = self._start_mpv()
+        with profiler.phase("start mpv"):
+            self._mpv_process = self._start_mpv()
         if not self._mpv_process:
             print("[Slideshow] Failed to start mpv initially. Thread will exit.")
             return
 
         while not self._shutdown_event.is_set():
-            folder_changed = False
-            key_to_load = None
+            if self._mpv_process is None:
+                self._mpv_process = self._start_mpv()
+                if not self._mpv_process:
+                    self._shutdown_event.wait(timeout=MPV_RESTART_RETRY_SECONDS)
+                    continue
 
+            key_to_load = None
             with self._lock:
+                # Sleep until set_folder_key, mpv exiting or stop() wakes us
+                self._wake.wait_for(self._has_work)
+                if self._shutdown_event.is_set():
+                    break
                 if self._target_folder_key != self._current_folder_key:
-                    folder_changed = True
                     key_to_load = self._target_folder_key
                     print(f"[Slideshow] Detected change: Target={key_to_load}, Current={self._current_folder_key}")
 
-            if folder_changed and key_to_load is not None:
-                folder_path = self._folder_map.get(key_to_load)
-                if folder_path:
-                    next_images = self._find_images(folder_path)
-                    if next_images:
-                        print(f"[Slideshow] Loading content for key {key_to_load}: {len(next_images)} items.")
-                        if len(next_images) == 1 and next_images[0].lower().endswith('.gif'):
-                            print(f"[Slideshow] Loading single GIF: {next_images[0]}")
-                            self._send_ipc_command(["loadfile", next_images[0], "replace"])
-                            self._send_ipc_command(["set_property", "loop-file", "inf"])
-                            self._send_ipc_command(["set_property", "loop-playlist", "no"])
-                        else:
-                            print(f"[Slideshow] Loading image playlist ({len(next_images)} images).")
-                            self._send_ipc_command(["playlist-clear"])
-                            for img_path in next_images:
-                                self._send_ipc_command(["loadfile", img_path, "append"])
-                            self._send_ipc_command(["set_property", "image-display-duration", self._delay_seconds])
-                            self._send_ipc_command(["set_property", "loop-playlist", "inf"])
-                            self._send_ipc_command(["set_property", "loop-file", "no"])
-                            self._send_ipc_command(["playlist-play-index", 0])
-                        
-                        self._image_files = next_images
-                        self._current_folder_key = key_to_load
-                    else:
-                        print(f"[Slideshow] No images found for key {key_to_load}. Clearing playlist.")
-                        self._send_ipc_command(["playlist-clear"])
-                        self._image_files = []
-                        self._current_folder_key = key_to_load
-                else:
-                    print(f"[Slideshow] Folder path not found for key {key_to_load}. Clearing playlist.")
-                    self._send_ipc_command(["playlist-clear"])
-                    self._image_files = []
-                    self._current_folder_key = key_to_load
+            if key_to_load is not None:
+                self._load_folder(key_to_load)
+
+            self._check_spare()
 
             if self._mpv_process and self._mpv_process.poll() is not None:
                 return_code = self._mpv_process.returncode
@@ -325,17 +538,33 @@ class SlideshowManager(threading.Thread):
                 if stderr_output:
                     print(f"[Slideshow] mpv stderr: {stderr_output.strip()}")
 
-                if self._mpv_socket:
-                    self._mpv_socket.close()
-                    self._mpv_socket = None
+                # Where the playlist was, to resume there
+                playing = self._image_files
+                position, self._position_at_disconnect = self._position_at_disconnect, None
+                if position is None:
+                    position = self._properties.get('playlist-pos')
+                if playing and isinstance(position, int) and 0 <= position < len(playing):
+                    now, image = time.monotonic(), playing[position]
+                    last_crash, self._last_crash = self._last_crash, (now, image)
+                    if last_crash and last_crash[1] == image and now - last_crash[0] < MPV_REPEAT_CRASH_SECONDS:
+                        # The same image took mpv down twice in a row; drop it from the resumed playlist
+                        print(f"[Slideshow] mpv exited on {image} again; dropping it from the playlist.")
+                        self._image_files = playing = playing[:position] + playing[position + 1:]
+                        position = position % len(playing) if playing else 0
+                    self._resume = (self._current_folder_key, playing[position:] + playing[:position])
+
+                self._ipc.disconnect()
                 self._mpv_process = None
-                self._current_folder_key = None
+                self._image_files = []
+                with self._lock:
+                    self._current_folder_key = None
 
                 if not self._shutdown_event.is_set():
-                    print("[Slideshow] mpv exited unexpectedly. Attempting to restart...")
-                    self._mpv_process = self._start_mpv()
-
-            self._shutdown_event.wait(timeout=0.2)
+                    self._spare_wanted = MPV_HOT_SPARE
+                    if self._promote_spare():
+                        print(f"[Slideshow] mpv exited unexpectedly. Spare mpv (PID: {self._mpv_process.pid}) took over.")
+                    else:
+                        print("[Slideshow] mpv exited unexpectedly. Attempting to restart...")
 
         self._stop_mpv()
         print("[Slideshow] Thread finished.")
\ No newline at end of file
@@ -1,7 +1,11 @@
 from pyA64.gpio import port
-from pyA64.gpio import gpio
 import time
 
+from atc_engine.gpio_broker import open_gpio
+
+# Reads through the shared GPIO broker when one is running
+gpio = open_gpio()
+
 gpio.init()
 # Set GPIO 17 as output
 # led = port.PC4
@@ -1,17 +1,16 @@
-import subprocess
 import time
 import sys
-import os
 
-# Import the correct GPIO module from pyA64
-# You might need to adjust the import based on how pyA64 is structured and the pin name
+# Read the button through the shared GPIO broker if one is running, else directly through pyA64
 try:
-    from pyA64.gpio import port
-    from pyA64.gpio import gpio
+    from atc_engine.gpio_broker import open_gpio
+    gpio = open_gpio()
 except ImportError:
     print("Error: pyA64 library not found. Please install it (`sudo pip3 install pyA64`).")
     sys.exit(1)
 
+from atc_engine.display_power import create_display_power
+
 # --- Configuration ---
 HDMI_OUTPUT_NAME = 'HDMI-1' # Identified from xrandr output
 # Find the correct pyA64 port object for your chosen GPIO pin
@@ -33,63 +32,15 @@ except Exception as e:
     print("Please ensure you are running with sudo and the pyA64 library is correctly installed.")
     sys.exit(1)
 
-# --- HDMI Control Functions ---
-def run_xrandr_command(args):
-    """Runs an xrandr command with the DISPLAY environment variable set."""
-    # Create a copy of the current environment variables
-    env = os.environ.copy()
-    # Set the DISPLAY environment variable to point to the local display
-    env['DISPLAY'] = ':0'
-    try:
-        # Use a higher timeout in case xrandr is slow to respond
-        result = subprocess.run(['xrandr'] + args, capture_output=True, text=True, check=True, env=env, timeout=5)
-        return result.stdout
-    except FileNotFoundError:
-        print("Error: xrandr command not found. Is X11 installed and in the PATH?")
-        return None
-    except subprocess.CalledProcessError as e:
-        print(f"Error running xrandr command: {' '.join(['xrandr'] + args)}\n{e}")
-        print(f"Stderr: {e.stderr}")
-        return None
-    except subprocess.TimeoutExpired:
-        print(f"Error: xrandr command timed out: {' '.join(['xrandr'] + args)}")
-        return None
-
-
-# def is_hdmi_on():
-#     """Checks if the HDMI output is currently active using xrandr."""
-#     output = run_xrandr_command([]) # Run xrandr with no arguments to get status
-#     if output is not None:
-#         output_lines = output.splitlines()
-#         for line in output_lines:
-#             if HDMI_OUTPUT_NAME in line:
-#                 # Check for " connected" (with a space) to be precise
-#                 return " connected" in line
-#     return False
-
-is_hdmi_on = True
-
-def turn_off_hdmi():
-    """Turns off the HDMI output using xrandr."""
-    global is_hdmi_on
-    print(f"Attempting to turn off {HDMI_OUTPUT_NAME}...")
-    print(f"Current HDMI state before turning off: {is_hdmi_on}")
-    result = run_xrandr_command(['--output', HDMI_OUTPUT_NAME, '--off'])
-    if result is not None:
-        print(f"{HDMI_OUTPUT_NAME} turned off.")
-        is_hdmi_on = False
-        print(f"HDMI state after turning off: {is_hdmi_on}")
-
-def turn_on_hdmi():
-    """Turns on the HDMI output using xrandr."""
-    global is_hdmi_on
-    print(f"Attempting to turn on {HDMI_OUTPUT_NAME}...")
-    print(f"Current HDMI state before turning on: {is_hdmi_on}")
-    result = run_xrandr_command(['--output', HDMI_OUTPUT_NAME, '--auto'])
-    if result is not None:
-        print(f"{HDMI_OUTPUT_NAME} turned on.")
-        is_hdmi_on = True
-        print(f"HDMI state after turning on: {is_hdmi_on}")
+# --- HDMI Control ---
+# The best available backend (DPMS over a persistent X connection, sysfs, or a
+# long-lived xrandr helper) serves every toggle, and the output state is
+# queried once at startup and cached instead of tracked in a global.
+display_power = create_display_power({'display': ':0', 'display_output': HDMI_OUTPUT_NAME})
+if display_power is None:
+    print("Error setting up HDMI control: no display power backend available")
+    print("Is X11 running with python-xlib or xrandr installed?")
+    sys.exit(1)
 
 # --- Main Loop ---
 print("Script started. Press the button to toggle HDMI output.")
@@ -104,10 +55,7 @@ try:
             print("Button pressed!")
             time.sleep(DEBOUNCE_DELAY) # Debounce
 
-            if is_hdmi_on:
-                turn_off_hdmi()
-            else:
-                turn_on_hdmi()
+            display_power.toggle()
 
         last_button_state = current_button_state
         time.sleep(0.01) # Small delay to reduce CPU usage
@@ -119,6 +67,7 @@ except Exception as e:
     import traceback
     traceback.print_exc()
 finally:
+    display_power.close()
     # Ensure GPIO cleanup is called even if an error occurs
     try:
         gpio.cleanup() # Clean up GPIO settings on exit
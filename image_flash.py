@@ -1,15 +1,16 @@
-import pygame
+import argparse
 import os
 import sys
 import time
 
-# Import the correct GPIO module from pyA64
-try:
-    from pyA64.gpio import port
-    from pyA64.gpio import gpio
-except ImportError:
-    print("Error: pyA64 library not found. Please install it (`sudo pip3 install pyA64`).")
-    sys.exit(1)
+from atc_engine.config_loader import DEFAULT_CACHE_DIR
+from atc_engine.frame_cache import FrameCache
+from atc_engine.framebuffer import FramebufferGeometry
+from atc_engine.startup_profile import profiler
+
+# pygame and the pyA64 GPIO module are imported by import_dependencies()
+pygame = None
+gpio = None
 
 # --- Configuration ---
 
@@ -48,8 +49,24 @@ IMAGE_FILES = [
 # Debounce delay in seconds. Prevents multiple triggers from a single button press.
 DEBOUNCE_DELAY = 0.2
 
+# Pre-scaled raw frames are kept here so later starts skip decoding and scaling.
+FRAME_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "frames")
+
 # --- Script Logic ---
 
+def import_dependencies():
+    """Imports pygame and the GPIO module (the shared broker if running, else pyA64) on first use."""
+    global pygame, gpio
+    with profiler.phase("import pygame"):
+        import pygame
+    with profiler.phase("import pyA64"):
+        try:
+            from atc_engine.gpio_broker import open_gpio
+            gpio = open_gpio()
+        except ImportError:
+            print("Error: pyA64 library not found. Please install it (`sudo pip3 install pyA64`).")
+            sys.exit(1)
+
 def load_and_scale_image(file_path, screen_size):
     """Loads an image, scales it to fit the screen while maintaining aspect ratio, and returns the scaled image and its centered position."""
     try:
@@ -77,25 +94,41 @@ def load_and_scale_image(file_path, screen_size):
 
     return img_scaled, (pos_x, pos_y)
 
+def load_cached_image(frame_cache, file_path, screen_size):
+    """Loads a pre-scaled frame from the frame cache, building the entry on first use."""
+    frame = frame_cache.get(file_path)
+    if frame is None:
+        return None, None
+    # Cached frames are full-screen BGRX; convert() drops the unused alpha byte
+    img = pygame.image.frombuffer(frame, screen_size, 'BGRA').convert()
+    return img, (0, 0)
+
 def main():
-    pygame.init()
+    import_dependencies()
 
-    # Set up fullscreen display
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    screen_info = pygame.display.Info()
-    screen_size = (screen_info.current_w, screen_info.current_h)
+    with profiler.phase("init display"):
+        pygame.init()
 
-    pygame.mouse.set_visible(False) # Hide mouse cursor
+        # Set up fullscreen display
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        screen_info = pygame.display.Info()
+        screen_size = (screen_info.current_w, screen_info.current_h)
+
+        pygame.mouse.set_visible(False) # Hide mouse cursor
 
     print("Loading images...")
-    loaded_images_data = []
-    for img_file in IMAGE_FILES:
-        img_data, pos = load_and_scale_image(img_file, screen_size)
-        if img_data:
-            loaded_images_data.append((img_data, pos))
-        else:
-            print(f"Skipping image {img_file}")
-            loaded_images_data.append((None, None)) # Placeholder for skipped image
+    with profiler.phase("load images"):
+        frame_cache = FrameCache(FRAME_CACHE_DIR, FramebufferGeometry(*screen_size))
+        loaded_images_data = []
+        for img_file in IMAGE_FILES:
+            img_data, pos = load_cached_image(frame_cache, img_file, screen_size)
+            if not img_data:
+                img_data, pos = load_and_scale_image(img_file, screen_size)
+            if img_data:
+                loaded_images_data.append((img_data, pos))
+            else:
+                print(f"Skipping image {img_file}")
+                loaded_images_data.append((None, None)) # Placeholder for skipped image
 
     if not any(img is not None for img, pos in loaded_images_data):
         print("No images loaded successfully. Exiting.")
@@ -107,7 +140,8 @@ def main():
 
     print("Initializing GPIO (using pyA64.gpio)...")
     try:
-        gpio.init()
+        with profiler.phase("init GPIO"):
+            gpio.init()
         valid_buttons = []
         for pin in BUTTON_GPIO_PINS:
             try:
@@ -157,6 +191,7 @@ def main():
     if loaded_images_data[current_image_index][0]:
         screen.blit(loaded_images_data[current_image_index][0], loaded_images_data[current_image_index][1])
     pygame.display.flip()
+    profiler.first_frame()
 
     print("Starting display loop. Press buttons to change images. Press Ctrl+C in terminal or Esc/q on keyboard to exit.")
 
@@ -220,6 +255,12 @@ def main():
     sys.exit()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flash an image selected by GPIO buttons.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print per-phase import and init times once the first frame is shown")
+    if parser.parse_args().profile_startup:
+        profiler.enable()
+
     # pyA64.gpio often requires root access
     if os.geteuid() != 0:
         print("Warning: Not running as root. pyA64.gpio might require root access.")
@@ -6,8 +6,13 @@ import os
 import signal
 import sys
 
+from atc_engine.startup_profile import profiler
+
 IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp']
 
+# Printed by mpv when the first file starts playing (only with --profile-startup)
+FIRST_FRAME_MARKER = '@@mpv-viewer-first-frame@@'
+
 def check_mpv_installed():
     """Checks if mpv is installed and exits if not."""
     try:
@@ -31,6 +36,21 @@ def find_image_files(directory):
                 image_files.append(os.path.join(root, file))
     return image_files
 
+def run_mpv(mpv_cmd):
+    """Runs mpv to completion, reporting the startup profile when it starts playing."""
+    if not profiler.enabled:
+        return subprocess.run(mpv_cmd, check=False) # check=False to handle mpv's own exit codes
+
+    mpv_cmd = mpv_cmd[:1] + [f'--term-playing-msg={FIRST_FRAME_MARKER}'] + mpv_cmd[1:]
+    process = subprocess.Popen(mpv_cmd, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.strip() == FIRST_FRAME_MARKER:
+            profiler.first_frame()
+        else:
+            print(line, end='')
+    process.wait()
+    return process
+
 def handle_sigint(signum, frame):
     """Handles SIGINT (Ctrl+C) for graceful exit."""
     print("\nExiting viewer...")
@@ -39,13 +59,18 @@ def handle_sigint(signum, frame):
 def main():
     """Main function to parse arguments and display images with mpv."""
     signal.signal(signal.SIGINT, handle_sigint)
-    check_mpv_installed()
 
     parser = argparse.ArgumentParser(description="Display images and animated GIFs using mpv.")
     parser.add_argument("path", help="Path to an image file or a folder containing images.")
     parser.add_argument("-d", "--delay", type=int, default=3, help="Delay in seconds between images in slideshow mode (default: 3).")
+    parser.add_argument("--profile-startup", action="store_true", help="Print per-phase startup times once mpv shows the first image.")
 
     args = parser.parse_args()
+    if args.profile_startup:
+        profiler.enable()
+
+    with profiler.phase("check mpv"):
+        check_mpv_installed()
 
     mpv_base_cmd = ['mpv', '--fs', '--no-osc']
     mpv_process = None
@@ -68,17 +93,18 @@ def main():
                 # For other single images, combine base command, loop option, and path
                 mpv_cmd = mpv_base_cmd + ['--loop-file=inf', args.path]
             
-            mpv_process = subprocess.run(mpv_cmd, check=False) # check=False to handle mpv's own exit codes
+            mpv_process = run_mpv(mpv_cmd)
 
         elif os.path.isdir(args.path):
-            image_files = find_image_files(args.path)
+            with profiler.phase("find images"):
+                image_files = find_image_files(args.path)
             if not image_files:
                 print(f"Error: No image files found in directory '{args.path}'.", file=sys.stderr)
                 sys.exit(1)
 
             print(f"Starting mpv slideshow for directory: {args.path} with {args.delay}s delay (looping indefinitely).")
             mpv_cmd = mpv_base_cmd + [f'--image-display-duration={args.delay}', '--loop-playlist=inf'] + image_files
-            mpv_process = subprocess.run(mpv_cmd, check=False)
+            mpv_process = run_mpv(mpv_cmd)
 
         else:
             print(f"Error: Path '{args.path}' is not a valid file or directory.", file=sys.stderr)
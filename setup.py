@@ -18,7 +18,7 @@ setup(
             "mypy",
         ]
     },
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     entry_points={
         "console_scripts": [
             "atc-engine=atc_engine.main:main",
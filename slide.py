@@ -2,14 +2,28 @@ import os
 import argparse
 import signal
 import sys
-from PIL import Image, ImageTk
-import tkinter as tk
+
+from atc_engine.startup_profile import profiler
+
+# GUI modules are imported by import_gui_modules() once the arguments are valid
+Image = None
+ImageTk = None
+tk = None
+
+def import_gui_modules():
+    """Imports PIL and tkinter on first use."""
+    global Image, ImageTk, tk
+    with profiler.phase("import PIL"):
+        from PIL import Image, ImageTk
+    with profiler.phase("import tkinter"):
+        import tkinter as tk
 
 class SlideShowApp:
     def __init__(self, root, image_folder):
         self.root = root
         self.image_folder = image_folder
         self.images = []
+        self.resized_images = {}  # (index, width, height) -> resized image
         self.current_image_index = 0
         self.delay = 3000 
 
@@ -36,7 +50,8 @@ class SlideShowApp:
         self.canvas.pack(expand=True, fill=tk.BOTH)
 
         # Load images from the folder
-        self.load_images()
+        with profiler.phase("load images"):
+            self.load_images()
 
         # Wait for the window to update before showing the first image
         self.root.update_idletasks()
@@ -59,6 +74,17 @@ class SlideShowApp:
             print("No valid images found in the folder.")
             exit()
 
+    def resize_to_fit(self, image, width, height):
+        # Resize the image to fit the window while preserving aspect ratio
+        image_width, image_height = image.size
+        scale_factor = min(width / image_width, height / image_height)
+
+        # Calculate new dimensions preserving aspect ratio, at least 1 pixel
+        new_width = max(1, int(image_width * scale_factor))
+        new_height = max(1, int(image_height * scale_factor))
+
+        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
     def show_next_image(self):
         if self.images:
             # Update window size in case of resize
@@ -70,25 +96,13 @@ class SlideShowApp:
                 updated_width = self.window_width
                 updated_height = self.window_height
             
-            # Get the next image
-            image = self.images[self.current_image_index]
-
-            # Resize the image to fit the window while preserving aspect ratio
-            image_width, image_height = image.size
-            width_ratio = updated_width / image_width
-            height_ratio = updated_height / image_height
-            scale_factor = min(width_ratio, height_ratio)
-            
-            # Calculate new dimensions preserving aspect ratio
-            new_width = int(image_width * scale_factor)
-            new_height = int(image_height * scale_factor)
-            
-            # Ensure dimensions are at least 1 pixel
-            new_width = max(1, new_width)
-            new_height = max(1, new_height)
-            
-            # Resize the image with preserved aspect ratio
-            resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            # Reuse the resized image unless the window size changed
+            cache_key = (self.current_image_index, updated_width, updated_height)
+            resized_image = self.resized_images.get(cache_key)
+            if resized_image is None:
+                resized_image = self.resize_to_fit(self.images[self.current_image_index], updated_width, updated_height)
+                self.resized_images[cache_key] = resized_image
+            new_width, new_height = resized_image.size
             self.photo = ImageTk.PhotoImage(resized_image)
 
             # Clear the canvas and draw the new image centered
@@ -118,19 +132,29 @@ def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description="Image slideshow application")
     parser.add_argument("folder", help="Path to the folder containing images")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print per-phase import and init times once the first frame is shown")
     args = parser.parse_args()
+    if args.profile_startup:
+        profiler.enable()
 
     # Validate if the folder exists
     if not os.path.isdir(args.folder):
         print(f"Error: The folder '{args.folder}' does not exist.")
         return
 
+    import_gui_modules()
+
     # Create the Tkinter root window
-    root = tk.Tk()
+    with profiler.phase("create window"):
+        root = tk.Tk()
 
     # Start the slideshow app
     app = SlideShowApp(root, args.folder)
 
+    # The first image is drawn on the first idle pass of the event loop
+    root.after_idle(profiler.first_frame)
+
     # Start the Tkinter event loop
     try:
         root.mainloop()
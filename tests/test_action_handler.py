@@ -0,0 +1,53 @@
+from atc_engine.action_handler import ActionHandler
+
+
+class FakeRenderer:
+    name = 'fake'
+
+    def __init__(self):
+        self.played = []
+        self.stops = 0
+        self.closes = 0
+
+    def play(self, mode, path):
+        self.played.append(path)
+        return True
+
+    def stop(self):
+        self.stops += 1
+
+    def close(self):
+        self.closes += 1
+
+
+def make_handler():
+    config = {
+        'buttons': {'btn1': {'value': 32, 'mode': 'press'}},
+        'media': {
+            'home': {'mode': 'still', 'path': 'home.png'},
+            'alert': {'mode': 'still', 'button': 'btn1', 'path': 'alert.png'},
+        },
+        'actions': {},
+        'settings': {'default_media_name': 'home', 'default_combo_hold_time': 0.0},
+    }
+    renderer = FakeRenderer()
+    return ActionHandler(config, renderers={'still': renderer}), renderer
+
+
+def test_cleanup_does_not_bring_up_the_default_media():
+    handler, renderer = make_handler()
+    handler.trigger_media('alert')
+    handler.cleanup()
+    assert renderer.played == ['alert.png']
+    assert renderer.stops == 1
+    assert renderer.closes == 1
+
+
+def test_cleanup_twice_closes_renderers_once():
+    handler, renderer = make_handler()
+    handler.trigger_media('alert')
+    handler.cleanup()
+    handler.cleanup()
+    handler.trigger_media('home')
+    assert renderer.closes == 1
+    assert renderer.played == ['alert.png']
@@ -0,0 +1,112 @@
+from atc_engine.button_manager import ButtonManager
+
+PRESSED, RELEASED = 0, 1
+
+
+def make_config():
+    return {
+        'buttons': {
+            'btn5': {'value': 36, 'mode': 'press'},
+            'btn6': {'value': 68, 'mode': 'press'},
+        },
+        'media': {
+            'keep_left': {'mode': 'still', 'button': 'btn5', 'path': 'keep_left.gif'},
+            'thank_you': {'mode': 'still', 'button': ['btn5', 'btn6'], 'path': 'thank_you.gif'},
+        },
+        'actions': {},
+        'gestures': {},
+        'settings': {'default_combo_hold_time': 0.0, 'debounce_time': 0.0},
+    }
+
+
+def tick(manager, **states):
+    for name, state in states.items():
+        manager.update_button_state(name, state)
+    return manager.get_active_combinations()
+
+
+def test_superset_fires_instead_of_subset():
+    manager = ButtonManager(make_config())
+    assert tick(manager, btn5=PRESSED, btn6=PRESSED) == [('btn5', 'btn6')]
+
+
+def test_subset_stays_suppressed_when_superset_buttons_released_one_by_one():
+    manager = ButtonManager(make_config())
+    assert tick(manager, btn5=PRESSED, btn6=PRESSED) == [('btn5', 'btn6')]
+    # btn5 alone is still held, but it belongs to the combination that fired
+    assert tick(manager, btn6=RELEASED) == []
+    assert tick(manager) == []
+    assert tick(manager, btn5=RELEASED) == []
+
+
+def test_subset_fires_again_after_full_release():
+    manager = ButtonManager(make_config())
+    tick(manager, btn5=PRESSED, btn6=PRESSED)
+    tick(manager, btn6=RELEASED)
+    tick(manager, btn5=RELEASED)
+    assert tick(manager, btn5=PRESSED) == [('btn5',)]
+
+
+def test_superset_fires_again_while_one_button_held():
+    manager = ButtonManager(make_config())
+    tick(manager, btn5=PRESSED, btn6=PRESSED)
+    tick(manager, btn6=RELEASED)
+    assert tick(manager, btn6=PRESSED) == [('btn5', 'btn6')]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_bouncing_press_is_one_tap(monkeypatch):
+    from atc_engine import button_manager
+
+    clock = FakeClock()
+    monkeypatch.setattr(button_manager, 'time', clock)
+    config = make_config()
+    config['settings']['debounce_time'] = 0.02
+    config['gestures'] = {'tap5': {'type': 'tap', 'button': 'btn5', 'media': 'keep_left'}}
+    manager = ButtonManager(config)
+
+    # Contacts chatter for a few milliseconds on press and on release, polled every 2 ms
+    levels = [PRESSED, RELEASED, PRESSED, RELEASED] + [PRESSED] * 50 + [RELEASED, PRESSED, RELEASED] + [RELEASED] * 300
+    edges = 0
+    for level in levels:
+        was_pressed = manager.is_button_pressed('btn5')
+        manager.update_button_state('btn5', level)
+        edges += manager.is_button_pressed('btn5') != was_pressed
+        clock.now += 0.002
+    assert edges == 2
+    assert [gesture.name for gesture in manager.poll_gestures()] == ['tap5']
+
+
+def test_layer_gesture_fires_only_on_its_layer(monkeypatch):
+    from atc_engine import button_manager
+
+    clock = FakeClock()
+    monkeypatch.setattr(button_manager, 'time', clock)
+    config = make_config()
+    config['buttons']['shift'] = {'value': 71, 'mode': 'toggle', 'layer': 'alt'}
+    config['gestures'] = {
+        'tap5': {'type': 'tap', 'button': 'btn5', 'media': 'keep_left'},
+        'tap6_alt': {'type': 'tap', 'button': 'btn6', 'media': 'thank_you', 'layer': 'alt'},
+    }
+    manager = ButtonManager(config)
+
+    def tap(button):
+        manager.update_button_state(button, PRESSED)
+        clock.now += 0.05
+        manager.update_button_state(button, RELEASED)
+        clock.now += 1.0
+        return [gesture.name for gesture in manager.poll_gestures()]
+
+    assert tap('btn6') == []
+    assert tap('btn5') == ['tap5']
+    tap('shift')
+    assert manager.active_layer == 'alt'
+    assert tap('btn6') == ['tap6_alt']
+    assert tap('btn5') == ['tap5']
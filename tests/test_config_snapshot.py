@@ -0,0 +1,39 @@
+import json
+import os
+
+from atc_engine.config_snapshot import load_compiled_config
+
+
+def write_config(tmp_path, cache_dir):
+    image = tmp_path / 'home.png'
+    image.write_bytes(b'')
+    config = {
+        'buttons': {'btn1': {'value': 32, 'mode': 'press'}},
+        'media': {'home': {'mode': 'still', 'path': str(image)}},
+        'actions': {},
+        'settings': {'default_media_name': 'home', 'cache_dir': str(cache_dir)},
+    }
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps(config))
+    return str(config_path)
+
+
+def test_snapshot_is_written_to_the_configured_cache_dir(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    config_path = write_config(tmp_path, cache_dir)
+    load_compiled_config(config_path)
+    assert len(os.listdir(cache_dir / 'snapshots')) == 1
+
+
+def test_snapshot_is_reused_until_the_config_changes(tmp_path, capsys):
+    config_path = write_config(tmp_path, tmp_path / 'cache')
+    load_compiled_config(config_path)
+    load_compiled_config(config_path)
+    assert 'Loaded compiled configuration' in capsys.readouterr().out
+
+    with open(config_path, 'a') as f:
+        f.write('\n')
+    load_compiled_config(config_path)
+    assert 'Loaded compiled configuration' not in capsys.readouterr().out
+    load_compiled_config(config_path)
+    assert 'Loaded compiled configuration' in capsys.readouterr().out
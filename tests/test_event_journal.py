@@ -0,0 +1,17 @@
+from atc_engine.event_journal import EventJournal, read_journal
+
+
+def test_reopen_keeps_previous_run(tmp_path):
+    path = str(tmp_path / 'event_journal.bin')
+    first = EventJournal()
+    first.open(path, capacity=16)
+    first.mark('before crash')
+    first.close()
+
+    second = EventJournal()
+    second.open(path, capacity=16)
+    second.mark('after restart')
+    second.close()
+
+    assert [event.text for event in read_journal(path + '.prev')] == ['before crash']
+    assert [event.text for event in read_journal(path)] == ['after restart']
@@ -0,0 +1,25 @@
+import os
+
+from PIL import Image
+
+from atc_engine.frame_cache import FrameCache
+from atc_engine.framebuffer import FramebufferGeometry
+
+
+def test_rebuilding_an_edited_image_evicts_its_old_entry(tmp_path):
+    source = str(tmp_path / 'a.png')
+    other = str(tmp_path / 'b.png')
+    Image.new('RGB', (8, 8), 'red').save(source)
+    Image.new('RGB', (8, 8), 'blue').save(other)
+    cache_dir = str(tmp_path / 'frames')
+    cache = FrameCache(cache_dir, FramebufferGeometry(4, 4))
+    try:
+        assert cache.get(source) is not None
+        assert cache.get(other) is not None
+        Image.new('RGB', (8, 8), 'green').save(source)
+        st = os.stat(source)
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert cache.get(source) is not None
+    finally:
+        cache.close()
+    assert len(os.listdir(cache_dir)) == 2
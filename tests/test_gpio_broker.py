@@ -0,0 +1,91 @@
+import os
+import struct
+import threading
+import time
+
+import pytest
+
+from atc_engine import gpio_broker
+from atc_engine.gpio_broker import BrokerUnavailable, GPIOBroker, GPIOSubscriber, SharedState
+
+
+class FakeGPIO(gpio_broker.SimulatedGPIO):
+    def __init__(self):
+        self.levels = {}
+
+    def input(self, pin):
+        return self.levels.get(pin, 1)
+
+
+def dead_pid():
+    pid = 99999
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid -= 1
+
+
+def test_reader_gives_up_when_broker_dies_mid_write(tmp_path):
+    path = str(tmp_path / 'state')
+    writer = SharedState(path, writable=True)
+    seq = writer.begin_write()
+    writer.write_header(1, seq, 0.0, 0)
+    writer.end_write(seq)
+    writer.begin_write()  # Left open, as by a broker killed mid-update
+    struct.pack_into('<I', writer._mm, gpio_broker._PID_OFFSET, dead_pid())
+    reader = SharedState(path)
+    started = time.monotonic()
+    with pytest.raises(BrokerUnavailable):
+        reader.pin_state(0)
+    assert time.monotonic() - started < gpio_broker.READ_TIMEOUT
+
+
+def start_broker(gpio, pins, shm_path, control_path, allowed_pins=None):
+    broker = GPIOBroker(gpio, pins, 0.005, shm_path, control_path, allowed_pins)
+    thread = threading.Thread(target=broker.run, daemon=True)
+    thread.start()
+    return broker, thread
+
+
+def test_subscriber_resubscribes_after_broker_restart(tmp_path, monkeypatch):
+    shm_path, control_path = str(tmp_path / 'state'), str(tmp_path / 'control.sock')
+    gpio = FakeGPIO()
+    gpio.levels = {5: 0, 7: 1}
+    broker, thread = start_broker(gpio, [5], shm_path, control_path)
+    subscriber = GPIOSubscriber(shm_path, control_path)
+    subscriber.setcfg(5, subscriber.INPUT)
+    assert subscriber.input(5) == 0
+    broker.stop()
+    thread.join()
+
+    # The restarted broker publishes the pins in another order and has another PID
+    monkeypatch.setattr(gpio_broker.os, 'getpid', lambda: 424242)
+    broker, thread = start_broker(gpio, [7], shm_path, control_path, allowed_pins=[5])
+    try:
+        assert subscriber.input(5) == 0
+        assert subscriber.input(7) == 1
+    finally:
+        broker.stop()
+        thread.join()
+        subscriber.cleanup()
+
+
+def test_control_socket_is_owner_only_and_add_is_limited_to_allowed_pins(tmp_path):
+    shm_path, control_path = str(tmp_path / 'state'), str(tmp_path / 'control.sock')
+    gpio = FakeGPIO()
+    broker, thread = start_broker(gpio, [5], shm_path, control_path, allowed_pins=[7])
+    subscriber = GPIOSubscriber(shm_path, control_path)
+    try:
+        assert os.stat(control_path).st_mode & 0o777 == 0o600
+        subscriber.setcfg(7, subscriber.INPUT)
+        with pytest.raises(RuntimeError):
+            subscriber.setcfg(9, subscriber.INPUT)
+        assert [pin for pin, _, _ in broker._state.pins()] == [5, 7]
+    finally:
+        broker.stop()
+        thread.join()
+        subscriber.cleanup()
@@ -0,0 +1,63 @@
+from atc_engine import button_manager
+from atc_engine.button_manager import ButtonManager
+from atc_engine.gpio_handler import GPIOMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeActionHandler:
+    def __init__(self):
+        self.states = []
+
+    def handle_button_state(self, state):
+        self.states.append(state)
+
+    def trigger_media(self, name):
+        pass
+
+    def trigger_action(self, name):
+        pass
+
+
+def make_monitor(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(button_manager, 'time', clock)
+    config = {
+        'buttons': {'btn1': {'value': 32, 'mode': 'press'}},
+        'media': {},
+        'actions': {},
+        'gestures': {'tap1': {'type': 'tap', 'button': 'btn1', 'media': 'home'}},
+        'settings': {'debounce_time': 0.02, 'poll_interval': 0.05, 'default_combo_hold_time': 0.0},
+    }
+    manager = ButtonManager(config)
+    return GPIOMonitor(config, manager, FakeActionHandler()), manager, clock
+
+
+def test_press_and_release_in_one_batch_hold_each_level_for_debounce_time(monkeypatch):
+    monitor, manager, clock = make_monitor(monkeypatch)
+    latencies = []
+    monitor.inject([('press', 'btn1'), ('release', 'btn1')], 0.0, latencies.append)
+
+    monitor._handle_pin_states()
+    assert manager.is_button_pressed('btn1')
+    assert len(latencies) == 1
+
+    # The release waits out the debounce time instead of being dropped as a bounce
+    clock.now += 0.001
+    monitor._handle_pin_states()
+    assert manager.is_button_pressed('btn1')
+    assert 0 < monitor._injected_delay <= 0.02
+    assert len(latencies) == 1
+
+    clock.now += 0.02
+    monitor._handle_pin_states()
+    assert not manager.is_button_pressed('btn1')
+    assert monitor._injected_delay is None
+    assert len(latencies) == 2
+    assert [gesture.name for gesture in monitor._action_handler.states[-1]['gestures']] == ['tap1']
@@ -0,0 +1,20 @@
+from PIL import Image
+
+from atc_engine.media_index import MediaIndex
+
+
+def test_preflight_prunes_files_no_longer_referenced(tmp_path):
+    paths = []
+    for name in ('a.png', 'b.png'):
+        path = str(tmp_path / name)
+        Image.new('RGB', (4, 2)).save(path)
+        paths.append(path)
+    index = MediaIndex(str(tmp_path / 'index.sqlite'))
+    try:
+        assert set(index.preflight(paths)) == set(paths)
+        assert set(index.preflight(paths[:1])) == {paths[0]}
+        rows = index._conn.execute("SELECT path FROM media").fetchall()
+        assert rows == [(paths[0],)]
+        assert index.get(paths[0]).width == 4
+    finally:
+        index.close()
@@ -0,0 +1,28 @@
+import os
+import threading
+
+from atc_engine.media_store import MediaStore, file_digest
+
+
+def test_concurrent_ingests_of_new_content_all_store_it(tmp_path):
+    sources = []
+    for index in range(4):
+        path = tmp_path / 'images' / f'copy{index}.png'
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b'same image' * 10000)
+        sources.append(str(path))
+    store = MediaStore(str(tmp_path / 'store'))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.ingest(sources))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    objects = {object_path for result in results for object_path in result.objects.values()}
+    assert all(len(result.objects) == len(sources) for result in results)
+    assert len(objects) == 1
+    assert file_digest(objects.pop()) == file_digest(sources[0])
+    leftovers = [name for _, _, names in os.walk(tmp_path / 'store') for name in names if name.endswith('.tmp')]
+    assert leftovers == []
+    store.close()
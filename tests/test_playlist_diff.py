@@ -0,0 +1,48 @@
+import os
+
+from gpio_slideshow import playlist_diff
+from gpio_slideshow.image_cache import ImageListCache
+
+
+def apply_edit(current, removals, additions, moves):
+    playlist = list(current)
+    for index in removals:
+        del playlist[index]
+    playlist += additions
+    for source, destination in moves:
+        entry = playlist.pop(source)
+        playlist.insert(destination - 1 if source < destination else destination, entry)
+    return playlist
+
+
+def test_diff_playlist_produces_target():
+    current = ['a', 'b', 'c', 'd', 'e']
+    target = ['e', 'c', 'x', 'a', 'y']
+    assert apply_edit(current, *playlist_diff.diff_playlist(current, target)) == target
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_same_name_and_size_is_not_the_same_image(tmp_path):
+    red, blue = str(tmp_path / 'set1' / 'slide.bmp'), str(tmp_path / 'set2' / 'slide.bmp')
+    write(red, b'R' * 64)
+    write(blue, b'B' * 64)
+    cache = ImageListCache([os.path.dirname(red), os.path.dirname(blue)])
+    cache.get(os.path.dirname(red))
+    cache.get(os.path.dirname(blue))
+    assert playlist_diff.reuse_entries([red], [blue], cache.identity) == [blue]
+
+
+def test_hard_link_reuses_the_loaded_entry(tmp_path):
+    original, link = str(tmp_path / 'set1' / 'a.jpg'), str(tmp_path / 'set2' / 'a.jpg')
+    write(original, b'image')
+    os.makedirs(os.path.dirname(link))
+    os.link(original, link)
+    cache = ImageListCache([os.path.dirname(original), os.path.dirname(link)])
+    cache.get(os.path.dirname(original))
+    cache.get(os.path.dirname(link))
+    assert playlist_diff.reuse_entries([original], [link], cache.identity) == [original]
@@ -0,0 +1,39 @@
+from atc_engine.renderer import ImageCache
+
+
+def test_image_cache_evicts_least_recently_used():
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        return path.upper()
+
+    cache = ImageCache(size=2)
+    assert cache.get('a', load) == 'A'
+    cache.get('b', load)
+    cache.get('a', load)
+    cache.get('c', load)  # Evicts 'b', the least recently used
+    cache.get('a', load)
+    cache.get('b', load)
+    assert loads == ['a', 'b', 'c', 'b']
+
+
+def test_folder_listing_is_cached_until_media_changes(tmp_path, monkeypatch):
+    from atc_engine import renderer as renderer_module
+    from atc_engine.renderer import Renderer
+
+    for name in ('a.jpg', 'b.jpg'):
+        (tmp_path / name).write_bytes(b'')
+    scans = []
+    find_images = renderer_module.find_images
+    monkeypatch.setattr(renderer_module, 'find_images', lambda path: scans.append(path) or find_images(path))
+
+    renderer = Renderer()
+    folder = str(tmp_path)
+    first = renderer._folder_images(folder)
+    assert renderer._folder_images(folder) == first
+    assert len(scans) == 1
+
+    renderer.media_changed()
+    renderer._folder_images(folder)
+    assert len(scans) == 2
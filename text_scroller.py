@@ -1,11 +1,20 @@
 import argparse
 import sys
 
-try:
-    import pygame
-except ImportError:
-    print("Error: Pygame library not found. Please install it (e.g., python -m pip install pygame).")
-    sys.exit(1)
+from atc_engine.startup_profile import profiler
+
+# pygame is imported by import_pygame() once the arguments are parsed
+pygame = None
+
+def import_pygame():
+    """Imports pygame on first use."""
+    global pygame
+    with profiler.phase("import pygame"):
+        try:
+            import pygame
+        except ImportError:
+            print("Error: Pygame library not found. Please install it (e.g., python -m pip install pygame).")
+            sys.exit(1)
 
 def parse_color(color_str):
     """Parses a color string into a Pygame color tuple."""
@@ -42,19 +51,26 @@ def main():
                         help=f"Font color (name or R,G,B string, default: '{DEFAULT_FONT_COLOR}').")
     parser.add_argument("--bg_color", type=str, default=DEFAULT_BG_COLOR,
                         help=f"Background color (name or R,G,B string, default: '{DEFAULT_BG_COLOR}').")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print per-phase import and init times once the first frame is shown.")
 
     args = parser.parse_args()
+    if args.profile_startup:
+        profiler.enable()
 
-    pygame.init()
+    import_pygame()
 
-    screen_info = pygame.display.Info()
-    screen_width = screen_info.current_w
-    screen_height = screen_info.current_h
-    
-    # Attempt to enable hardware acceleration and double buffering for smoother rendering
-    flags = pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF
-    screen = pygame.display.set_mode((screen_width, screen_height), flags)
-    pygame.display.set_caption("Text Scroller")
+    with profiler.phase("init display"):
+        pygame.init()
+
+        screen_info = pygame.display.Info()
+        screen_width = screen_info.current_w
+        screen_height = screen_info.current_h
+        
+        # Attempt to enable hardware acceleration and double buffering for smoother rendering
+        flags = pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF
+        screen = pygame.display.set_mode((screen_width, screen_height), flags)
+        pygame.display.set_caption("Text Scroller")
 
     font_color = parse_color(args.font_color)
     bg_color = parse_color(args.bg_color)
@@ -70,11 +86,12 @@ def main():
             font_size_to_use = 20
 
 
-    try:
-        font = pygame.font.Font(None, font_size_to_use) # Use default system font
-    except pygame.error as e:
-        print(f"Error loading font: {e}. Using fallback size 48.")
-        font = pygame.font.Font(None, 48)
+    with profiler.phase("load font"):
+        try:
+            font = pygame.font.Font(None, font_size_to_use) # Use default system font
+        except pygame.error as e:
+            print(f"Error loading font: {e}. Using fallback size 48.")
+            font = pygame.font.Font(None, 48)
 
 
     lines = args.text_to_display.splitlines()
@@ -120,6 +137,7 @@ def main():
             screen.fill(bg_color)
             screen.blit(rendered_text, (x_pos, y_pos))
             pygame.display.flip()
+            profiler.first_frame()
 
             # Line is done scrolling when it has completely moved off-screen to the left
             if x_pos + text_width < 0: